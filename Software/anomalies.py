@@ -0,0 +1,191 @@
+"""
+Sensor Fault Detection for Environmental Data
+Author: [Your Name]
+Purpose: Flag sensor faults and anomalies in long logs as event intervals
+
+Each detector is a few whole-array sweeps over the log (comparisons,
+diffs and rolling medians), never a loop over rows:
+- dropout: a run of readings without an echo (distance 999)
+- flatline: the IR reading stuck on one value
+- spike: a short excursion far outside the rolling median (rolling MAD)
+- jump: distance changing faster than anything in front of the station moves
+- dead_period: no readings at all for a while
+
+Events are rows of a DataFrame; anomaly_mask() turns them into a row mask
+for the report and the plots.
+"""
+
+import numpy as np
+import pandas as pd
+
+from schema import has_echo, distance_float
+from timeaxis import SAMPLE_INTERVAL_MS
+
+EVENT_COLUMNS = ['kind', 'column', 'start_row', 'end_row', 'start_ms', 'end_ms', 'duration_s', 'samples']
+
+KINDS = ('dropout', 'flatline', 'spike', 'jump', 'dead_period')
+
+# A few missing echoes are normal (nothing within range); 5 s of them is a dropout
+DROPOUT_MIN_SAMPLES = 10
+# The IR input is noisy: a minute of identical values means the sensor is stuck
+FLATLINE_MIN_SAMPLES = 120
+
+SPIKE_WINDOW = 15           # samples in the rolling median
+SPIKE_THRESHOLD = 6.0       # scaled MADs from the median
+SPIKE_MAX_SAMPLES = 2       # longer excursions are level changes, not spikes
+# Deviations smaller than this are never spikes, even when the signal is very steady
+SPIKE_MIN_DEVIATION = {'Distancia(cm)': 20.0, 'Luminosidade(IR)': 50.0}
+
+# Faster than people, animals or water levels in front of the station move
+MAX_SPEED_CM_S = 500.0
+
+# Twenty missed samples in a row
+DEAD_GAP_MS = 20 * SAMPLE_INTERVAL_MS
+
+
+def flag_runs(flags, min_samples=1):
+    """(start rows, end rows) of runs of True at least min_samples long; ends are exclusive"""
+    edges = np.diff(np.asarray(flags, dtype=np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    keep = ends - starts >= min_samples
+    return starts[keep], ends[keep]
+
+
+def _events(kind, column, starts, ends, times):
+    """Event rows for runs of readings [start, end)"""
+    start_ms = times[starts] if len(starts) else np.zeros(0, dtype=np.int64)
+    end_ms = times[ends - 1] if len(ends) else np.zeros(0, dtype=np.int64)
+    return pd.DataFrame({
+        'kind': kind,
+        'column': column,
+        'start_row': starts,
+        'end_row': ends,
+        'start_ms': start_ms,
+        'end_ms': end_ms,
+        'duration_s': (end_ms - start_ms) / 1000,
+        'samples': ends - starts
+    }, columns=EVENT_COLUMNS)
+
+
+def detect_dropouts(distance, times, min_samples=DROPOUT_MIN_SAMPLES):
+    """Runs of at least min_samples readings without an echo"""
+    starts, ends = flag_runs(~np.asarray(has_echo(distance)), min_samples)
+    return _events('dropout', 'Distancia(cm)', starts, ends, times)
+
+
+def detect_flatlines(reflectance, times, min_samples=FLATLINE_MIN_SAMPLES):
+    """Runs of at least min_samples identical IR readings"""
+    values = np.asarray(reflectance)
+    # same[i]: reading i repeats reading i - 1, so a run of k flags covers k + 1 readings
+    same = np.zeros(len(values), dtype=bool)
+    np.equal(values[1:], values[:-1], out=same[1:])
+    starts, ends = flag_runs(same, max(min_samples - 1, 1))
+    return _events('flatline', 'Luminosidade(IR)', starts - 1, ends, times)
+
+
+def detect_spikes(values, times, column, window=SPIKE_WINDOW, threshold=SPIKE_THRESHOLD,
+                  max_samples=SPIKE_MAX_SAMPLES, min_deviation=None):
+    """Short excursions beyond threshold scaled MADs of a centered rolling median
+
+    NaN values (readings without an echo) are skipped by the medians and
+    never flagged.
+    """
+    if min_deviation is None:
+        min_deviation = SPIKE_MIN_DEVIATION.get(column, 0.0)
+    series = pd.Series(np.asarray(values, dtype=np.float64))
+    min_periods = window // 2 + 1
+    median = series.rolling(window, center=True, min_periods=min_periods).median()
+    deviation = (series - median).abs()
+    mad = deviation.rolling(window, center=True, min_periods=min_periods).median()
+    # 1.4826 scales the MAD to a standard deviation for normal noise
+    limit = np.maximum(threshold * 1.4826 * mad.values, min_deviation)
+    with np.errstate(invalid='ignore'):
+        outlier = deviation.values > limit
+    starts, ends = flag_runs(outlier)
+    short = ends - starts <= max_samples
+    return _events('spike', column, starts[short], ends[short], times)
+
+
+def detect_jumps(distance, states, times, max_speed_cm_s=MAX_SPEED_CM_S):
+    """Consecutive echoes whose distance changes faster than max_speed_cm_s
+
+    An object entering or leaving the beam changes the station's state;
+    those readings are legitimate jumps and are not flagged.
+    """
+    values = distance_float(distance)
+    change = np.abs(np.diff(values))
+    seconds = np.diff(times) / 1000
+    codes = pd.Categorical(states).codes
+    with np.errstate(invalid='ignore', divide='ignore'):
+        impossible = (change / seconds > max_speed_cm_s) & (seconds > 0) & (codes[1:] == codes[:-1])
+    rows = np.flatnonzero(impossible) + 1
+    return _events('jump', 'Distancia(cm)', rows, rows + 1, times)
+
+
+def detect_dead_periods(times, max_gap_ms=DEAD_GAP_MS):
+    """Gaps of more than max_gap_ms between readings (no rows: start_row == end_row)"""
+    rows = np.flatnonzero(np.diff(times) > max_gap_ms) + 1
+    return pd.DataFrame({
+        'kind': 'dead_period',
+        'column': None,
+        'start_row': rows,
+        'end_row': rows,
+        'start_ms': times[rows - 1],
+        'end_ms': times[rows],
+        'duration_s': (times[rows] - times[rows - 1]) / 1000,
+        'samples': 0
+    }, columns=EVENT_COLUMNS)
+
+
+def detect_anomalies(data, times_ms, kinds=KINDS):
+    """Every anomaly of the selected kinds as events sorted by time
+
+    times_ms must be the stitched time axis (never decreasing).
+    """
+    times = np.asarray(times_ms, dtype=np.int64)
+    detectors = {
+        'dropout': lambda: [detect_dropouts(data['Distancia(cm)'], times)],
+        'flatline': lambda: [detect_flatlines(data['Luminosidade(IR)'], times)],
+        'spike': lambda: [detect_spikes(distance_float(data['Distancia(cm)']), times, 'Distancia(cm)'),
+                          detect_spikes(data['Luminosidade(IR)'], times, 'Luminosidade(IR)')],
+        'jump': lambda: [detect_jumps(data['Distancia(cm)'], data['Estado'], times)],
+        'dead_period': lambda: [detect_dead_periods(times)]
+    }
+    events = [frame for kind in kinds for frame in detectors[kind]() if len(frame)]
+    if not events:
+        return pd.DataFrame({column: [] for column in EVENT_COLUMNS})
+    events = pd.concat(events, ignore_index=True)
+    return events.sort_values(['start_ms', 'kind'], kind='stable', ignore_index=True)
+
+
+def anomaly_mask(events, n_rows, kinds=None):
+    """Boolean row mask: True where a reading lies inside an event of the selected kinds"""
+    if kinds is not None:
+        events = events[events['kind'].isin(kinds)]
+    delta = np.zeros(n_rows + 1, dtype=np.int64)
+    np.add.at(delta, events['start_row'].values.astype(np.int64), 1)
+    np.add.at(delta, events['end_row'].values.astype(np.int64), -1)
+    return np.cumsum(delta[:-1]) > 0
+
+
+def anomaly_summary(events):
+    """Events, flagged readings and total duration per kind"""
+    summary = events.groupby('kind', sort=False).agg(events=('kind', 'size'), samples=('samples', 'sum'),
+                                                     duration_s=('duration_s', 'sum'))
+    return summary.reindex([kind for kind in KINDS if kind in summary.index])
+
+
+# Span colors of each kind on time plots
+KIND_COLORS = {'dropout': 'grey', 'flatline': 'orange', 'spike': 'red', 'jump': 'purple',
+               'dead_period': 'black'}
+
+
+def shade_anomalies(ax, events, kinds=KINDS, max_spans=200):
+    """Shade the longest events on a time plot (x in seconds); short ones would not be visible"""
+    events = events[events['kind'].isin(kinds)].nlargest(max_spans, 'duration_s')
+    for kind, group in events.groupby('kind', sort=False):
+        for i, (start_ms, end_ms) in enumerate(zip(group['start_ms'], group['end_ms'])):
+            ax.axvspan(start_ms / 1000, max(end_ms, start_ms + SAMPLE_INTERVAL_MS) / 1000,
+                       color=KIND_COLORS[kind], alpha=0.15, linewidth=0,
+                       label=kind.replace('_', ' ') if i == 0 else None)
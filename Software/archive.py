@@ -0,0 +1,224 @@
+"""
+Binary Reading Archive for Environmental Data
+Author: [Your Name]
+Purpose: Append-only archive of fixed-size records, opened as zero-copy NumPy views
+
+Every reading is a packed 9-byte record (u32 millis, i16 distance with 999
+for no echo, u16 IR, u8 state code) after a 64-byte header. The header
+holds the number of committed records: an append writes and syncs the
+records first and only then the new count, so a crash mid-append leaves a
+tail past the count that readers ignore and the next append overwrites.
+
+Opening an archive reads the header and memory-maps the records. Frames
+are built from strided views of the mapped fields, so nothing is copied or
+parsed and only the pages of the rows actually used are read from disk.
+"""
+
+import os
+import struct
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from schema import DISTANCE_SENTINEL, STATE_DTYPE, read_readings, distance_values
+from timeaxis import TimeStitcher, file_end_time
+from timeindex import OffsetIndex
+from rollups import epoch_ms
+
+RECORD_DTYPE = np.dtype([
+    ('time', '<u4'),
+    ('distance', '<i2'),
+    ('reflectance', '<u2'),
+    ('state', 'u1')
+])
+
+MAGIC = b'EMSARCH\x00'
+ARCHIVE_VERSION = 1
+ARCHIVE_SUFFIX = '.emsarc'
+
+# magic, version, record size, committed records, capture start (epoch ms, -1 unknown), station
+HEADER = struct.Struct('<8sIIQq32s')
+HEADER_BYTES = 64
+# The committed count is one aligned 8-byte field, updated on its own
+COUNT_OFFSET = 16
+
+
+def is_archive(path):
+    """True for a file starting with the archive's magic bytes"""
+    if not os.path.isfile(path):
+        return False
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def to_records(frame):
+    """Readings in the schema (or with 999 distances) as an array of archive records"""
+    states = frame['Estado']
+    codes = (states.cat.codes.values if states.dtype == STATE_DTYPE
+             else pd.Categorical(states, dtype=STATE_DTYPE).codes)
+    if (codes < 0).any():
+        raise ValueError("readings with unknown states cannot be archived")
+    records = np.empty(len(frame), dtype=RECORD_DTYPE)
+    records['time'] = frame['Tempo(ms)'].values
+    records['distance'] = distance_values(frame['Distancia(cm)'])
+    records['reflectance'] = frame['Luminosidade(IR)'].values
+    records['state'] = codes
+    return records
+
+
+class ReadingArchive:
+    """One station's readings in an append-only file of fixed-size records"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, record_size, count, start_ms, station = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a reading archive")
+        if version != ARCHIVE_VERSION or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"unsupported reading archive version in {path}")
+        self.count = count
+        self.start_time = None if start_ms < 0 else pd.Timestamp(start_ms, unit='ms')
+        self.station = station.rstrip(b'\x00').decode() or None
+        self._records = None
+
+    @classmethod
+    def create(cls, path, station=None, start_time=None):
+        """New empty archive; start_time is the capture start, if known"""
+        start_ms = -1 if start_time is None else int(epoch_ms([pd.Timestamp(start_time)])[0])
+        header = HEADER.pack(MAGIC, ARCHIVE_VERSION, RECORD_DTYPE.itemsize, 0, start_ms,
+                             (station or '').encode()[:32])
+        with open(path, 'xb') as f:
+            f.write(header.ljust(HEADER_BYTES, b'\x00'))
+            f.flush()
+            os.fsync(f.fileno())
+        return cls(path)
+
+    @classmethod
+    def open(cls, path, station=None, start_time=None):
+        """Existing archive, or a new one"""
+        return cls(path) if os.path.exists(path) else cls.create(path, station, start_time)
+
+    def __len__(self):
+        return self.count
+
+    def refresh(self):
+        """Pick up records committed by another process since the archive was opened"""
+        with open(self.path, 'rb') as f:
+            f.seek(COUNT_OFFSET)
+            count = struct.unpack('<Q', f.read(8))[0]
+        if count != self.count:
+            self.count = count
+            self._records = None
+        return self
+
+    @property
+    def records(self):
+        """Committed records as a read-only memory map (nothing is read until used)"""
+        if self._records is None:
+            if self.count == 0:
+                self._records = np.zeros(0, dtype=RECORD_DTYPE)
+            else:
+                self._records = np.memmap(self.path, dtype=RECORD_DTYPE, mode='r',
+                                          offset=HEADER_BYTES, shape=(self.count,))
+        return self._records
+
+    def append(self, frame):
+        """Append readings crash-safely: records are synced before the count that commits them"""
+        records = to_records(frame)
+        if len(records) == 0:
+            return 0
+        end = HEADER_BYTES + self.count * RECORD_DTYPE.itemsize
+        with open(self.path, 'r+b') as f:
+            # Drop the tail of an append that never committed
+            f.truncate(end)
+            f.seek(end)
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+            os.pwrite(f.fileno(), struct.pack('<Q', self.count + len(records)), COUNT_OFFSET)
+            os.fsync(f.fileno())
+        self.count += len(records)
+        self._records = None
+        return len(records)
+
+    def frame(self, start=None, stop=None):
+        """Readings of rows [start, stop) in the schema, as views of the mapped records
+
+        The distance column needs a no-echo mask (one byte per row) and
+        Tempo(ms) stays uint32 as stored; every other value is a view.
+        """
+        records = self.records[start:stop]
+        distance = records['distance']
+        data = pd.DataFrame({
+            'Tempo(ms)': records['time'],
+            'Distancia(cm)': pd.arrays.IntegerArray(distance, distance == DISTANCE_SENTINEL),
+            'Luminosidade(IR)': records['reflectance'],
+            'Estado': pd.Categorical.from_codes(records['state'].view(np.int8), dtype=STATE_DTYPE)
+        }, copy=False)
+        data.attrs['invalid'] = {'rows': 0}
+        return data
+
+    def read(self, start_ms=None, end_ms=None):
+        """Readings with stitched times in [start_ms, end_ms) as (frame, elapsed_ms, breaks)
+
+        Same result as OffsetIndex.read() for a CSV log. Only the time field
+        is read for the whole archive; breaks are the resets and wraparounds
+        inside the range, rows counted from its start.
+        """
+        stitcher = TimeStitcher()
+        elapsed = stitcher.stitch(self.records['time'])
+        lo = 0 if start_ms is None else int(np.searchsorted(elapsed, start_ms, side='left'))
+        hi = len(elapsed) if end_ms is None else int(np.searchsorted(elapsed, end_ms, side='left'))
+        breaks = [(row - lo, *rest) for row, *rest in stitcher.breaks if lo < row < hi]
+        return self.frame(lo, hi), elapsed[lo:hi], breaks
+
+    def capture_start(self):
+        """Capture start from the header, or else as for a log: the last reading at the file's mtime"""
+        if self.start_time is not None:
+            return self.start_time
+        last_ms = TimeStitcher().stitch(self.records['time'])[-1] if self.count else 0
+        return file_end_time(self.path) - pd.Timedelta(milliseconds=int(last_ms))
+
+    def tail(self, rows):
+        """The last `rows` readings"""
+        return self.frame(max(self.count - rows, 0))
+
+
+def convert_csv(csv_file, path, station=None, start_time=None, chunksize=500_000):
+    """Append an Arduino CSV log to an archive, chunk by chunk"""
+    if start_time is None and not os.path.exists(path):
+        start_time = OffsetIndex.for_log(csv_file).capture_start()
+    archive = ReadingArchive.open(path, station, start_time)
+    total = 0
+    rejected = 0
+    for chunk in read_readings(csv_file, chunksize=chunksize):
+        rejected += chunk.attrs['invalid']['rows']
+        total += archive.append(chunk)
+    print(f"✓ Archived {total} records from {csv_file} into {path} ({len(archive)} in total)")
+    if rejected:
+        print(f"  Rejected {rejected} invalid rows")
+    return archive
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Append Arduino CSV logs to a binary reading archive")
+    parser.add_argument('archive', help=f"archive file (e.g. station{ARCHIVE_SUFFIX})")
+    parser.add_argument('csv_files', nargs='*', help="CSV logs to append, in capture order")
+    parser.add_argument('--station', help="station identifier, for a new archive")
+    parser.add_argument('--start', help="capture start of a new archive (default: estimated from the first log)")
+    args = parser.parse_args()
+
+    for csv_file in args.csv_files:
+        convert_csv(csv_file, args.archive, args.station, args.start)
+
+    archive = ReadingArchive(args.archive)
+    print(f"Station: {archive.station or 'unknown'}")
+    print(f"Capture start: {archive.start_time if archive.start_time is not None else 'unknown'}")
+    print(f"Records: {len(archive)} ({os.path.getsize(args.archive) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Benchmark Suite for Environmental Data Analysis
+Author: [Your Name]
+Purpose: Time and memory-profile the analyzer and visualizer hot paths on synthetic data
+"""
+
+import io
+import os
+import gc
+import sys
+import json
+import time
+import platform
+import tempfile
+import argparse
+import resource
+import subprocess
+import contextlib
+import tracemalloc
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from synthetic import generate, write_capture
+from context import AnalysisContext
+from visualization import EnvironmentalVisualizer, create_interactive_dashboard
+from rendering import load_analyzer_module
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+PLOT_METHODS = sorted(name for name in vars(EnvironmentalVisualizer) if name.startswith('plot_'))
+
+ANALYSIS_METHODS = sorted(name for name in vars(load_analyzer_module().EnvironmentalAnalyzer)
+                          if name.startswith('analyze_'))
+
+
+def dataset(rows, seed, data_dir):
+    """Path of a synthetic CSV log with the given size, generated once and reused"""
+    os.makedirs(data_dir, exist_ok=True)
+    filename = os.path.join(data_dir, f'synthetic_{rows}_{seed}.csv')
+    if not os.path.exists(filename):
+        write_capture(generate(rows, seed=seed, resets=max(rows // 1_000_000, 1)), filename)
+    return filename
+
+
+def git_commit():
+    """Current commit and whether the tree has local changes (None outside a checkout)"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=here, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=here,
+                               capture_output=True, text=True, check=True).stdout.strip() != ''
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+class Timer:
+    """Runs benchmark steps, recording wall/CPU time or traced peak memory"""
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.results = {}
+
+    def __call__(self, name, fn):
+        gc.collect()
+        if self.trace:
+            tracemalloc.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fn()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        if self.trace:
+            self.results[name] = {'peak_bytes': tracemalloc.get_traced_memory()[1]}
+            tracemalloc.stop()
+        else:
+            self.results[name] = {'seconds': wall, 'cpu_seconds': cpu}
+        return result
+
+
+def _plot(visualizer, method):
+    fig, ax = plt.subplots(figsize=(10, 4))
+    try:
+        getattr(visualizer, method)(ax)
+        fig.canvas.draw()
+    finally:
+        plt.close(fig)
+
+
+def run_suite(analyzer_module, csv_file, output_dir, timer, cold=False):
+    """One pass over every hot path, in the order of a normal analysis run
+
+    Steps share the analyzer's context as they do in practice, so derived
+    data is paid for by the first step that needs it. With cold=True every
+    visualizer step gets a fresh context instead.
+    """
+    analyzer = timer('load_data', lambda: analyzer_module.EnvironmentalAnalyzer(csv_file))
+    for method in ANALYSIS_METHODS:
+        timer(method, getattr(analyzer, method))
+    timer('generate_report', lambda: analyzer.generate_report(os.path.join(output_dir, 'report.md')))
+
+    context = lambda: AnalysisContext(analyzer.data) if cold else analyzer.context
+    for method in PLOT_METHODS:
+        timer(method, lambda: _plot(EnvironmentalVisualizer(context()), method))
+
+    html = os.path.join(output_dir, 'dashboard.html')
+    timer('create_interactive_dashboard', lambda: create_interactive_dashboard(context(), html))
+    timer('create_interactive_dashboard[high_volume]',
+          lambda: create_interactive_dashboard(context(), html, high_volume=True))
+    return timer.results
+
+
+def benchmark(sizes=DEFAULT_SIZES, seed=0, repeat=1, memory=True, cold=False, data_dir=None):
+    """Benchmark results for every dataset size, as a JSON-serializable dict"""
+    data_dir = data_dir or os.path.join(tempfile.gettempdir(), 'ems-benchmark')
+    analyzer_module = load_analyzer_module()
+    commit, dirty = git_commit()
+    results = []
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for rows in sizes:
+            csv_file = dataset(rows, seed, data_dir)
+            print(f"Benchmarking {rows} rows ({os.path.getsize(csv_file) / 1e6:.1f} MB)")
+
+            # Timing passes (best of repeat), then one traced pass for peak memory
+            timings = [run_suite(analyzer_module, csv_file, output_dir, Timer(), cold) for _ in range(repeat)]
+            peaks = run_suite(analyzer_module, csv_file, output_dir, Timer(trace=True), cold) if memory else {}
+
+            for name in timings[0]:
+                best = min(timings, key=lambda t: t[name]['seconds'])[name]
+                result = {'name': name, 'rows': rows, **best,
+                          'peak_bytes': peaks.get(name, {}).get('peak_bytes')}
+                results.append(result)
+                peak = f"{result['peak_bytes'] / 1e6:9.1f} MB" if result['peak_bytes'] is not None else ''
+                print(f"  {name:<45} {result['seconds']:9.3f} s {peak}")
+
+    return {
+        'meta': {
+            'commit': commit,
+            'dirty': dirty,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'matplotlib': matplotlib.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': seed,
+            'repeat': repeat,
+            'cold': cold,
+            # Linux reports kilobytes, macOS bytes
+            'max_rss_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+        },
+        'results': results
+    }
+
+
+def compare(baseline, current):
+    """Print the time and memory ratio of every step against a baseline run"""
+    old = {(r['name'], r['rows']): r for r in baseline['results']}
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    print(f"  {'step':<45} {'rows':>10} {'time':>8} {'memory':>8}")
+    for result in current['results']:
+        before = old.get((result['name'], result['rows']))
+        if before is None:
+            continue
+        time_ratio = f"{result['seconds'] / before['seconds']:.2f}x" if before['seconds'] else '-'
+        memory_ratio = (f"{result['peak_bytes'] / before['peak_bytes']:.2f}x"
+                        if result['peak_bytes'] and before.get('peak_bytes') else '-')
+        print(f"  {result['name']:<45} {result['rows']:>10} {time_ratio:>8} {memory_ratio:>8}")
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the analysis and visualization hot paths")
+    parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_SIZES), help="dataset sizes")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help="timing passes per size (best is kept)")
+    parser.add_argument('--no-memory', action='store_true', help="skip the traced memory pass")
+    parser.add_argument('--cold', action='store_true', help="no shared analysis context between steps")
+    parser.add_argument('--data-dir', help="where synthetic datasets are cached")
+    parser.add_argument('--output', default='benchmark.json', help="JSON results file")
+    parser.add_argument('--compare', help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    results = benchmark(args.rows, args.seed, args.repeat, not args.no_memory, args.cold, args.data_dir)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"✓ Benchmark results saved: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Shared Analysis Context for Environmental Data
+Author: [Your Name]
+Purpose: Compute derived data once per dataset version and share it across tools
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from streaming import ReadingSummary, DISTANCE_BINS, DISTANCE_LABELS
+from schema import validate, has_echo, distance_values, distance_float
+from timeaxis import TimeStitcher
+from transitions import encode_runs
+from rollups import RollupPyramid, TIERS
+from downsampling import downsample
+from anomalies import detect_anomalies, anomaly_mask
+from correlation import (ROLLING_WINDOW, MAX_LAG, rolling_correlation, lag_correlation,
+                         distance_reflectance)
+from instrumentation import span
+
+# Rollup column prefix of each plotted reading column
+ROLLUP_COLUMNS = {'Distancia(cm)': 'distance', 'Luminosidade(IR)': 'reflectance'}
+
+
+class AnalysisContext:
+    """Lazily computed, cached products derived from one readings frame
+
+    Every product is computed at most once per dataset version. Appending
+    rows bumps the version and drops the cache; the one-pass summary and the
+    stitched time axis are the exceptions and are extended with the new rows.
+    Products may be requested from several threads; each is still computed once.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.version = 0
+        self._cache = {}
+        self._locks = {}
+
+    @classmethod
+    def of(cls, data):
+        """Reuse an existing context, or wrap a DataFrame in a new one"""
+        return data if isinstance(data, cls) else cls(data)
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            # One lock per product, so independent products can be computed concurrently
+            with self._locks.setdefault(key, threading.Lock()):
+                if key not in self._cache:
+                    label = key if isinstance(key, str) else '.'.join(map(str, key))
+                    with span(f'context.{label}', rows=len(self.data)):
+                        self._cache[key] = compute()
+        return self._cache[key]
+
+    def append(self, rows):
+        """Append readings and invalidate everything derived from the old version
+
+        Rows are validated like a loaded log (invalid ones are dropped).
+        Rows without a datetime column continue the existing time axis.
+        """
+        rows = validate(rows)[0]
+        summary = self._cache.get('summary')
+        rollups = self._cache.get('rollups')
+        elapsed = self.elapsed_ms
+        stitcher = self.stitcher
+        new_elapsed = stitcher.stitch(rows['Tempo(ms)'].values)
+
+        if 'datetime' in self.data.columns and 'datetime' not in rows.columns and len(self.data) > 0:
+            offsets = pd.to_timedelta(new_elapsed - elapsed[-1], unit='ms')
+            rows = rows.assign(datetime=(self.data['datetime'].iloc[-1] + offsets).values)
+
+        self.data = pd.concat([self.data, rows], ignore_index=True)
+        self.invalidate()
+
+        # The one-pass products only need the new rows
+        self._cache['stitcher'] = stitcher
+        self._cache['elapsed_ms'] = np.concatenate([elapsed, new_elapsed])
+        if summary is not None:
+            self._cache['summary'] = summary.update(rows)
+        if rollups is not None:
+            self._cache['rollups'] = rollups.update(rows, new_elapsed)
+        return self
+
+    def invalidate(self):
+        self.version += 1
+        self._cache.clear()
+
+    def seed_time_axis(self, elapsed_ms, breaks=()):
+        """Use a time axis stitched elsewhere, e.g. over the whole log this data was cut from
+
+        The stitcher continues after the last reading, so readings appended
+        to a window that ends at the tail are stitched correctly.
+        """
+        stitcher = TimeStitcher()
+        if len(elapsed_ms) > 0:
+            stitcher.last_raw = int(self.data['Tempo(ms)'].iat[-1])
+            stitcher.offset = int(elapsed_ms[-1]) - stitcher.last_raw
+            stitcher.rows_seen = len(elapsed_ms)
+        stitcher.breaks = list(breaks)
+        self._cache['elapsed_ms'] = elapsed_ms
+        self._cache['stitcher'] = stitcher
+        return self
+
+    def slice(self, start, stop):
+        """Context over rows [start, stop): a view of the data on the same time axis"""
+        window = AnalysisContext(self.data.iloc[start:stop])
+        breaks = [(row - start, *rest) for row, *rest in self.stitcher.breaks if start < row < stop]
+        return window.seed_time_axis(self.elapsed_ms[start:stop], breaks)
+
+    # Time axis
+
+    def _stitch(self):
+        stitcher = TimeStitcher()
+        self._cache['stitcher'] = stitcher
+        return stitcher.stitch(self.data['Tempo(ms)'].values)
+
+    @property
+    def elapsed_ms(self):
+        """Milliseconds since the first boot, with resets and wraparounds stitched"""
+        return self._cached('elapsed_ms', self._stitch)
+
+    @property
+    def stitcher(self):
+        """Stitcher holding the resets and wraparounds found on the time axis"""
+        self.elapsed_ms
+        return self._cache['stitcher']
+
+    @property
+    def time_seconds(self):
+        return self._cached('time_seconds', lambda: self.elapsed_ms / 1000)
+
+    @property
+    def rollups(self):
+        """1 s / 1 min / 1 h / 1 day rollup tiers on the stitched time axis"""
+        return self._cached('rollups', lambda: RollupPyramid().update(self.data, self.elapsed_ms))
+
+    def time_series(self, column, width_px, method='minmax', thresholds=(), mask_anomalies=False):
+        """(seconds, values) to draw for a distance or reflectance plot of the given width
+
+        minmax plots of recordings long enough for a rollup tier with one
+        bucket per pixel are drawn from that tier's min/max envelope; other
+        plots downsample the raw readings. With mask_anomalies, readings
+        inside anomaly events are left out (gaps in the line); the rollups
+        include them, so such plots are always drawn from the raw readings.
+        """
+        if mask_anomalies:
+            return downsample(self.time_seconds, self.masked_values(column), width_px, method, thresholds)
+        elapsed = self.elapsed_ms
+        span_ms = elapsed[-1] - elapsed[0] if len(elapsed) else 0
+        if method == 'minmax' and span_ms / max(width_px, 1) >= min(TIERS.values()):
+            envelope = self.rollups.envelope(ROLLUP_COLUMNS[column], points=width_px)
+            if envelope is not None:
+                return envelope
+        values = self.distance_float if column == 'Distancia(cm)' else self.data[column]
+        return downsample(self.time_seconds, values, width_px, method, thresholds)
+
+    # Distance filtering
+
+    @property
+    def valid_mask(self):
+        """Readings with an ultrasonic echo (not <NA> or the 999 sentinel)"""
+        return self._cached('valid_mask', lambda: np.asarray(has_echo(self.data['Distancia(cm)'])))
+
+    @property
+    def valid_data(self):
+        """Readings with an echo; the distance column holds plain integers here"""
+        def compute():
+            valid = self.data[self.valid_mask]
+            return valid.assign(**{'Distancia(cm)': distance_values(valid['Distancia(cm)'])})
+        return self._cached('valid_data', compute)
+
+    @property
+    def distance_float(self):
+        """Distances as floats with NaN where there was no echo (for plotting)"""
+        return self._cached('distance_float', lambda: distance_float(self.data['Distancia(cm)']))
+
+    @property
+    def valid_distances(self):
+        return self._cached('valid_distances', lambda: self.valid_data['Distancia(cm)'])
+
+    @property
+    def distance_categories(self):
+        return self._cached('distance_categories', lambda: pd.cut(
+            self.valid_distances,
+            bins=DISTANCE_BINS,
+            labels=DISTANCE_LABELS,
+            include_lowest=True
+        ))
+
+    # Aggregates
+
+    @property
+    def summary(self):
+        return self._cached('summary', lambda: ReadingSummary.from_frame(self.data))
+
+    @property
+    def state_counts(self):
+        def compute():
+            counts = self.data['Estado'].value_counts()
+            return counts[counts > 0]
+        return self._cached('state_counts', compute)
+
+    @property
+    def correlation(self):
+        return self.summary.correlation.correlation
+
+    def rolling_correlation(self, window=ROLLING_WINDOW):
+        """Distance/reflectance correlation over the `window` readings ending at each reading"""
+        return self._cached(('rolling_correlation', window), lambda: rolling_correlation(
+            *distance_reflectance(self.data), window))
+
+    def lag_correlation(self, max_lag=MAX_LAG):
+        """Correlation of distance with reflectance k readings later, per lag k"""
+        return self._cached(('lag_correlation', max_lag), lambda: lag_correlation(
+            *distance_reflectance(self.data), max_lag))
+
+    @property
+    def runs(self):
+        return self._cached('runs', lambda: encode_runs(self.data['Estado'].values, self.elapsed_ms))
+
+    @property
+    def anomalies(self):
+        """Sensor faults and anomalies as event intervals"""
+        return self._cached('anomalies', lambda: detect_anomalies(self.data, self.elapsed_ms))
+
+    def masked_values(self, column, kinds=None):
+        """Float values of a column with NaN inside anomaly events of the selected kinds"""
+        def compute():
+            values = (self.distance_float if column == 'Distancia(cm)'
+                      else self.data[column].to_numpy(dtype=np.float64))
+            return np.where(anomaly_mask(self.anomalies, len(self.data), kinds), np.nan, values)
+        return self._cached(('masked_values', column, kinds), compute)
+
+    @property
+    def rows_by_state(self):
+        """Row positions of every state, in order of first appearance"""
+        def compute():
+            codes, uniques = pd.factorize(self.data['Estado'].values)
+            order = np.argsort(codes, kind='stable')
+            order = order[codes[order] >= 0]
+            splits = np.cumsum(np.bincount(codes[codes >= 0], minlength=len(uniques)))[:-1]
+            return dict(zip(uniques, np.split(order, splits)))
+        return self._cached('rows_by_state', compute)
+
+    def values_by_state(self, column, valid_only=False):
+        """Per-state arrays of one column, skipping states with no readings"""
+        def compute():
+            column_values = self.data[column]
+            values = (distance_values(column_values) if column == 'Distancia(cm)'
+                      else column_values.to_numpy())
+            groups = {}
+            for state, rows in self.rows_by_state.items():
+                if valid_only:
+                    rows = rows[self.valid_mask[rows]]
+                if len(rows) > 0:
+                    groups[state] = values[rows]
+            return groups
+        return self._cached(('values_by_state', column, valid_only), compute)
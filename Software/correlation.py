@@ -0,0 +1,123 @@
+"""
+Correlation Analysis for Environmental Data
+Author: [Your Name]
+Purpose: Rolling-window and lagged correlation between distance and reflectance
+
+One global Pearson coefficient hides how the relationship changes with the
+target, the vegetation and the time of day. Rolling correlation comes from
+cumulative sums (O(n) for any window) and the lag scan from FFT
+cross-correlations (O(n log n) for all lags at once). Readings without an
+echo are left out of every pair they belong to.
+"""
+
+import numpy as np
+import pandas as pd
+
+from schema import distance_float
+
+# One minute of readings at the sketch's 500 ms interval
+ROLLING_WINDOW = 120
+# Lags scanned in each direction: ten seconds
+MAX_LAG = 20
+# Windows with fewer valid pairs than this give NaN
+MIN_PAIRS = 10
+
+
+def _pairs(x, y):
+    """Centered values with NaN pairs zeroed, and the mask of valid pairs
+
+    Centering on the overall means keeps the sums of squares small, so
+    differences of cumulative sums do not lose precision on long logs.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if not valid.any():
+        return np.zeros_like(x), np.zeros_like(y), valid
+    x = np.where(valid, x - x[valid].mean(), 0.0)
+    y = np.where(valid, y - y[valid].mean(), 0.0)
+    return x, y, valid
+
+
+def _centered(values):
+    """Values centered on their mean with NaN zeroed, and the validity mask as floats"""
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    mean = values[valid].mean() if valid.any() else 0.0
+    return np.where(valid, values - mean, 0.0), valid.astype(np.float64)
+
+
+def _pearson(n, sx, sy, sxx, syy, sxy, min_pairs):
+    """Pearson coefficient from pair sums (arrays); NaN where undefined"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - sx * sy / n
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        r = cov / np.sqrt(var_x * var_y)
+    # Flat windows have no defined correlation (tiny variances are rounding noise)
+    flat = (var_x <= 1e-9 * np.maximum(sxx, 1)) | (var_y <= 1e-9 * np.maximum(syy, 1))
+    r[(n < min_pairs) | flat] = np.nan
+    return np.clip(r, -1, 1)
+
+
+def rolling_correlation(x, y, window=ROLLING_WINDOW, min_pairs=MIN_PAIRS):
+    """Pearson correlation of the `window` readings ending at each reading
+
+    Six cumulative sums give every window in one pass; the first window-1
+    readings use the readings available so far.
+    """
+    x, y, valid = _pairs(x, y)
+    sums = [valid.astype(np.float64), x, y, x * x, y * y, x * y]
+    windowed = []
+    for values in sums:
+        total = np.concatenate([[0.0], np.cumsum(values)])
+        end = np.arange(1, len(values) + 1)
+        windowed.append(total[end] - total[np.maximum(end - window, 0)])
+    return _pearson(*windowed, min_pairs)
+
+
+def _cross_sums(spectrum_a, spectrum_b, max_lag, size):
+    """sum_i a[i] * b[i + k] for k in -max_lag..max_lag, from the spectra of a and b"""
+    circular = np.fft.irfft(np.conj(spectrum_a) * spectrum_b, size)
+    # Negative lags wrap around to the end of the circular correlation
+    return np.concatenate([circular[size - max_lag:], circular[:max_lag + 1]])
+
+
+def lag_correlation(x, y, max_lag=MAX_LAG, min_pairs=MIN_PAIRS):
+    """Correlation of x[i] with y[i + k] for every lag k in -max_lag..max_lag
+
+    A peak at positive k means y follows x by k readings; at negative k, y
+    leads. Each lag uses exactly the overlapping valid pairs.
+    """
+    # Here x and y are valid independently: a pair is (x[i], y[i + k])
+    x, mask_x = _centered(x)
+    y, mask_y = _centered(y)
+    n = len(x)
+    max_lag = min(max_lag, max(n - 1, 0))
+    # Zero padding to at least 2n keeps the circular correlation from wrapping onto itself
+    size = 1 << int(np.ceil(np.log2(max(2 * n, 2))))
+    mx, sx, sxx = (np.fft.rfft(values, size) for values in (mask_x, x, x * x))
+    my, sy, syy = (np.fft.rfft(values, size) for values in (mask_y, y, y * y))
+    sums = [_cross_sums(mx, my, max_lag, size),
+            _cross_sums(sx, my, max_lag, size),
+            _cross_sums(mx, sy, max_lag, size),
+            _cross_sums(sxx, my, max_lag, size),
+            _cross_sums(mx, syy, max_lag, size),
+            _cross_sums(sx, sy, max_lag, size)]
+    # FFT round-off turns exact zero counts into tiny values
+    sums[0] = np.round(sums[0])
+    return pd.Series(_pearson(*sums, min_pairs), index=pd.RangeIndex(-max_lag, max_lag + 1, name='lag'),
+                     name='correlation')
+
+
+def strongest_lag(lags):
+    """(lag, correlation) with the largest absolute correlation"""
+    if lags.isna().all():
+        return 0, np.nan
+    lag = lags.abs().idxmax()
+    return int(lag), float(lags[lag])
+
+
+def distance_reflectance(data):
+    """Distance (NaN without echo) and reflectance as float arrays"""
+    return distance_float(data['Distancia(cm)']), data['Luminosidade(IR)'].to_numpy(dtype=np.float64)
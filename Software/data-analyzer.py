@@ -5,42 +5,124 @@ Country: Mozambique
 Purpose: Analyze environmental data from Arduino station
 """
 
+import os
+import sys
+import argparse
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
-import plotly.graph_objects as go
-from scipy import stats
+from plotting import pyplot
+from storage import ReadingStore
+from timeaxis import anchor_elapsed, file_end_time, SAMPLE_INTERVAL_MS
+from schema import read_readings, memory_per_row
+from rawparser import parse_capture
+from archive import ReadingArchive, is_archive
+from streaming import stream_summary, DEFAULT_CHUNKSIZE, REFLECTANCE_BINS, REFLECTANCE_LABELS
+from report import render_report, render_data_quality, report_document, write_report_json
+from anomalies import anomaly_summary, shade_anomalies
+from correlation import ROLLING_WINDOW, MAX_LAG, strongest_lag
+from reportcache import ReportCache
+from rollups import epoch_ms
+from downsampling import axes_width_px, DEFAULT_WIDTH_PX, DISTANCE_THRESHOLDS
+from plotly_export import write_figure, time_series_figure
+from transitions import debounce_runs, dwell_statistics, transition_matrix
+from context import AnalysisContext
+from timeindex import OffsetIndex
+from online import OnlineStatistics, DEFAULT_WINDOWS_MS
+from instrumentation import span, traced, self_rows
 import warnings
 warnings.filterwarnings('ignore')
 
-# Set plotting style
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+def _is_seconds(bound):
+    """Window bounds given as numbers are seconds on the stitched time axis"""
+    return isinstance(bound, (int, float, np.integer, np.floating)) and not isinstance(bound, bool)
 
 class EnvironmentalAnalyzer:
     """Main class for environmental data analysis"""
     
-    def __init__(self, filename):
+    def __init__(self, filename, station=None, start=None, end=None, columns=None, start_time=None,
+                 streaming=False, chunksize=DEFAULT_CHUNKSIZE, raw=False, data=None):
         self.filename = filename
+        self.raw = raw
+        self.start_time = start_time
+        self.station = station
+        self.start = start
+        self.end = end
+        self.columns = columns
+        self.streaming = streaming
+        self.chunksize = chunksize
         self.data = None
-        self.load_data()
+        self.context = None
+        self.online = None
+        self.summary = None
+        self.sessions = None
+        if data is None:
+            self.load_data()
+        else:
+            # Readings already in memory (a DataFrame or a shared AnalysisContext)
+            self.context = AnalysisContext.of(data)
+            self.data = self.context.data
+    
+    @classmethod
+    def from_frame(cls, data, filename="<frame>", **kwargs):
+        """Analyzer over readings already in memory; nothing is read or printed"""
+        return cls(filename, data=data, **kwargs)
     
+    @traced(rows=self_rows)
     def load_data(self):
-        """Load CSV data from Arduino station"""
+        """Load CSV data from Arduino station, or a partitioned columnar store"""
         print(f"Loading data from: {self.filename}")
         
         try:
-            self.data = pd.read_csv(self.filename)
+            if self.streaming:
+                # Out-of-core mode: one pass over fixed-size chunks, only the summary is kept
+                with span('stream_summary') as current:
+                    self.summary = stream_summary(self.filename, self.chunksize, station=self.station,
+                                                  start=self.start, end=self.end)
+                    current.set(rows=self.summary.rows)
+                print(f"Successfully summarized {self.summary.rows} records in chunks of {self.chunksize}")
+                if self.start_time is None and is_archive(self.filename):
+                    self.start_time = ReadingArchive(self.filename).start_time
+                return
+            
+            if os.path.isdir(self.filename):
+                # Columnar store: read only the requested columns and day partitions
+                with span('store.read') as current:
+                    self.data = ReadingStore(self.filename).read(
+                        station=self.station, start=self.start, end=self.end, columns=self.columns
+                    )
+                    current.set(rows=len(self.data))
+            elif is_archive(self.filename):
+                # Binary archive: the columns are views of the memory-mapped records
+                archive = ReadingArchive(self.filename)
+                with span('archive.open') as current:
+                    self.data = archive.frame()
+                    current.set(rows=len(self.data))
+                if self.start_time is None:
+                    self.start_time = archive.start_time
+            else:
+                if self.raw:
+                    # Raw serial capture: headers after resets, ERR_ lines and noise are skipped
+                    with span('parse_capture') as current:
+                        self.data, capture = parse_capture(self.filename)
+                        current.set(rows=len(self.data))
+                    print(f"Parsed {capture.bytes / 1e6:.1f} MB of capture at {capture.throughput_mb_s:.0f} MB/s "
+                          f"({len(capture.sessions)} sessions)")
+                else:
+                    with span('read_csv') as current:
+                        self.data = read_readings(self.filename)
+                        current.set(rows=len(self.data))
+                invalid = self.data.attrs['invalid']
+                if invalid['rows']:
+                    details = ', '.join(f"{column}: {count}" for column, count in invalid.items()
+                                        if column != 'rows' and count)
+                    print(f"Rejected {invalid['rows']} invalid rows ({details})")
+            self.context = AnalysisContext(self.data)
             print(f"Successfully loaded {len(self.data)} records")
             print(f"Time range: {self.data['Tempo(ms)'].min()} to {self.data['Tempo(ms)'].max()} ms")
             
-            # Convert timestamp to datetime
-            start_time = datetime.now()
-            self.data['datetime'] = self.data['Tempo(ms)'].apply(
-                lambda x: start_time + timedelta(milliseconds=x)
-            )
+            # Convert timestamp to datetime (the store already carries one)
+            if 'datetime' not in self.data.columns:
+                self.build_time_axis()
             
             # Display basic info
             self.display_basic_info()
@@ -52,6 +134,126 @@ class EnvironmentalAnalyzer:
             print(f"Error loading data: {e}")
             return None
     
+    @traced(rows=self_rows)
+    def build_time_axis(self):
+        """Stitch board resets and millis() wraparounds into a real-time datetime column"""
+        elapsed = self.context.elapsed_ms
+        
+        # Without a known capture start, the last reading is taken to be the file's modification time
+        if self.start_time is not None:
+            index = anchor_elapsed(elapsed, start_time=self.start_time)
+        else:
+            index = anchor_elapsed(elapsed, end_time=file_end_time(self.filename))
+        self.data['datetime'] = index.values
+        
+        self.sessions = self.context.stitcher.sessions()
+        if len(self.sessions) > 0:
+            resets = (self.sessions['kind'] == 'reset').sum()
+            wraps = (self.sessions['kind'] == 'wraparound').sum()
+            print(f"Stitched {resets} board resets and {wraps} millis() wraparounds")
+    
+    def get_summary(self):
+        """One-pass summary of the readings (built from the loaded data if not streamed)"""
+        if self.context is not None:
+            self.summary = self.context.summary
+        return self.summary
+    
+    def append(self, rows):
+        """Append new readings; cached analysis products are rebuilt on next use"""
+        before = len(self.data)
+        self.context.append(rows)
+        self.data = self.context.data
+        # The rows as validated by the context (invalid ones dropped)
+        rows = self.data.iloc[before:]
+        if self.online is not None and len(rows):
+            self.online.update_frame(rows, self.context.elapsed_ms[before:])
+        return self
+    
+    def rolling_statistics(self, windows_ms=DEFAULT_WINDOWS_MS):
+        """Rolling-window statistics, kept up to date by append()"""
+        if self.online is None:
+            self.online = OnlineStatistics(windows_ms)
+            # Only the readings inside the longest window matter
+            elapsed = self.context.elapsed_ms
+            if len(elapsed) > 0:
+                first = np.searchsorted(elapsed, elapsed[-1] - max(windows_ms), side='right')
+                self.online.update_frame(self.data.iloc[first:], elapsed[first:])
+        return self.online
+    
+    def overview(self, start_s=None, end_s=None, points=DEFAULT_WIDTH_PX):
+        """(tier, buckets) of the coarsest rollup tier giving `points` buckets over a time range
+
+        Times are seconds on the stitched axis; tier is None when the range
+        is too short for any tier and the raw readings should be used.
+        """
+        start_ms = None if start_s is None else int(start_s * 1000)
+        end_ms = None if end_s is None else int(end_s * 1000)
+        return self.context.rollups.query(start_ms, end_ms, points)
+    
+    def window(self, start=None, end=None):
+        """Analyzer over the readings in [start, end); every analyze_* and plot method works on it
+
+        Numbers are seconds on the stitched time axis, anything else is a
+        datetime. Loaded readings are found by binary search and the window
+        is a view of them, not a copy. In streaming mode only the range is
+        read from disk: the overlapping day partitions of a store, or the
+        overlapping blocks of a CSV log through its offset index.
+        """
+        if self.context is None:
+            return self._read_window(start, end)
+        first = 0 if start is None else self._row_at(start)
+        last = len(self.data) if end is None else self._row_at(end)
+        return EnvironmentalAnalyzer.from_frame(self.context.slice(first, max(first, last)),
+                                                filename=self.filename, start_time=self.start_time)
+    
+    def around(self, event, before=60, after=60):
+        """Window of `before` seconds before an event to `after` seconds after it
+
+        The event is seconds on the stitched axis, a datetime, or a row of
+        state_runs() (the window then spans the whole run).
+        """
+        if isinstance(event, (pd.Series, dict)):
+            start, end = event['start_ms'] / 1000, event['end_ms'] / 1000
+        else:
+            start = end = event
+        if _is_seconds(start):
+            return self.window(start - before, end + after)
+        return self.window(pd.Timestamp(start) - pd.Timedelta(seconds=before),
+                           pd.Timestamp(end) + pd.Timedelta(seconds=after))
+    
+    def _row_at(self, bound):
+        """First row at or after a bound (binary search on the sorted time axis)"""
+        if _is_seconds(bound):
+            return int(np.searchsorted(self.context.elapsed_ms, bound * 1000, side='left'))
+        times = self.data['datetime'].values
+        return int(np.searchsorted(times, pd.Timestamp(bound).to_datetime64(), side='left'))
+    
+    def _read_window(self, start, end):
+        """Read only the readings of a window from the store, the archive or the CSV log"""
+        if os.path.isdir(self.filename):
+            if _is_seconds(start) or _is_seconds(end):
+                raise ValueError("Store windows are selected by datetime")
+            data = ReadingStore(self.filename).read(station=self.station, start=start, end=end,
+                                                    columns=self.columns)
+            return EnvironmentalAnalyzer.from_frame(data, filename=self.filename)
+        
+        # Archives and indexed logs read ranges of the stitched time axis the same way
+        index = ReadingArchive(self.filename) if is_archive(self.filename) else OffsetIndex.for_log(self.filename)
+        # Without a known capture start, the last reading is taken to be the file's modification time
+        if self.start_time is not None:
+            boot = pd.Timestamp(self.start_time)
+        else:
+            boot = index.capture_start()
+        bounds = [None if bound is None else
+                  int(bound * 1000) if _is_seconds(bound) else
+                  (pd.Timestamp(bound) - boot) // pd.Timedelta(milliseconds=1)
+                  for bound in (start, end)]
+        data, elapsed, breaks = index.read(*bounds)
+        data['datetime'] = anchor_elapsed(elapsed, start_time=boot).values
+        context = AnalysisContext(data).seed_time_axis(elapsed, breaks)
+        return EnvironmentalAnalyzer.from_frame(context, filename=self.filename, start_time=boot)
+    
+    @traced(rows=self_rows)
     def display_basic_info(self):
         """Display basic information about the dataset"""
         print("\n" + "="*60)
@@ -63,86 +265,74 @@ class EnvironmentalAnalyzer:
         
         print("\nData Types:")
         print(self.data.dtypes)
+        print(f"Memory: {memory_per_row(self.data):.1f} bytes per reading")
         
-        print("\nMissing Values:")
+        print("\nMissing Values (distance: no echo):")
         print(self.data.isnull().sum())
         
-        print("\nBasic Statistics:")
-        print(self.data[['Distancia(cm)', 'Luminosidade(IR)']].describe())
+        numeric_columns = [c for c in ['Distancia(cm)', 'Luminosidade(IR)'] if c in self.data.columns]
+        if numeric_columns:
+            print("\nBasic Statistics:")
+            print(self.data[numeric_columns].describe())
+        
+        if 'Estado' not in self.data.columns:
+            return
         
         print("\nState Distribution:")
-        state_counts = self.data['Estado'].value_counts()
+        state_counts = self.context.state_counts
         for state, count in state_counts.items():
             percentage = (count / len(self.data)) * 100
             print(f"  {state}: {count} records ({percentage:.1f}%)")
     
+    @traced(rows=self_rows)
     def analyze_distance_patterns(self):
         """Analyze distance measurement patterns"""
         print("\n" + "="*60)
         print("DISTANCE PATTERN ANALYSIS")
         print("="*60)
         
-        # Filter valid distances
-        valid_distances = self.data[self.data['Distancia(cm)'] < 999]
+        summary = self.get_summary()
+        valid_count = summary.valid_distances
         
-        if len(valid_distances) > 0:
-            print(f"\nValid distance measurements: {len(valid_distances)}")
+        if valid_count > 0:
+            print(f"\nValid distance measurements: {valid_count}")
             
             # Statistical analysis
-            stats_dict = {
-                'Mean': valid_distances['Distancia(cm)'].mean(),
-                'Median': valid_distances['Distancia(cm)'].median(),
-                'Std Dev': valid_distances['Distancia(cm)'].std(),
-                'Min': valid_distances['Distancia(cm)'].min(),
-                'Max': valid_distances['Distancia(cm)'].max(),
-                'Range': valid_distances['Distancia(cm)'].max() - valid_distances['Distancia(cm)'].min()
-            }
-            
-            for key, value in stats_dict.items():
+            for key, value in summary.distance_stats().items():
                 print(f"{key}: {value:.2f} cm")
             
-            # Distance categories
-            bins = [0, 10, 30, 100, 300]
-            labels = ['Very Close (<10cm)', 'Ideal (10-30cm)', 'Moderate (30-100cm)', 'Far (>100cm)']
-            
-            valid_distances['distance_category'] = pd.cut(
-                valid_distances['Distancia(cm)'],
-                bins=bins,
-                labels=labels,
-                include_lowest=True
-            )
-            
             print("\nDistance Category Distribution:")
-            category_counts = valid_distances['distance_category'].value_counts()
-            for category, count in category_counts.items():
-                percentage = (count / len(valid_distances)) * 100
+            for category, count in summary.distance_categories():
+                percentage = (count / valid_count) * 100
                 print(f"  {category}: {count} measurements ({percentage:.1f}%)")
             
+            if self.data is None:
+                return None
+            
+            valid_distances = self.context.valid_data.copy()
+            valid_distances['distance_category'] = self.context.distance_categories
             return valid_distances
         else:
             print("No valid distance measurements found.")
             return None
     
+    @traced(rows=self_rows)
     def analyze_reflectance_patterns(self):
         """Analyze IR reflectance patterns"""
         print("\n" + "="*60)
         print("REFLECTANCE PATTERN ANALYSIS")
         print("="*60)
         
-        if 'Luminosidade(IR)' in self.data.columns:
-            reflectance = self.data['Luminosidade(IR)']
-            
+        summary = self.get_summary()
+        
+        if summary.reflectance.total > 0:
             print(f"\nReflectance Statistics:")
-            print(f"Mean: {reflectance.mean():.2f}")
-            print(f"Median: {reflectance.median():.2f}")
-            print(f"Std Dev: {reflectance.std():.2f}")
-            print(f"Min: {reflectance.min():.2f}")
-            print(f"Max: {reflectance.max():.2f}")
+            for key, value in summary.reflectance_stats().items():
+                print(f"{key}: {value:.2f}")
             
             # Correlation with distance
-            valid_data = self.data[self.data['Distancia(cm)'] < 999]
-            if len(valid_data) > 1:
-                correlation = valid_data['Distancia(cm)'].corr(valid_data['Luminosidade(IR)'])
+            if summary.correlation.n > 1:
+                correlation = summary.correlation.correlation
                 print(f"\nCorrelation between distance and reflectance: {correlation:.3f}")
                 
                 if abs(correlation) > 0.3:
@@ -152,85 +342,166 @@ class EnvironmentalAnalyzer:
                 else:
                     print("  → Weak or no correlation")
             
-            # Reflectance categories
-            bins = [0, 300, 600, 900, 1023]
-            labels = ['Low (0-300)', 'Medium (300-600)', 'High (600-900)', 'Very High (900-1023)']
-            
-            self.data['reflectance_category'] = pd.cut(
-                self.data['Luminosidade(IR)'],
-                bins=bins,
-                labels=labels,
-                include_lowest=True
-            )
-            
             print("\nReflectance Category Distribution:")
-            category_counts = self.data['reflectance_category'].value_counts()
-            for category, count in category_counts.items():
-                percentage = (count / len(self.data)) * 100
+            for category, count in summary.reflectance_categories():
+                percentage = (count / summary.rows) * 100
                 print(f"  {category}: {count} measurements ({percentage:.1f}%)")
+            
+            if self.data is not None:
+                self.data['reflectance_category'] = pd.cut(
+                    self.data['Luminosidade(IR)'],
+                    bins=REFLECTANCE_BINS,
+                    labels=REFLECTANCE_LABELS,
+                    include_lowest=True
+                )
+    
+    @traced(rows=self_rows)
+    def analyze_correlation(self, window=ROLLING_WINDOW, max_lag=MAX_LAG):
+        """Rolling-window and lagged correlation between distance and reflectance"""
+        print("\n" + "="*60)
+        print("CORRELATION ANALYSIS")
+        print("="*60)
+        
+        rolling = pd.Series(self.context.rolling_correlation(window), index=self.context.time_seconds,
+                            name='correlation')
+        lags = self.context.lag_correlation(max_lag)
+        print(f"\nOverall correlation: {self.context.correlation:.3f}")
+        
+        defined = rolling.dropna()
+        if len(defined) > 0:
+            print(f"\nRolling correlation over {window} readings:")
+            print(f"  Median: {defined.median():.3f}, range {defined.min():.3f} to {defined.max():.3f}")
+            print(f"  Strong (|r| > 0.7): {(defined.abs() > 0.7).mean() * 100:.1f}% of windows")
+            print(f"  Weak (|r| < 0.3): {(defined.abs() < 0.3).mean() * 100:.1f}% of windows")
+        
+        lag, value = strongest_lag(lags)
+        if not np.isnan(value):
+            seconds = lag * SAMPLE_INTERVAL_MS / 1000
+            if lag > 0:
+                timing = f"reflectance trails distance by {lag} readings (~{seconds:.1f}s)"
+            elif lag < 0:
+                timing = f"reflectance leads distance by {-lag} readings (~{-seconds:.1f}s)"
+            else:
+                timing = "no lead or lag"
+            print(f"\nStrongest lagged correlation: {value:.3f} ({timing})")
+        return rolling, lags
     
-    def analyze_state_transitions(self):
+    def elapsed_ms(self):
+        """Milliseconds on the stitched time axis for every reading"""
+        return self.context.elapsed_ms
+    
+    def state_runs(self, min_duration=None):
+        """Run-length encoded states; runs shorter than min_duration seconds are merged"""
+        runs = self.context.runs
+        if min_duration:
+            runs = debounce_runs(runs, min_duration)
+        return runs
+    
+    @traced(rows=self_rows)
+    def analyze_state_transitions(self, min_duration=None):
         """Analyze state transitions and patterns"""
         print("\n" + "="*60)
         print("STATE TRANSITION ANALYSIS")
         print("="*60)
         
-        # State duration analysis
-        state_changes = self.data['Estado'] != self.data['Estado'].shift()
-        state_starts = self.data[state_changes]
-        
-        if len(state_starts) > 1:
-            print(f"\nNumber of state transitions: {len(state_starts)}")
+        runs = None
+        if self.data is None:
+            # Streaming mode: the summary carries mergeable run statistics
+            accumulator = self.get_summary().runs
+            run_count = accumulator.run_count
+            dwell = accumulator.dwell_statistics()
+            matrix = accumulator.transition_matrix()
+            if min_duration:
+                print("\nDebouncing needs the full dataset; showing raw runs.")
+        else:
+            runs = self.state_runs()
+            if min_duration:
+                debounced = debounce_runs(runs, min_duration)
+                print(f"\nDebounced runs (min {min_duration:.1f} s): {len(debounced)} of {len(runs)}")
+                runs = debounced
+            run_count = len(runs)
+            dwell = dwell_statistics(runs)
+            matrix = transition_matrix(runs)
+        
+        if run_count > 1:
+            print(f"\nNumber of state transitions: {run_count}")
             
-            # Calculate state durations
-            durations = []
-            for i in range(len(state_starts) - 1):
-                start_time = state_starts.iloc[i]['Tempo(ms)']
-                end_time = state_starts.iloc[i + 1]['Tempo(ms)']
-                duration = (end_time - start_time) / 1000  # Convert to seconds
-                state = state_starts.iloc[i]['Estado']
-                durations.append((state, duration))
+            print("\nAverage State Durations:")
+            for state, row in dwell.iterrows():
+                print(f"  {state}: {row['mean']:.2f} seconds")
             
-            # Group by state
-            state_durations = {}
-            for state, duration in durations:
-                if state not in state_durations:
-                    state_durations[state] = []
-                state_durations[state].append(duration)
+            print("\nDwell Time Distribution (seconds):")
+            columns = [c for c in ['count', 'mean', '50%', '90%', '95%', '99%', 'max'] if c in dwell.columns]
+            print(dwell[columns].round(2).to_string())
             
-            print("\nAverage State Durations:")
-            for state, dur_list in state_durations.items():
-                avg_duration = np.mean(dur_list)
-                print(f"  {state}: {avg_duration:.2f} seconds")
+            print("\nTransition Counts (from → to):")
+            print(matrix.to_string())
+        
+        return runs
     
-    def create_visualizations(self, output_dir="output"):
-        """Create comprehensive visualizations"""
-        import os
+    @traced(rows=self_rows)
+    def detect_anomalies(self):
+        """Flag sensor faults: echo dropouts, stuck IR, spikes, impossible jumps and dead periods"""
+        print("\n" + "="*60)
+        print("DATA QUALITY ANALYSIS")
+        print("="*60)
+        
+        events = self.context.anomalies
+        if len(events) == 0:
+            print("\nNo sensor faults or anomalies detected.")
+            return events
+        
+        print(f"\nAnomaly events: {len(events)}")
+        for kind, row in anomaly_summary(events).iterrows():
+            print(f"  {kind.replace('_', ' ')}: {row['events']:.0f} events, "
+                  f"{row['samples']:.0f} readings, {row['duration_s']:.1f} s")
+        
+        longest = events.nlargest(5, 'duration_s')
+        print("\nLongest events:")
+        for _, event in longest.iterrows():
+            print(f"  {event['kind'].replace('_', ' ')}: {event['start_ms'] / 1000:.1f}s "
+                  f"to {event['end_ms'] / 1000:.1f}s")
+        return events
+    
+    @traced(rows=self_rows)
+    def create_visualizations(self, output_dir="output", downsample_method='minmax',
+                              high_volume=False, sidecar=False, interactive=True, mask_anomalies=False):
+        """Create comprehensive visualizations (and the interactive plot unless interactive=False)
+
+        mask_anomalies leaves readings inside anomaly events out of the time series.
+        """
         os.makedirs(output_dir, exist_ok=True)
         
         print(f"\nCreating visualizations in '{output_dir}' directory...")
         
+        plt = pyplot()
         fig, axes = plt.subplots(3, 2, figsize=(15, 12))
         
         # 1. Distance over time
-        axes[0, 0].plot(self.data['Tempo(ms)']/1000, self.data['Distancia(cm)'], 'b-', alpha=0.7, linewidth=0.5)
+        time_seconds, distance = self.context.time_series('Distancia(cm)', axes_width_px(axes[0, 0]),
+                                                          downsample_method, DISTANCE_THRESHOLDS, mask_anomalies)
+        axes[0, 0].plot(time_seconds, distance, 'b-', alpha=0.7, linewidth=0.5)
         axes[0, 0].set_title('Distance Measurements Over Time')
         axes[0, 0].set_xlabel('Time (seconds)')
         axes[0, 0].set_ylabel('Distance (cm)')
         axes[0, 0].grid(True, alpha=0.3)
         axes[0, 0].axhline(y=10, color='r', linestyle='--', alpha=0.5, label='Alert Threshold (10cm)')
         axes[0, 0].axhline(y=30, color='g', linestyle='--', alpha=0.5, label='Ideal Range Boundary (30cm)')
+        shade_anomalies(axes[0, 0], self.context.anomalies, kinds=('dropout', 'jump', 'dead_period'))
         axes[0, 0].legend()
         
         # 2. Reflectance over time
-        axes[0, 1].plot(self.data['Tempo(ms)']/1000, self.data['Luminosidade(IR)'], 'g-', alpha=0.7, linewidth=0.5)
+        time_seconds, reflectance = self.context.time_series('Luminosidade(IR)', axes_width_px(axes[0, 1]),
+                                                             downsample_method, mask_anomalies=mask_anomalies)
+        axes[0, 1].plot(time_seconds, reflectance, 'g-', alpha=0.7, linewidth=0.5)
         axes[0, 1].set_title('IR Reflectance Over Time')
         axes[0, 1].set_xlabel('Time (seconds)')
         axes[0, 1].set_ylabel('Reflectance (0-1023)')
         axes[0, 1].grid(True, alpha=0.3)
+        shade_anomalies(axes[0, 1], self.context.anomalies, kinds=('flatline', 'dead_period'))
         
         # 3. State distribution
-        state_counts = self.data['Estado'].value_counts()
+        state_counts = self.context.state_counts
         colors = ['blue', 'green', 'red']
         axes[1, 0].bar(state_counts.index, state_counts.values, color=colors[:len(state_counts)])
         axes[1, 0].set_title('System State Distribution')
@@ -238,7 +509,7 @@ class EnvironmentalAnalyzer:
         axes[1, 0].tick_params(axis='x', rotation=45)
         
         # 4. Distance histogram
-        valid_distances = self.data[self.data['Distancia(cm)'] < 999]['Distancia(cm)']
+        valid_distances = self.context.valid_distances
         axes[1, 1].hist(valid_distances, bins=20, alpha=0.7, color='blue', edgecolor='black')
         axes[1, 1].set_title('Distance Measurement Distribution')
         axes[1, 1].set_xlabel('Distance (cm)')
@@ -248,7 +519,7 @@ class EnvironmentalAnalyzer:
         axes[1, 1].legend()
         
         # 5. Correlation scatter plot
-        valid_data = self.data[self.data['Distancia(cm)'] < 999]
+        valid_data = self.context.valid_data
         if len(valid_data) > 0:
             scatter = axes[2, 0].scatter(valid_data['Distancia(cm)'], 
                                         valid_data['Luminosidade(IR)'],
@@ -265,161 +536,184 @@ class EnvironmentalAnalyzer:
         axes[2, 1].axis('off')
         
         plt.tight_layout()
-        plt.savefig(f'{output_dir}/environmental_analysis.png', dpi=150, bbox_inches='tight')
+        with span('savefig'):
+            plt.savefig(f'{output_dir}/environmental_analysis.png', dpi=150, bbox_inches='tight')
         print(f"✓ Main visualization saved: {output_dir}/environmental_analysis.png")
         
         # Create interactive plot
-        self.create_interactive_plot(output_dir)
+        if interactive:
+            self.create_interactive_plot(output_dir, downsample_method, high_volume=high_volume,
+                                         sidecar=sidecar, mask_anomalies=mask_anomalies)
         
         return fig
     
-    def create_interactive_plot(self, output_dir):
-        """Create interactive Plotly visualization"""
-        fig = go.Figure()
-        
-        # Add distance trace
-        fig.add_trace(go.Scatter(
-            x=self.data['Tempo(ms)']/1000,
-            y=self.data['Distancia(cm)'],
-            mode='lines',
-            name='Distance (cm)',
-            line=dict(color='blue', width=1),
-            hovertemplate='Time: %{x:.1f}s<br>Distance: %{y:.1f}cm'
-        ))
-        
-        # Add reflectance trace
-        fig.add_trace(go.Scatter(
-            x=self.data['Tempo(ms)']/1000,
-            y=self.data['Luminosidade(IR)'],
-            mode='lines',
-            name='Reflectance',
-            line=dict(color='green', width=1),
-            yaxis='y2',
-            hovertemplate='Time: %{x:.1f}s<br>Reflectance: %{y:.0f}'
-        ))
-        
-        # Update layout
-        fig.update_layout(
-            title='Environmental Monitoring Station - Live Data',
-            xaxis=dict(title='Time (seconds)'),
-            yaxis=dict(title='Distance (cm)', side='left'),
-            yaxis2=dict(title='Reflectance', side='right', overlaying='y'),
-            hovermode='x unified',
-            template='plotly_white'
-        )
-        
-        # Add threshold lines
-        fig.add_hline(y=10, line_dash="dash", line_color="red", annotation_text="Alert Threshold")
-        fig.add_hline(y=30, line_dash="dash", line_color="green", annotation_text="Ideal Boundary")
-        
-        fig.write_html(f'{output_dir}/interactive_plot.html')
+    @traced(rows=self_rows)
+    def create_interactive_plot(self, output_dir, downsample_method='minmax', width_px=DEFAULT_WIDTH_PX,
+                                high_volume=False, sidecar=False, mask_anomalies=False):
+        """Create interactive Plotly visualization (WebGL and binary arrays when high_volume)"""
+        os.makedirs(output_dir, exist_ok=True)
+        distance_x, distance_y = self.context.time_series('Distancia(cm)', width_px,
+                                                          downsample_method, DISTANCE_THRESHOLDS, mask_anomalies)
+        reflectance_x, reflectance_y = self.context.time_series('Luminosidade(IR)', width_px,
+                                                                downsample_method, mask_anomalies=mask_anomalies)
+        fig = time_series_figure(distance_x, distance_y, reflectance_x, reflectance_y, high_volume=high_volume)
+        
+        written = write_figure(fig, f'{output_dir}/interactive_plot.html',
+                               high_volume=high_volume, sidecar=sidecar)
         print(f"✓ Interactive plot saved: {output_dir}/interactive_plot.html")
+        if written != f'{output_dir}/interactive_plot.html':
+            print(f"  Data sidecar: {written} (serve the directory over HTTP to view)")
     
-    def generate_report(self, output_file="environmental_report.md"):
-        """Generate comprehensive analysis report"""
+    @traced(rows=self_rows)
+    def generate_report(self, output_file="environmental_report.md", json_file=None, cache_file=None):
+        """Generate comprehensive analysis report, optionally also as JSON
+
+        With a cache file the statistics are kept per day, and only the days
+        since the last report are recomputed (in streaming mode, only those
+        readings are read).
+        """
         print(f"\nGenerating analysis report: {output_file}")
         
-        report = f"""# Environmental Monitoring Station - Analysis Report
-
-## Report Summary
-- **Analysis Date**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-- **Data Source**: Arduino Environmental Station
-- **Total Records**: {len(self.data)}
-- **Analysis Duration**: {(self.data['Tempo(ms)'].max() - self.data['Tempo(ms)'].min())/1000:.1f} seconds
-
-## System Performance
-
-### Data Collection:
-- **Sampling Rate**: {len(self.data)/(self.data['Tempo(ms)'].max()/1000):.2f} Hz
-- **Data Completeness**: {100 - (self.data.isnull().sum().sum()/len(self.data)*100):.1f}%
-- **Measurement Range**: Distance: 0-{self.data['Distancia(cm)'].max():.0f}cm, Reflectance: 0-1023
-
-### State Analysis:
-"""
+        periods = None
+        if cache_file:
+            summary, periods = self.cached_summary(cache_file)
+        else:
+            summary = self.get_summary()
+        # Anomalies need the readings themselves, so streamed reports go without them
+        events = self.context.anomalies if self.context is not None else None
+        quality = render_data_quality(events, summary.rows) if events is not None else ''
+        report = render_report(summary, extra_sections=quality)
         
-        # Add state statistics
-        state_counts = self.data['Estado'].value_counts()
-        for state, count in state_counts.items():
-            percentage = (count / len(self.data)) * 100
-            report += f"- **{state}**: {count} records ({percentage:.1f}%)\n"
+        # Save report
+        with open(output_file, 'w') as f:
+            f.write(report)
+        print(f"✓ Report saved: {output_file}")
         
-        # Add distance analysis
-        valid_distances = self.data[self.data['Distancia(cm)'] < 999]
-        if len(valid_distances) > 0:
-            report += f"""
-## Distance Analysis
-
-### Statistical Summary:
-- **Mean Distance**: {valid_distances['Distancia(cm)'].mean():.1f} cm
-- **Median Distance**: {valid_distances['Distancia(cm)'].median():.1f} cm
-- **Standard Deviation**: {valid_distances['Distancia(cm)'].std():.1f} cm
-- **Measurement Range**: {valid_distances['Distancia(cm)'].min():.1f} to {valid_distances['Distancia(cm)'].max():.1f} cm
-
-### Distance Categories:
-"""
-            bins = [0, 10, 30, 100, 300]
-            labels = ['Very Close (<10cm)', 'Ideal (10-30cm)', 'Moderate (30-100cm)', 'Far (>100cm)']
-            
-            valid_distances['distance_category'] = pd.cut(
-                valid_distances['Distancia(cm)'],
-                bins=bins,
-                labels=labels,
-                include_lowest=True
-            )
-            
-            category_counts = valid_distances['distance_category'].value_counts()
-            for category, count in category_counts.items():
-                percentage = (count / len(valid_distances)) * 100
-                report += f"- **{category}**: {count} measurements ({percentage:.1f}%)\n"
-        
-        # Add reflectance analysis
-        report += f"""
-## Reflectance Analysis
-
-### Statistical Summary:
-- **Mean Reflectance**: {self.data['Luminosidade(IR)'].mean():.0f}
-- **Median Reflectance**: {self.data['Luminosidade(IR)'].median():.0f}
-- **Standard Deviation**: {self.data['Luminosidade(IR)'].std():.0f}
-- **Dynamic Range**: {self.data['Luminosidade(IR)'].min():.0f} to {self.data['Luminosidade(IR)'].max():.0f}
+        if json_file:
+            write_report_json(report_document(summary, periods, self.station, events), json_file)
+            print(f"✓ JSON report saved: {json_file}")
+        return report
+    
+    def cached_summary(self, cache_file):
+        """(summary, per-period summaries) with only the new periods recomputed"""
+        # CSV logs are cut on the stitched axis unless their capture start is known
+        clock = os.path.isdir(self.filename) or self.start_time is not None
+        cache = ReportCache.open(cache_file, 'clock' if clock else 'elapsed')
+        if self.context is None:
+            rebuilt = cache.update_from(self.filename, station=self.station, start_time=self.start_time)
+        else:
+            times = epoch_ms(self.data['datetime']) if clock else self.context.elapsed_ms
+            rebuilt = cache.update(self.data, times)
+        cache.save(cache_file)
+        print(f"Recomputed {len(rebuilt)} of {len(cache.periods)} daily report periods")
+        return cache.summary(), cache.period_summaries()
 
-## Environmental Insights
+# Stages in the order a full run executes them
+STAGES = ('stats', 'transitions', 'anomalies', 'dashboard', 'interactive', 'report')
 
-### Observations:
-1. **System Responsiveness**: The station successfully detects changes in the environment
-2. **Alert System**: Proper triggering of alerts when objects are too close
-3. **Data Consistency**: Measurements show expected patterns and ranges
-4. **Environmental Conditions**: Reflectance values indicate surface properties
 
-### Recommendations:
-1. **Deployment Optimization**: Consider sensor placement for specific applications
-2. **Data Collection**: Extend monitoring periods for trend analysis
-3. **Alert Thresholds**: Adjust based on specific environmental requirements
-4. **Maintenance**: Regular sensor calibration for accuracy
+def build_parser():
+    """Command line with one subcommand per stage; 'all' runs every stage"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('filename', nargs='?', default="sample_readings.csv",
+                        help="CSV log, columnar store directory or reading archive")
+    common.add_argument('--station', help="station to read from a store (required if it holds several)")
+    common.add_argument('--start', help="first time to include, for the selected station (store only)")
+    common.add_argument('--end', help="time to stop before, for the selected station (store only)")
+    common.add_argument('--streaming', action='store_true',
+                        help="summarize in chunks instead of loading everything (no plots)")
+    common.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    common.add_argument('--raw', action='store_true',
+                        help="the file is a raw serial capture (repeated headers, ERR_ lines, noise)")
+    
+    transition_options = argparse.ArgumentParser(add_help=False)
+    transition_options.add_argument('--min-duration', type=float,
+                                    help="merge state runs shorter than this many seconds")
+    
+    plot_options = argparse.ArgumentParser(add_help=False)
+    plot_options.add_argument('--output-dir', default="output")
+    plot_options.add_argument('--downsample', choices=['minmax', 'lttb', 'none'], default='minmax')
+    plot_options.add_argument('--high-volume', action='store_true',
+                              help="WebGL traces and binary arrays for long deployments")
+    plot_options.add_argument('--sidecar', action='store_true',
+                              help="keep interactive plot data in a separate gzip file")
+    plot_options.add_argument('--mask-anomalies', action='store_true',
+                              help="leave readings inside detected anomalies out of the time series")
+    
+    report_options = argparse.ArgumentParser(add_help=False)
+    report_options.add_argument('--output', default="environmental_report.md", help="report file")
+    report_options.add_argument('--json', help="also write the report as JSON for dashboards")
+    report_options.add_argument('--cache', help="per-day statistics kept between runs; only new days are recomputed")
+    
+    parser = argparse.ArgumentParser(description="Analyze environmental data from the Arduino station")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+    commands.add_parser('stats', parents=[common], help="distance and reflectance statistics")
+    commands.add_parser('transitions', parents=[common, transition_options],
+                        help="state runs, dwell times and transitions")
+    commands.add_parser('report', parents=[common, report_options], help="markdown analysis report")
+    commands.add_parser('anomalies', parents=[common], help="sensor faults and data quality")
+    commands.add_parser('dashboard', parents=[common, plot_options], help="static PNG visualizations")
+    commands.add_parser('interactive', parents=[common, plot_options], help="interactive Plotly HTML plot")
+    commands.add_parser('all', parents=[common, transition_options, plot_options, report_options],
+                        help="every stage (the default)")
+    return parser
 
-## Technical Specifications
-- **Microcontroller**: Arduino Uno
-- **Primary Sensor**: HC-SR04 Ultrasonic (2-400cm range)
-- **Secondary Sensor**: IR Reflectance (0-1023 analog)
-- **Alert System**: RGB LED + Buzzer
-- **Data Output**: CSV format via Serial
 
----
-*Report generated automatically by Environmental Monitoring Analysis Tool*
+def run_stages(analyzer, stages, args):
+    """Run the selected stages; returns the files written"""
+    written = []
+    if 'stats' in stages:
+        analyzer.analyze_distance_patterns()
+        analyzer.analyze_reflectance_patterns()
+        if analyzer.data is not None:
+            analyzer.analyze_correlation()
+    
+    if 'transitions' in stages:
+        analyzer.analyze_state_transitions(args.min_duration)
+    
+    if 'anomalies' in stages and analyzer.data is not None:
+        analyzer.detect_anomalies()
+    
+    if 'dashboard' in stages or 'interactive' in stages:
+        method = None if args.downsample == 'none' else args.downsample
+        if 'dashboard' in stages:
+            analyzer.create_visualizations(args.output_dir, method, high_volume=args.high_volume,
+                                           sidecar=args.sidecar, interactive='interactive' in stages,
+                                           mask_anomalies=args.mask_anomalies)
+            written.append(f"{args.output_dir}/environmental_analysis.png - Comprehensive visualizations")
+        else:
+            analyzer.create_interactive_plot(args.output_dir, method, high_volume=args.high_volume,
+                                             sidecar=args.sidecar, mask_anomalies=args.mask_anomalies)
+        if 'interactive' in stages:
+            written.append(f"{args.output_dir}/interactive_plot.html - Interactive data exploration")
+    
+    if 'report' in stages:
+        analyzer.generate_report(args.output, args.json, args.cache)
+        written.append(f"{args.output} - Detailed analysis report")
+    return written
 
-**Location**: Mozambique  
-**Project**: Environmental Monitoring Station  
-**Version**: 1.0  
-"""
-        
-        # Save report
-        with open(output_file, 'w') as f:
-            f.write(report)
-        
-        print(f"✓ Report saved: {output_file}")
-        return report
 
-def main():
+def main(argv=None):
     """Main function to run analysis"""
+    parser = build_parser()
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Without a subcommand every stage runs, as before subcommands existed
+    if not argv or argv[0] not in STAGES + ('all', '-h', '--help'):
+        argv = ['all'] + argv
+    args = parser.parse_args(argv)
+    stages = STAGES if args.command == 'all' else (args.command,)
+    if args.streaming and ('dashboard' in stages or 'interactive' in stages):
+        parser.error("plots need the full dataset; drop --streaming")
+    if args.streaming and args.command == 'anomalies':
+        parser.error("anomaly detection needs the full dataset; drop --streaming")
+    if args.streaming and args.raw:
+        parser.error("raw captures are parsed whole; drop --streaming")
+    if args.station is None and os.path.isdir(args.filename):
+        try:
+            ReadingStore(args.filename).only_station()
+        except ValueError as e:
+            parser.error(str(e))
+    
     print("="*70)
     print("ENVIRONMENTAL MONITORING STATION - DATA ANALYSIS")
     print("="*70)
@@ -428,32 +722,25 @@ def main():
     print("="*70)
     
     # Initialize analyzer
-    analyzer = EnvironmentalAnalyzer("sample_readings.csv")
+    analyzer = EnvironmentalAnalyzer(args.filename, station=args.station, start=args.start, end=args.end,
+                                     streaming=args.streaming, chunksize=args.chunksize, raw=args.raw)
     
-    if analyzer.data is not None:
-        # Run analyses
-        analyzer.analyze_distance_patterns()
-        analyzer.analyze_reflectance_patterns()
-        analyzer.analyze_state_transitions()
-        
-        # Create visualizations
-        analyzer.create_visualizations()
-        
-        # Generate report
-        analyzer.generate_report()
+    if analyzer.data is not None or analyzer.summary is not None:
+        written = run_stages(analyzer, stages, args)
         
         print("\n" + "="*70)
         print("ANALYSIS COMPLETE")
         print("="*70)
-        print("\nOutput Files Created:")
-        print("✓ environmental_analysis.png - Comprehensive visualizations")
-        print("✓ interactive_plot.html - Interactive data exploration")
-        print("✓ environmental_report.md - Detailed analysis report")
-        print("\nNext Steps:")
-        print("1. Review the generated reports")
-        print("2. Adjust sensor placement based on findings")
-        print("3. Consider longer-term data collection")
-        print("4. Share findings with environmental researchers")
+        if written:
+            print("\nOutput Files Created:")
+            for line in written:
+                print(f"✓ {line}")
+        if args.command == 'all':
+            print("\nNext Steps:")
+            print("1. Review the generated reports")
+            print("2. Adjust sensor placement based on findings")
+            print("3. Consider longer-term data collection")
+            print("4. Share findings with environmental researchers")
     
     else:
         print("Analysis could not be completed. Please check your data file.")
@@ -0,0 +1,149 @@
+"""
+Downsampling for Environmental Time Series
+Author: [Your Name]
+Purpose: Reduce long series to what a plot can show while keeping their shape
+"""
+
+import numpy as np
+
+from instrumentation import traced
+
+# Plotly figures are about this wide by default; used when no axes is available
+DEFAULT_WIDTH_PX = 1200
+
+# Alert threshold and ideal range boundary drawn on the distance plots (cm)
+DISTANCE_THRESHOLDS = (10, 30)
+
+
+def axes_width_px(ax):
+    """Width of a matplotlib axes in screen pixels"""
+    return max(int(ax.get_window_extent().width), 1)
+
+
+def _bucket_edges(x, n_buckets):
+    """Row offsets splitting x into n_buckets equal-width spans (equal counts if x is unsorted)"""
+    if np.all(x[1:] >= x[:-1]):
+        edges = np.searchsorted(x, np.linspace(x[0], x[-1], n_buckets + 1), side='left')
+    else:
+        edges = np.linspace(0, len(x), n_buckets + 1).astype(np.int64)
+    edges[0], edges[-1] = 0, len(x)
+    return np.unique(edges)
+
+
+def _segment_first(bucket_of_row, hits):
+    """First row index per bucket among rows where hits is True"""
+    rows = np.flatnonzero(hits)
+    _, first = np.unique(bucket_of_row[rows], return_index=True)
+    return rows[first]
+
+
+def minmax_indices(x, y, n_buckets):
+    """Indices of the first, last, min and max sample of every x bucket"""
+    n = len(y)
+    if n <= 4 * n_buckets:
+        return np.arange(n)
+
+    edges = _bucket_edges(x, n_buckets)
+    starts = edges[:-1]
+    counts = np.diff(edges)
+    starts, counts = starts[counts > 0], counts[counts > 0]
+    bucket_of_row = np.repeat(np.arange(len(starts)), counts)
+
+    # NaN-aware reductions so sensor gaps don't swallow a whole bucket
+    lows = np.fmin.reduceat(y, starts)
+    highs = np.fmax.reduceat(y, starts)
+    mins = _segment_first(bucket_of_row, y == lows[bucket_of_row])
+    maxs = _segment_first(bucket_of_row, y == highs[bucket_of_row])
+
+    return np.unique(np.concatenate([starts, starts + counts - 1, mins, maxs]))
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets selection of n_out samples"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    y_filled = np.where(np.isnan(y), np.nanmean(y), y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        if next_hi <= next_lo:
+            next_hi = next_lo + 1
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y_filled[next_lo:next_hi].mean()
+
+        # Pick the point forming the largest triangle with the last pick and the next bucket's mean
+        px, py = x[previous], y_filled[previous]
+        area = np.abs((px - avg_x) * (y_filled[lo:hi] - py) - (px - x[lo:hi]) * (avg_y - py))
+        previous = lo + int(np.argmax(area))
+        selected[i + 1] = previous
+
+    return np.unique(selected)
+
+
+def threshold_crossing_indices(x, y, thresholds, n_buckets):
+    """Min and max of every bucket in which y crosses one of the thresholds"""
+    if not thresholds or len(y) < 2:
+        return np.zeros(0, dtype=np.int64)
+
+    crossing = np.zeros(len(y), dtype=bool)
+    for threshold in thresholds:
+        above = y > threshold
+        crossing[1:] |= above[1:] != above[:-1]
+    if not crossing.any():
+        return np.zeros(0, dtype=np.int64)
+
+    edges = _bucket_edges(x, n_buckets)
+    starts = edges[:-1]
+    counts = np.diff(edges)
+    starts, counts = starts[counts > 0], counts[counts > 0]
+    bucket_of_row = np.repeat(np.arange(len(starts)), counts)
+
+    flagged = np.zeros(len(starts), dtype=bool)
+    flagged[bucket_of_row[crossing]] = True
+    in_flagged = flagged[bucket_of_row]
+
+    lows = np.fmin.reduceat(y, starts)
+    highs = np.fmax.reduceat(y, starts)
+    mins = _segment_first(bucket_of_row, in_flagged & (y == lows[bucket_of_row]))
+    maxs = _segment_first(bucket_of_row, in_flagged & (y == highs[bucket_of_row]))
+    return np.concatenate([mins, maxs])
+
+
+@traced('downsample')
+def downsample_indices(x, y, width_px=DEFAULT_WIDTH_PX, method='minmax', thresholds=()):
+    """Indices of the samples worth drawing at the given pixel width
+
+    'minmax' keeps the extremes of each pixel column, so every spike stays
+    visible. 'lttb' keeps the visual shape with fewer points; buckets where
+    the series crosses one of the thresholds also keep their extremes.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) == 0:
+        return np.arange(0)
+
+    n_buckets = max(int(width_px), 1)
+    if method == 'minmax':
+        return minmax_indices(x, y, n_buckets)
+    if method == 'lttb':
+        selected = lttb_indices(x, y, 2 * n_buckets)
+        crossings = threshold_crossing_indices(x, y, thresholds, n_buckets)
+        return np.unique(np.concatenate([selected, crossings]))
+    raise ValueError(f"Unknown downsampling method: {method}")
+
+
+def downsample(x, y, width_px=DEFAULT_WIDTH_PX, method='minmax', thresholds=()):
+    """Downsampled (x, y) arrays; method None returns the input unchanged"""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if method is None:
+        return x, y
+    idx = downsample_indices(x, y, width_px, method, thresholds)
+    return x[idx], y[idx]
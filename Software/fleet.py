@@ -0,0 +1,120 @@
+"""
+Fleet Analysis for Environmental Monitoring Stations
+Author: [Your Name]
+Purpose: Analyze many station logs in parallel and merge their statistics
+"""
+
+import os
+import re
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from storage import ReadingStore
+from streaming import ReadingSummary, stream_summary, DEFAULT_CHUNKSIZE
+from report import render_report, render_fleet_report
+
+# Daily logs named as in the deployment guide: YYYY-MM-DD_station_parameter.csv
+DAILY_LOG_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}_(?P<station>.+)_[^_]+$')
+
+
+def station_of(filename):
+    """Station name from a log file name (the file stem if it doesn't follow the convention)"""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    match = DAILY_LOG_PATTERN.match(stem)
+    return match.group('station') if match else stem
+
+
+def discover_tasks(source):
+    """Independent units of work: one per CSV log, or one per station-day of a store
+
+    Returns (station, kwargs for stream_summary) pairs in chronological order
+    per station.
+    """
+    if glob.glob(os.path.join(source, 'station=*')):
+        store = ReadingStore(source)
+        tasks = []
+        for station in store.stations():
+            for date in store.dates(station):
+                day = pd.Timestamp(date)
+                tasks.append((station, dict(source=source, station=station,
+                                            start=day, end=day + pd.Timedelta(days=1))))
+        return tasks
+
+    files = sorted(glob.glob(os.path.join(source, '*.csv')))
+    return [(station_of(filename), dict(source=filename)) for filename in files]
+
+
+def summarize_task(task, chunksize=DEFAULT_CHUNKSIZE):
+    """Worker: one-pass summary of one log or station-day"""
+    station, kwargs = task
+    return station, stream_summary(chunksize=chunksize, **kwargs)
+
+
+def analyze_fleet(source, workers=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Summarize every station in parallel and merge the partial results
+
+    Workers return mergeable summaries (histograms, moments, run
+    statistics), never raw readings, so the parent does O(stations) work.
+    """
+    tasks = discover_tasks(source)
+    if not tasks:
+        raise ValueError(f"No station logs found in {source}")
+
+    partials = [None] * len(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(summarize_task, task, chunksize): i for i, task in enumerate(tasks)}
+        for done, future in enumerate(as_completed(futures), 1):
+            station, summary = future.result()
+            partials[futures[future]] = (station, summary)
+            print(f"  [{done}/{len(tasks)}] {station}: {summary.rows} records")
+
+    # Merge in task order so each station's logs combine chronologically
+    stations = {}
+    for station, summary in partials:
+        if station in stations:
+            stations[station].merge(summary)
+        else:
+            stations[station] = summary
+
+    fleet = ReadingSummary()
+    for summary in stations.values():
+        fleet.merge(summary)
+    return stations, fleet
+
+
+def write_reports(stations, fleet, output_dir):
+    """Write one report per station plus the fleet report"""
+    os.makedirs(output_dir, exist_ok=True)
+    for station, summary in stations.items():
+        with open(os.path.join(output_dir, f'{station}_report.md'), 'w') as f:
+            f.write(render_report(summary, station=station))
+
+    fleet_file = os.path.join(output_dir, 'fleet_report.md')
+    with open(fleet_file, 'w') as f:
+        f.write(render_fleet_report(stations, fleet))
+    return fleet_file
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Analyze a directory of station logs in parallel")
+    parser.add_argument('source', help="directory of CSV logs, or a partitioned columnar store")
+    parser.add_argument('--output', default='fleet_reports', help="directory for the reports")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args()
+
+    print(f"Analyzing station logs in {args.source}")
+    start = time.perf_counter()
+    stations, fleet = analyze_fleet(args.source, args.workers, args.chunksize)
+    fleet_file = write_reports(stations, fleet, args.output)
+    print(f"✓ {len(stations)} station reports and fleet report saved: {fleet_file} "
+          f"({fleet.rows} records in {time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
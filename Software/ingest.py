@@ -0,0 +1,462 @@
+"""
+Serial Ingestion Daemon for Environmental Data
+Author: [Your Name]
+Purpose: Log the Arduino CSV stream of one or more stations without losing lines
+"""
+
+import os
+import stat
+import time
+import signal
+import asyncio
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from storage import ReadingStore
+from archive import ReadingArchive, ARCHIVE_SUFFIX
+from schema import CSV_COLUMNS, DISTANCE_SENTINEL, validate
+from timeaxis import SAMPLE_INTERVAL_MS, local_times
+
+# Serial.begin(9600) in the sketch
+BAUD_RATE = 9600
+
+READ_SIZE = 64 * 1024
+
+# Lines held between the reader and the flusher (about 14 hours of one station)
+RING_CAPACITY = 100_000
+
+# A batch is flushed when it reaches BATCH_LINES or has waited FLUSH_INTERVAL_S
+BATCH_LINES = 1_000
+FLUSH_INTERVAL_S = 5.0
+
+# Flushed data reaches the OS every batch; fsync only this often
+FSYNC_INTERVAL_S = 60.0
+
+STATS_INTERVAL_S = 30.0
+
+# Batches queued per subscriber before the oldest is dropped
+SUBSCRIBER_QUEUE = 64
+
+HEADER = ','.join(CSV_COLUMNS).encode()
+
+
+def parse_lines(lines, received):
+    """Parse a batch of raw lines into readings
+
+    Returns (frame, rejected, headers). Repeated headers mark a board reset
+    and are counted separately; anything else that is not a full reading
+    (partial first line, line noise) is rejected.
+    """
+    received = np.asarray(received, dtype=np.float64)
+    lines = [line.strip() for line in lines]
+    is_header = np.array([line == HEADER for line in lines], dtype=bool)
+    fields = [line.split(b',') for line in lines]
+    shaped = np.array([len(f) == 4 for f in fields], dtype=bool) & ~is_header
+
+    rows = [f for f, ok in zip(fields, shaped) if ok]
+    columns = list(zip(*rows)) if rows else [(), (), (), ()]
+    tempo = pd.to_numeric(pd.Series(columns[0], dtype=object).str.decode('ascii', 'replace'), errors='coerce')
+    distance = pd.to_numeric(pd.Series(columns[1], dtype=object).str.decode('ascii', 'replace'), errors='coerce')
+    reflectance = pd.to_numeric(pd.Series(columns[2], dtype=object).str.decode('ascii', 'replace'), errors='coerce')
+    state = pd.Series(columns[3], dtype=object).str.decode('ascii', 'replace')
+
+    frame, _ = validate(pd.DataFrame({
+        'Tempo(ms)': tempo,
+        'Distancia(cm)': distance,
+        'Luminosidade(IR)': reflectance,
+        'Estado': state,
+        # Local time, like the logs' modification times the analyzer anchors on
+        'datetime': local_times(received[shaped])
+    }))
+    headers = int(is_header.sum())
+    rejected = len(lines) - headers - len(frame)
+    return frame, rejected, headers
+
+
+class RingBuffer:
+    """Bounded FIFO of received lines; producers wait instead of dropping when full"""
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self._received = np.zeros(capacity)
+        self._lines = [None] * capacity
+        self._head = 0
+        self._size = 0
+        self.closed = False
+        self.high_water = 0
+        self.producer_waits = 0
+        self._not_full = asyncio.Event()
+        self._not_empty = asyncio.Event()
+        self._not_full.set()
+
+    def __len__(self):
+        return self._size
+
+    async def put_many(self, received, lines):
+        """Append lines received at one time, waiting for room as needed"""
+        i = 0
+        while i < len(lines):
+            if self._size == self.capacity:
+                self.producer_waits += 1
+                self._not_full.clear()
+                await self._not_full.wait()
+                continue
+            n = min(len(lines) - i, self.capacity - self._size)
+            for line in lines[i:i + n]:
+                tail = (self._head + self._size) % self.capacity
+                self._lines[tail] = line
+                self._received[tail] = received
+                self._size += 1
+            i += n
+            self.high_water = max(self.high_water, self._size)
+            self._not_empty.set()
+
+    async def get_batch(self, max_lines, timeout):
+        """Up to max_lines lines, once that many are buffered or timeout seconds have passed"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._size < max_lines and not self.closed:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            self._not_empty.clear()
+            try:
+                await asyncio.wait_for(self._not_empty.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+
+        n = min(self._size, max_lines)
+        index = (self._head + np.arange(n)) % self.capacity
+        received = self._received[index]
+        lines = [self._lines[i] for i in index]
+        for i in index:
+            self._lines[i] = None
+        self._head = (self._head + n) % self.capacity
+        self._size -= n
+        self._not_full.set()
+        return received, lines
+
+    def close(self):
+        self.closed = True
+        self._not_empty.set()
+
+
+class SerialSource:
+    """Byte chunks from a serial device, a pty or a FIFO, read without blocking the loop"""
+
+    def __init__(self, path, baudrate=BAUD_RATE):
+        self.path = path
+        self.baudrate = baudrate
+
+    def _configure(self, fd):
+        import termios
+        import tty
+        tty.setraw(fd)
+        attrs = termios.tcgetattr(fd)
+        speed = getattr(termios, f'B{self.baudrate}')
+        attrs[4] = attrs[5] = speed
+        termios.tcsetattr(fd, termios.TCSANOW, attrs)
+
+    async def chunks(self):
+        fd = os.open(self.path, os.O_RDONLY | os.O_NOCTTY | os.O_NONBLOCK)
+        if os.isatty(fd):
+            self._configure(fd)
+
+        # The stream reader pauses the device when its buffer is full (backpressure)
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=4 * READ_SIZE)
+        transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader),
+                                                    os.fdopen(fd, 'rb', buffering=0))
+        try:
+            while True:
+                chunk = await reader.read(READ_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            transport.close()
+
+
+class ReplaySource:
+    """Byte chunks from a captured log, as a stand-in for a board
+
+    speed=None replays as fast as the file can be read (a burst); otherwise
+    lines are released at speed times the sketch's 500 ms sampling rate.
+    """
+
+    def __init__(self, path, speed=None, tick_s=0.05):
+        self.path = path
+        self.speed = speed
+        self.tick_s = tick_s
+
+    async def chunks(self):
+        with open(self.path, 'rb') as f:
+            if self.speed is None:
+                while True:
+                    chunk = await asyncio.to_thread(f.read, READ_SIZE)
+                    if not chunk:
+                        return
+                    yield chunk
+
+            lines_per_tick = self.speed * self.tick_s * 1000 / SAMPLE_INTERVAL_MS
+            owed = 0.0
+            while True:
+                owed += lines_per_tick
+                n = int(owed)
+                owed -= n
+                lines = [f.readline() for _ in range(n)]
+                chunk = b''.join(lines)
+                if chunk:
+                    yield chunk
+                if n and not lines[-1]:
+                    return
+                await asyncio.sleep(self.tick_s)
+
+
+def open_source(path, speed=None):
+    """Regular files are replayed; devices, ptys and FIFOs are read live"""
+    if stat.S_ISREG(os.stat(path).st_mode):
+        return ReplaySource(path, speed=speed)
+    return SerialSource(path)
+
+
+class CsvSink:
+    """Appends readings to daily logs named like the deployment guide (YYYY-MM-DD_station_readings.csv)
+
+    The files keep the sketch's four columns, so they read like a manual
+    serial capture. Each batch is written with one call; fsync runs at most
+    every fsync_interval seconds.
+    """
+
+    def __init__(self, directory, station, parameter='readings', fsync_interval=FSYNC_INTERVAL_S):
+        self.directory = directory
+        self.station = station
+        self.parameter = parameter
+        self.fsync_interval = fsync_interval
+        self._date = None
+        self._file = None
+        self._last_sync = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+
+    def _open(self, date):
+        if date == self._date:
+            return self._file
+        self.close()
+        path = os.path.join(self.directory, f'{date}_{self.station}_{self.parameter}.csv')
+        self._file = open(path, 'a', newline='')
+        if self._file.tell() == 0:
+            self._file.write(','.join(CSV_COLUMNS) + '\n')
+        self._date = date
+        return self._file
+
+    def write(self, frame):
+        days = frame['datetime'].dt.strftime('%Y-%m-%d')
+        for date, rows in frame.groupby(days.values, sort=True):
+            f = self._open(date)
+            f.write(rows[CSV_COLUMNS].to_csv(header=False, index=False, na_rep=str(DISTANCE_SENTINEL)))
+            f.flush()
+        if time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+        self._file = None
+        self._date = None
+
+
+class StoreSink:
+    """Writes each batch into the partitioned columnar store (use a long flush interval)"""
+
+    def __init__(self, root, station):
+        self.store = ReadingStore(root)
+        self.station = station
+
+    def write(self, frame):
+        self.store.write(frame, self.station)
+
+    def close(self):
+        pass
+
+
+class ArchiveSink:
+    """Appends each batch to the station's binary archive; every batch is committed on its own"""
+
+    def __init__(self, directory, station):
+        self.path = os.path.join(directory, f'{station}{ARCHIVE_SUFFIX}')
+        self.station = station
+        self.archive = None
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, frame):
+        if self.archive is None:
+            # A new archive starts at the first boot: the first reading's arrival minus its millis()
+            start_time = frame['datetime'].iloc[0] - pd.Timedelta(int(frame['Tempo(ms)'].iloc[0]), unit='ms')
+            self.archive = ReadingArchive.open(self.path, self.station, start_time)
+        self.archive.append(frame)
+
+    def close(self):
+        pass
+
+
+class StationIngestor:
+    """Reads one station's line stream and flushes parsed batches to sinks and subscribers
+
+    The reader and the flusher only share the ring buffer: bursts fill the
+    ring while a batch is being written, and the reader waits (leaving data
+    in the OS buffers) rather than dropping lines when the ring is full.
+    """
+
+    def __init__(self, station, source, sinks=(), capacity=RING_CAPACITY,
+                 batch_lines=BATCH_LINES, flush_interval=FLUSH_INTERVAL_S):
+        self.station = station
+        self.source = source
+        self.sinks = list(sinks)
+        self.batch_lines = batch_lines
+        self.flush_interval = flush_interval
+        self.ring = RingBuffer(capacity)
+        self._subscribers = []
+        self.stats = {
+            'lines': 0, 'rows': 0, 'rejected': 0, 'boots': 0, 'batches': 0,
+            'lag_ms': 0.0, 'max_lag_ms': 0.0, 'dropped_batches': 0
+        }
+
+    def subscribe(self, maxsize=SUBSCRIBER_QUEUE):
+        """Queue receiving every flushed batch; a slow subscriber loses its oldest batches"""
+        queue = asyncio.Queue(maxsize)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.remove(queue)
+
+    async def run(self):
+        flusher = asyncio.create_task(self._flush_loop())
+        try:
+            await self._read_loop()
+        finally:
+            self.ring.close()
+            await flusher
+            for sink in self.sinks:
+                await asyncio.to_thread(sink.close)
+
+    async def _read_loop(self):
+        pending = b''
+        async for chunk in self.source.chunks():
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            if lines:
+                self.stats['lines'] += len(lines)
+                await self.ring.put_many(time.time(), lines)
+        if pending.strip():
+            self.stats['lines'] += 1
+            await self.ring.put_many(time.time(), [pending])
+
+    async def _flush_loop(self):
+        while True:
+            received, lines = await self.ring.get_batch(self.batch_lines, self.flush_interval)
+            if lines:
+                await self._flush(received, lines)
+            elif self.ring.closed:
+                return
+
+    async def _flush(self, received, lines):
+        frame, rejected, headers = parse_lines(lines, received)
+        if len(frame) > 0:
+            for sink in self.sinks:
+                await asyncio.to_thread(sink.write, frame)
+            self._publish(frame)
+
+        # Lag: time from the oldest line's arrival to the moment its batch is on disk
+        lag_ms = (time.time() - received.min()) * 1000
+        self.stats['rows'] += len(frame)
+        self.stats['rejected'] += rejected
+        self.stats['boots'] += headers
+        self.stats['batches'] += 1
+        self.stats['lag_ms'] = lag_ms
+        self.stats['max_lag_ms'] = max(self.stats['max_lag_ms'], lag_ms)
+
+    def _publish(self, frame):
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+                self.stats['dropped_batches'] += 1
+            queue.put_nowait(frame)
+
+    def status(self):
+        stats = self.stats
+        return (f"[{self.station}] rows={stats['rows']} rejected={stats['rejected']} "
+                f"boots={stats['boots']} buffered={len(self.ring)} high_water={self.ring.high_water} "
+                f"lag={stats['lag_ms']:.0f}ms (max {stats['max_lag_ms']:.0f}ms)")
+
+
+async def run_stations(ingestors, stats_interval=STATS_INTERVAL_S):
+    """Run several station ingestors on one loop, printing their lag periodically"""
+    async def report():
+        while True:
+            await asyncio.sleep(stats_interval)
+            for ingestor in ingestors:
+                print(ingestor.status())
+
+    reporter = asyncio.create_task(report())
+    tasks = [asyncio.create_task(ingestor.run()) for ingestor in ingestors]
+
+    # Ctrl+C / SIGTERM close the sources; buffered lines are still flushed
+    loop = asyncio.get_running_loop()
+    stop = lambda: [task.cancel() for task in tasks]
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    try:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        reporter.cancel()
+
+    for ingestor in ingestors:
+        print(f"✓ {ingestor.status()}")
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Log Arduino station serial output to disk")
+    parser.add_argument('sources', nargs='+', metavar='STATION=PATH',
+                        help="station name and serial device, pty, FIFO or log file to replay")
+    parser.add_argument('--output', default='logs', help="directory for the daily CSV logs")
+    parser.add_argument('--store', help="also write to this partitioned columnar store")
+    parser.add_argument('--archive', help=f"also append to <station>{ARCHIVE_SUFFIX} binary archives in this directory")
+    parser.add_argument('--speed', type=float, help="replay speed-up for log files (default: as fast as possible)")
+    parser.add_argument('--batch-lines', type=int, default=BATCH_LINES)
+    parser.add_argument('--flush-interval', type=float, default=FLUSH_INTERVAL_S)
+    parser.add_argument('--stats-interval', type=float, default=STATS_INTERVAL_S)
+    args = parser.parse_args()
+
+    ingestors = []
+    for spec in args.sources:
+        station, sep, path = spec.partition('=')
+        if not sep:
+            parser.error(f"expected STATION=PATH, got {spec}")
+        sinks = [CsvSink(args.output, station)]
+        if args.store:
+            sinks.append(StoreSink(args.store, station))
+        if args.archive:
+            sinks.append(ArchiveSink(args.archive, station))
+        ingestors.append(StationIngestor(station, open_source(path, args.speed), sinks,
+                                         batch_lines=args.batch_lines, flush_interval=args.flush_interval))
+        print(f"Logging {station} from {path}")
+
+    asyncio.run(run_stations(ingestors, args.stats_interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Pipeline Instrumentation for Environmental Data Analysis
+Author: [Your Name]
+Purpose: Per-stage wall time, CPU time, memory and row counts, exported as JSON or Chrome traces
+
+Tracing is off unless enabled, either in code with enable() or through the
+environment:
+
+    EMS_TRACE=trace.json python data-analyzer.py
+    EMS_TRACE=trace.json EMS_TRACE_FORMAT=chrome EMS_TRACE_MEMORY=1 python visualization.py
+
+Chrome traces open in chrome://tracing or https://ui.perfetto.dev. While
+disabled, span() returns a shared no-op object and traced functions make a
+single extra check per call.
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import resource
+import functools
+import threading
+import tracemalloc
+
+_tracer = None
+
+
+def _rss_bytes():
+    """Current resident set size (0 where /proc is not available)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _max_rss_bytes():
+    # Linux reports kilobytes, macOS bytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+class _NullSpan:
+    """Stand-in returned while tracing is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """One timed stage; use set(rows=...) inside the block to attach counts"""
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.peak = 0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.tracer._push(self)
+        self.rss_start = _rss_bytes()
+        self.cpu_start = time.thread_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        cpu = time.thread_time() - self.cpu_start
+        self.tracer._pop(self, end, cpu, exc_type)
+        return False
+
+
+class Tracer:
+    """Collects spans from every thread of the process"""
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.records = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _push(self, span):
+        stack = self._stack()
+        if self.memory:
+            # The tracemalloc peak is global: hand what was reached so far to the parent first
+            peak = tracemalloc.get_traced_memory()[1]
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            span.traced_start = tracemalloc.get_traced_memory()[0]
+        span.depth = len(stack)
+        span.parent = stack[-1].name if stack else None
+        stack.append(span)
+
+    def _pop(self, span, end, cpu, exc_type):
+        stack = self._stack()
+        stack.pop()
+        record = {
+            'name': span.name,
+            'parent': span.parent,
+            'depth': span.depth,
+            'thread': threading.current_thread().name,
+            'start_s': span.start - self.origin,
+            'wall_s': end - span.start,
+            'cpu_s': cpu,
+            'rss_bytes': _rss_bytes(),
+            'rss_delta_bytes': _rss_bytes() - span.rss_start,
+            'max_rss_bytes': _max_rss_bytes()
+        }
+        if self.memory:
+            peak = max(span.peak, tracemalloc.get_traced_memory()[1])
+            record['traced_peak_bytes'] = peak - span.traced_start
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        record.update(span.attrs)
+        with self._lock:
+            self.records.append(record)
+
+    def span(self, name, **attrs):
+        return Span(self, name, attrs)
+
+    def summary(self):
+        """Total wall and CPU time per stage name, slowest first"""
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record['name'], {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0})
+            total['calls'] += 1
+            total['wall_s'] += record['wall_s']
+            total['cpu_s'] += record['cpu_s']
+            total['rows'] = max(total['rows'], record.get('rows') or 0)
+        return dict(sorted(totals.items(), key=lambda item: -item[1]['wall_s']))
+
+    def print_summary(self):
+        print(f"\n{'stage':<50} {'calls':>6} {'wall (s)':>10} {'cpu (s)':>10} {'rows':>12}")
+        for name, total in self.summary().items():
+            print(f"{name:<50} {total['calls']:>6} {total['wall_s']:>10.3f} {total['cpu_s']:>10.3f} {total['rows'] or '-':>12}")
+
+    def to_json(self, filename):
+        with open(filename, 'w') as f:
+            json.dump({'pid': os.getpid(), 'memory': self.memory, 'spans': self.records}, f, indent=2, default=str)
+        return filename
+
+    def to_chrome(self, filename):
+        """Chrome trace event format: one complete ('X') event per span"""
+        threads = {}
+        events = []
+        for record in self.records:
+            tid = threads.setdefault(record['thread'], len(threads) + 1)
+            args = {key: value for key, value in record.items()
+                    if key not in ('name', 'thread', 'start_s', 'wall_s', 'parent', 'depth')}
+            events.append({'name': record['name'], 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+                           'ts': record['start_s'] * 1e6, 'dur': record['wall_s'] * 1e6, 'args': args})
+        for thread, tid in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+                           'args': {'name': thread}})
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+        return filename
+
+
+def enable(memory=False):
+    """Start collecting spans; memory=True also tracks tracemalloc peaks (slower)"""
+    global _tracer
+    _tracer = Tracer(memory=memory)
+    return _tracer
+
+
+def disable():
+    """Stop collecting spans and return the tracer that was active"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None and tracer.memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return tracer
+
+
+def tracer():
+    """The active tracer, or None while tracing is off"""
+    return _tracer
+
+
+def span(name, **attrs):
+    """Context manager timing one stage (a shared no-op while tracing is off)"""
+    if _tracer is None:
+        return NULL_SPAN
+    return _tracer.span(name, **attrs)
+
+
+def traced(name=None, rows=None):
+    """Decorator wrapping every call in a span
+
+    rows, if given, is called with the function's arguments after the call
+    to attach a row count, e.g. rows=self_rows for analyzer methods.
+    """
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with _tracer.span(label) as current:
+                result = fn(*args, **kwargs)
+                if rows is not None:
+                    current.set(rows=rows(*args, **kwargs))
+                return result
+        return wrapper
+    return decorate
+
+
+def self_rows(obj, *args, **kwargs):
+    """Row count of obj.data, for methods of the analyzer and visualizer"""
+    data = getattr(obj, 'data', None)
+    return len(data) if data is not None else None
+
+
+def _enable_from_environment():
+    filename = os.environ.get('EMS_TRACE')
+    if not filename:
+        return
+    active = enable(memory=os.environ.get('EMS_TRACE_MEMORY', '') not in ('', '0'))
+    chrome = os.environ.get('EMS_TRACE_FORMAT', 'json').lower() == 'chrome'
+
+    def export():
+        written = active.to_chrome(filename) if chrome else active.to_json(filename)
+        active.print_summary()
+        print(f"✓ Trace saved: {written}")
+    atexit.register(export)
+
+
+_enable_from_environment()
@@ -0,0 +1,68 @@
+"""
+Binned Kernel Density Estimation for Environmental Data
+Author: [Your Name]
+Purpose: Gaussian KDE from integer histograms via FFT convolution
+"""
+
+import numpy as np
+
+from instrumentation import traced
+
+# Kernel support in bandwidths on each side
+KERNEL_RADIUS = 4
+
+# Grid points per bandwidth when the bandwidth is narrower than one integer step
+POINTS_PER_BANDWIDTH = 4
+
+MAX_UPSAMPLE = 16
+
+
+def scott_bandwidth(counts, values):
+    """Scott's rule bandwidth, as used by scipy.stats.gaussian_kde in one dimension"""
+    n = counts.sum()
+    if n < 2:
+        return 1.0
+    mean = np.dot(counts, values) / n
+    variance = np.dot(counts, (values - mean) ** 2) / (n - 1)
+    return np.sqrt(variance) * n ** (-1 / 5)
+
+
+@traced('kde.histogram_kde')
+def histogram_kde(counts, offset=0, bandwidth=None):
+    """Gaussian KDE of integer data given as counts for offset, offset+1, ...
+
+    Returns (grid, density) where density integrates to one. The cost depends
+    on the value range and the bandwidth, never on the number of samples.
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    values = offset + np.arange(len(counts))
+    n = counts.sum()
+    if n == 0:
+        return values.astype(np.float64), np.zeros(len(counts))
+    if bandwidth is None:
+        bandwidth = scott_bandwidth(counts, values)
+    bandwidth = max(bandwidth, 1e-3)
+
+    # Refine the grid when the kernel is narrower than the integer spacing
+    upsample = int(min(max(np.ceil(POINTS_PER_BANDWIDTH / bandwidth), 1), MAX_UPSAMPLE))
+    step = 1 / upsample
+    fine = np.zeros((len(counts) - 1) * upsample + 1)
+    fine[::upsample] = counts
+
+    radius = int(np.ceil(KERNEL_RADIUS * bandwidth / step))
+    offsets = np.arange(-radius, radius + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+
+    # Linear convolution through a zero-padded real FFT
+    size = len(fine) + len(kernel) - 1
+    nfft = 1 << (size - 1).bit_length()
+    smoothed = np.fft.irfft(np.fft.rfft(fine, nfft) * np.fft.rfft(kernel, nfft), nfft)[:size]
+
+    grid = offset - radius * step + np.arange(size) * step
+    density = np.clip(smoothed, 0, None) / n
+    return grid, density
+
+
+def evaluate(grid, density, x):
+    """Density at arbitrary points, interpolated from the KDE grid"""
+    return np.interp(x, grid, density, left=0.0, right=0.0)
@@ -0,0 +1,326 @@
+"""
+Live Dashboard Server for Environmental Data
+Author: [Your Name]
+Purpose: Serve the interactive plot once and push only new readings to open pages
+
+The page holds one plot per station, laid out like the interactive plot,
+and an EventSource connection (Server-Sent Events). Readings published by
+the ingestors are collected per station and sent together once per update
+interval, with the rolling statistics of the online module; pages append
+them with Plotly.extendTraces, which keeps at most max_points per trace.
+
+Each page has a bounded queue of pending updates. A page that falls behind
+(a background tab, a slow link) gets its queue replaced by one snapshot of
+the recent readings instead of an ever longer backlog.
+"""
+
+import json
+import asyncio
+import argparse
+
+import numpy as np
+
+from schema import distance_float
+from rollups import epoch_ms
+from online import OnlineStatistics, DEFAULT_WINDOWS_MS, format_window
+from plotly_export import time_series_figure
+
+# Two updates per second
+UPDATE_INTERVAL_S = 0.5
+
+# Readings kept per trace, on the server for snapshots and in the page (20 minutes at 2 Hz)
+MAX_POINTS = 2400
+
+# Updates waiting to be sent to one page before it is resynchronized with a snapshot
+CLIENT_QUEUE = 8
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Environmental Monitoring Station - Live</title>
+<script src="plotly.min.js"></script>
+<style>
+body { font-family: sans-serif; margin: 16px; }
+pre { margin: 0 0 24px 0; font-size: 12px; }
+</style>
+</head>
+<body>
+<h2>Environmental Monitoring Station - Live</h2>
+<div id="stations"></div>
+<script>
+var FIGURES = %(figures)s;
+var MAX_POINTS = %(max_points)d;
+var container = document.getElementById('stations');
+var plots = {}, stats = {};
+Object.keys(FIGURES).forEach(function(station) {
+    plots[station] = document.createElement('div');
+    stats[station] = document.createElement('pre');
+    container.appendChild(plots[station]);
+    container.appendChild(stats[station]);
+    Plotly.newPlot(plots[station], FIGURES[station].data, FIGURES[station].layout);
+});
+
+function dates(times) {
+    return times.map(function(t) { return new Date(t); });
+}
+
+var source = new EventSource('events');
+source.addEventListener('update', function(event) {
+    var update = JSON.parse(event.data);
+    Object.keys(update).forEach(function(station) {
+        var u = update[station];
+        if (u.x.length) {
+            var x = dates(u.x);
+            Plotly.extendTraces(plots[station], {x: [x, x], y: [u.distance, u.reflectance]}, [0, 1], MAX_POINTS);
+        }
+        stats[station].textContent = u.stats;
+    });
+});
+source.addEventListener('snapshot', function(event) {
+    var snapshot = JSON.parse(event.data);
+    Object.keys(snapshot).forEach(function(station) {
+        var s = snapshot[station], x = dates(s.x);
+        Plotly.restyle(plots[station], {x: [x, x], y: [s.distance, s.reflectance]}, [0, 1]);
+        stats[station].textContent = s.stats;
+    });
+});
+</script>
+</body>
+</html>
+"""
+
+
+def _nullable(values):
+    """Float list with NaN (no echo) as null, which JSON can carry and Plotly leaves as a gap"""
+    values = np.asarray(values, dtype=np.float64)
+    return [None if np.isnan(value) else value for value in values.tolist()]
+
+
+class LiveStation:
+    """Recent readings, readings not yet sent and rolling statistics of one station"""
+
+    def __init__(self, station, windows_ms=DEFAULT_WINDOWS_MS, max_points=MAX_POINTS):
+        self.station = station
+        self.max_points = max_points
+        self.statistics = OnlineStatistics(windows_ms)
+        self.rows = 0
+        empty = np.zeros(0)
+        self.recent = (empty.astype(np.int64), empty, empty)   # (epoch ms, distance, reflectance)
+        self.pending = []
+
+    def add(self, frame):
+        """Take one batch published by the station's ingestor"""
+        self.statistics.update_frame(frame)
+        self.rows += len(frame)
+        batch = (epoch_ms(frame['datetime']), distance_float(frame['Distancia(cm)']),
+                 frame['Luminosidade(IR)'].to_numpy(dtype=np.float64))
+        self.recent = tuple(np.concatenate([old, new])[-self.max_points:]
+                            for old, new in zip(self.recent, batch))
+        self.pending.append(batch)
+
+    def status(self):
+        lines = [f"{self.station}: {self.rows} readings"]
+        lines += [format_window(window_ms, stats) for window_ms, stats in self.statistics.snapshot().items()]
+        return '\n'.join(lines)
+
+    def _points(self, times, distance, reflectance):
+        return {'x': times.tolist(), 'distance': _nullable(distance), 'reflectance': _nullable(reflectance),
+                'stats': self.status()}
+
+    def take_update(self):
+        """Readings added since the last update, coalesced into one (None if there are none)"""
+        if not self.pending:
+            return None
+        batches = self.pending
+        self.pending = []
+        times, distance, reflectance = (np.concatenate(column)[-self.max_points:] for column in zip(*batches))
+        return self._points(times, distance, reflectance)
+
+    def snapshot(self):
+        return self._points(*self.recent)
+
+
+class LiveDashboard:
+    """Pushes the readings of several stations to every open page"""
+
+    def __init__(self, stations, interval=UPDATE_INTERVAL_S, max_points=MAX_POINTS, client_queue=CLIENT_QUEUE):
+        self.stations = {station.station: station for station in stations}
+        self.interval = interval
+        self.max_points = max_points
+        self.client_queue = client_queue
+        self.clients = []
+        self.handlers = set()
+        self.stats = {'updates': 0, 'resyncs': 0}
+        self._page = None
+        self._plotly_js = None
+
+    def page(self):
+        """The page, with one empty figure per station (built once)"""
+        if self._page is None:
+            figures = {}
+            for station in self.stations:
+                fig = time_series_figure([], [], [], [], title=station)
+                # uirevision keeps the user's zoom while traces are extended
+                fig.update_layout(xaxis=dict(title='Time', type='date'), uirevision='live')
+                fig.update_traces(hovertemplate='Distance: %{y:.0f}cm', selector=dict(name='Distance (cm)'))
+                fig.update_traces(hovertemplate='Reflectance: %{y:.0f}', selector=dict(name='Reflectance'))
+                figures[station] = json.loads(fig.to_json())
+            self._page = (PAGE % {'figures': json.dumps(figures), 'max_points': self.max_points}).encode()
+        return self._page
+
+    def plotly_js(self):
+        """plotly.js from the installed plotly package, so no internet access is needed"""
+        if self._plotly_js is None:
+            from plotly.offline import get_plotlyjs
+            self._plotly_js = get_plotlyjs().encode()
+        return self._plotly_js
+
+    def _event(self, name, payload):
+        return f"event: {name}\ndata: {json.dumps(payload)}\n\n".encode()
+
+    def snapshot_event(self):
+        return self._event('snapshot', {name: station.snapshot() for name, station in self.stations.items()})
+
+    def _send(self, queue, message):
+        """Queue a message for one page; a page that fell behind is resynchronized instead"""
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            message = self.snapshot_event()
+            self.stats['resyncs'] += 1
+        queue.put_nowait(message)
+
+    async def broadcast(self):
+        """Once per interval, send every page what arrived since the last update"""
+        while True:
+            await asyncio.sleep(self.interval)
+            update = {}
+            for name, station in self.stations.items():
+                points = station.take_update()
+                if points is not None:
+                    update[name] = points
+            if not update:
+                continue
+            # Serialized once for every page
+            message = self._event('update', update)
+            self.stats['updates'] += 1
+            for queue in self.clients:
+                self._send(queue, message)
+
+    async def _stream_events(self, writer):
+        queue = asyncio.Queue(self.client_queue)
+        # A new page starts from the recent readings
+        queue.put_nowait(self.snapshot_event())
+        self.clients.append(queue)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+            while True:
+                writer.write(await queue.get())
+                await writer.drain()
+        finally:
+            self.clients.remove(queue)
+
+    async def handle(self, reader, writer):
+        """Minimal HTTP: the page, plotly.js and the event stream"""
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass  # headers are not needed
+            parts = request.split()
+            path = parts[1].decode('ascii', 'replace').split('?')[0] if len(parts) > 1 else ''
+            if path == '/events':
+                await self._stream_events(writer)
+                return
+            routes = {'/': ('text/html; charset=utf-8', self.page),
+                      '/plotly.min.js': ('application/javascript', self.plotly_js)}
+            if path in routes:
+                content_type, body = routes[path][0], routes[path][1]()
+                status = b'200 OK'
+            else:
+                content_type, body, status = 'text/plain', b'not found', b'404 Not Found'
+            writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Type: " + content_type.encode() +
+                         b"\r\nContent-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n")
+            writer.write(body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # the dashboard is closing: end the connection quietly
+        finally:
+            self.handlers.discard(task)
+            writer.close()
+
+    async def close(self):
+        """End every open connection (pages reconnect by themselves once the server is back)"""
+        handlers = list(self.handlers)
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+
+
+async def follow(queue, station):
+    """Feed batches published by an ingestion subscriber queue into a live station"""
+    while True:
+        station.add(await queue.get())
+
+
+async def serve(ingestors, host='127.0.0.1', port=8050, interval=UPDATE_INTERVAL_S, max_points=MAX_POINTS,
+                windows_ms=DEFAULT_WINDOWS_MS):
+    """Run the ingestors and the dashboard until the streams end"""
+    stations = [LiveStation(ingestor.station, windows_ms, max_points) for ingestor in ingestors]
+    dashboard = LiveDashboard(stations, interval, max_points)
+    followers = [asyncio.create_task(follow(ingestor.subscribe(), station))
+                 for ingestor, station in zip(ingestors, stations)]
+    broadcaster = asyncio.create_task(dashboard.broadcast())
+    server = await asyncio.start_server(dashboard.handle, host, port)
+    print(f"✓ Live dashboard at http://{host}:{port}/")
+    try:
+        await asyncio.gather(*(ingestor.run() for ingestor in ingestors))
+        # The last readings still reach the pages
+        await asyncio.sleep(2 * interval)
+    finally:
+        server.close()
+        await dashboard.close()
+        await server.wait_closed()
+        for task in followers + [broadcaster]:
+            task.cancel()
+        await asyncio.gather(*followers, broadcaster, return_exceptions=True)
+    return dashboard
+
+
+def main():
+    """Command line entry point"""
+    from ingest import StationIngestor, CsvSink, open_source
+
+    parser = argparse.ArgumentParser(description="Live dashboard of station readings in the browser")
+    parser.add_argument('sources', nargs='+', metavar='STATION=PATH',
+                        help="station name and serial device, pty, FIFO or log file to replay")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--output', help="also log the readings to daily CSV files in this directory")
+    parser.add_argument('--speed', type=float, default=1.0, help="replay speed-up for log files")
+    parser.add_argument('--interval', type=float, default=UPDATE_INTERVAL_S, help="seconds between updates")
+    parser.add_argument('--max-points', type=int, default=MAX_POINTS, help="readings kept per plot")
+    args = parser.parse_args()
+
+    ingestors = []
+    for spec in args.sources:
+        station, sep, path = spec.partition('=')
+        if not sep:
+            parser.error(f"expected STATION=PATH, got {spec}")
+        sinks = [CsvSink(args.output, station)] if args.output else []
+        ingestors.append(StationIngestor(station, open_source(path, args.speed), sinks,
+                                         flush_interval=args.interval / 2))
+
+    try:
+        asyncio.run(serve(ingestors, args.host, args.port, args.interval, args.max_points))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+Online Rolling Statistics for Environmental Data
+Author: [Your Name]
+Purpose: Rolling-window statistics for live readings at constant cost per reading
+"""
+
+import asyncio
+import argparse
+from collections import deque
+
+import numpy as np
+
+from schema import DISTANCE_SENTINEL, distance_values
+from timeaxis import TimeStitcher
+
+# Last 10 seconds, 1 minute and 10 minutes
+DEFAULT_WINDOWS_MS = (10_000, 60_000, 600_000)
+
+STATS_INTERVAL_S = 1.0
+
+
+def _push_max(window, seq, value):
+    while window and window[-1][1] <= value:
+        window.pop()
+    window.append((seq, value))
+
+
+def _push_min(window, seq, value):
+    while window and window[-1][1] >= value:
+        window.pop()
+    window.append((seq, value))
+
+
+def _mean(n, total):
+    return total / n if n else np.nan
+
+
+def _std(n, total, total_sq):
+    """Sample standard deviation (ddof=1) from exact integer sums"""
+    if n < 2:
+        return np.nan
+    return np.sqrt((n * total_sq - total * total) / (n * (n - 1)))
+
+
+class RollingWindow:
+    """Statistics over the readings of the last window_ms milliseconds
+
+    Sums are kept as exact integers (the sensors only produce integers), so
+    removing old readings never accumulates rounding error. Min and max come
+    from monotonic deques. Every reading is added and evicted once: O(1)
+    amortized per reading. No-echo distances (999) count as readings
+    but are left out of the distance statistics and the correlation.
+    """
+
+    def __init__(self, window_ms):
+        self.window_ms = window_ms
+        self.last_ms = None
+        self._seq = 0
+        self._readings = deque()   # (seq, time, distance, reflectance, valid)
+        self._distance_min = deque()
+        self._distance_max = deque()
+        self._reflectance_min = deque()
+        self._reflectance_max = deque()
+
+        self.n = 0
+        self.reflectance_sum = 0
+        self.reflectance_sumsq = 0
+        self.n_valid = 0
+        self.distance_sum = 0
+        self.distance_sumsq = 0
+        self.pair_reflectance_sum = 0
+        self.pair_reflectance_sumsq = 0
+        self.pair_sum = 0
+
+    def push(self, time_ms, distance, reflectance):
+        """Add one reading (times must not go backwards) and drop those that left the window"""
+        seq = self._seq
+        self._seq += 1
+        valid = distance < DISTANCE_SENTINEL
+        self._readings.append((seq, time_ms, distance, reflectance, valid))
+
+        self.n += 1
+        self.reflectance_sum += reflectance
+        self.reflectance_sumsq += reflectance * reflectance
+        _push_min(self._reflectance_min, seq, reflectance)
+        _push_max(self._reflectance_max, seq, reflectance)
+        if valid:
+            self.n_valid += 1
+            self.distance_sum += distance
+            self.distance_sumsq += distance * distance
+            self.pair_reflectance_sum += reflectance
+            self.pair_reflectance_sumsq += reflectance * reflectance
+            self.pair_sum += distance * reflectance
+            _push_min(self._distance_min, seq, distance)
+            _push_max(self._distance_max, seq, distance)
+
+        self.last_ms = time_ms
+        self._evict(time_ms - self.window_ms)
+
+    def _evict(self, cutoff_ms):
+        readings = self._readings
+        while readings and readings[0][1] <= cutoff_ms:
+            seq, _, distance, reflectance, valid = readings.popleft()
+            self.n -= 1
+            self.reflectance_sum -= reflectance
+            self.reflectance_sumsq -= reflectance * reflectance
+            if valid:
+                self.n_valid -= 1
+                self.distance_sum -= distance
+                self.distance_sumsq -= distance * distance
+                self.pair_reflectance_sum -= reflectance
+                self.pair_reflectance_sumsq -= reflectance * reflectance
+                self.pair_sum -= distance * reflectance
+            for extremes in (self._distance_min, self._distance_max,
+                             self._reflectance_min, self._reflectance_max):
+                if extremes and extremes[0][0] == seq:
+                    extremes.popleft()
+
+    @property
+    def correlation(self):
+        """Pearson correlation of distance and reflectance over valid readings"""
+        n = self.n_valid
+        if n < 2:
+            return np.nan
+        cov = n * self.pair_sum - self.distance_sum * self.pair_reflectance_sum
+        var_d = n * self.distance_sumsq - self.distance_sum * self.distance_sum
+        var_r = n * self.pair_reflectance_sumsq - self.pair_reflectance_sum * self.pair_reflectance_sum
+        if var_d == 0 or var_r == 0:
+            return np.nan
+        return cov / np.sqrt(float(var_d) * float(var_r))
+
+    def stats(self):
+        return {
+            'readings': self.n,
+            'valid_distances': self.n_valid,
+            'distance_mean': _mean(self.n_valid, self.distance_sum),
+            'distance_std': _std(self.n_valid, self.distance_sum, self.distance_sumsq),
+            'distance_min': self._distance_min[0][1] if self._distance_min else np.nan,
+            'distance_max': self._distance_max[0][1] if self._distance_max else np.nan,
+            'reflectance_mean': _mean(self.n, self.reflectance_sum),
+            'reflectance_std': _std(self.n, self.reflectance_sum, self.reflectance_sumsq),
+            'reflectance_min': self._reflectance_min[0][1] if self._reflectance_min else np.nan,
+            'reflectance_max': self._reflectance_max[0][1] if self._reflectance_max else np.nan,
+            'correlation': self.correlation
+        }
+
+
+class OnlineStatistics:
+    """Rolling statistics over several windows for one station's readings"""
+
+    def __init__(self, windows_ms=DEFAULT_WINDOWS_MS):
+        self.windows = {window_ms: RollingWindow(window_ms) for window_ms in windows_ms}
+        self._stitcher = TimeStitcher()
+
+    def update(self, times_ms, distance, reflectance):
+        """Add readings on a stitched (never decreasing) millisecond axis"""
+        rows = list(zip(np.asarray(times_ms).tolist(), distance_values(distance).tolist(),
+                        np.asarray(reflectance).tolist()))
+        for window in self.windows.values():
+            push = window.push
+            for time_ms, d, r in rows:
+                push(time_ms, d, r)
+        return self
+
+    def update_frame(self, frame, times_ms=None):
+        """Add readings from a frame with the analyzer's columns
+
+        Without times_ms the raw Tempo(ms) column is stitched here, so the
+        frames must arrive in order.
+        """
+        if times_ms is None:
+            times_ms = self._stitcher.stitch(frame['Tempo(ms)'].values)
+        return self.update(times_ms, frame['Distancia(cm)'].values, frame['Luminosidade(IR)'].values)
+
+    def snapshot(self):
+        """Current statistics of every window, keyed by window length in ms"""
+        return {window_ms: window.stats() for window_ms, window in self.windows.items()}
+
+
+def format_window(window_ms, stats):
+    """One status line for a window"""
+    return (f"{window_ms / 1000:>6.0f}s  n={stats['readings']:<5} "
+            f"distance {stats['distance_mean']:6.1f} ± {stats['distance_std']:5.1f} cm "
+            f"[{stats['distance_min']}, {stats['distance_max']}]  "
+            f"reflectance {stats['reflectance_mean']:6.1f} ± {stats['reflectance_std']:5.1f} "
+            f"[{stats['reflectance_min']}, {stats['reflectance_max']}]  "
+            f"r={stats['correlation']:.3f}")
+
+
+async def follow(queue, statistics):
+    """Feed batches published by an ingestion subscriber queue into the statistics"""
+    while True:
+        statistics.update_frame(await queue.get())
+
+
+async def watch(ingestors, windows_ms=DEFAULT_WINDOWS_MS, interval=STATS_INTERVAL_S):
+    """Print rolling statistics of several live stations until their streams end"""
+    statistics = {ingestor.station: OnlineStatistics(windows_ms) for ingestor in ingestors}
+    followers = [asyncio.create_task(follow(ingestor.subscribe(), statistics[ingestor.station]))
+                 for ingestor in ingestors]
+    runs = asyncio.gather(*(ingestor.run() for ingestor in ingestors))
+
+    while not runs.done():
+        await asyncio.wait([runs], timeout=interval)
+        for station, station_statistics in statistics.items():
+            print(f"[{station}]")
+            for window_ms, stats in station_statistics.snapshot().items():
+                print("  " + format_window(window_ms, stats))
+
+    for follower in followers:
+        follower.cancel()
+    return statistics
+
+
+def main():
+    """Command line entry point"""
+    from ingest import StationIngestor, open_source
+
+    parser = argparse.ArgumentParser(description="Rolling statistics of live station readings")
+    parser.add_argument('sources', nargs='+', metavar='STATION=PATH',
+                        help="station name and serial device, pty, FIFO or log file to replay")
+    parser.add_argument('--windows', type=float, nargs='+', default=[w / 1000 for w in DEFAULT_WINDOWS_MS],
+                        help="window lengths in seconds")
+    parser.add_argument('--speed', type=float, default=1.0, help="replay speed-up for log files")
+    parser.add_argument('--interval', type=float, default=STATS_INTERVAL_S, help="seconds between updates")
+    args = parser.parse_args()
+
+    ingestors = []
+    for spec in args.sources:
+        station, sep, path = spec.partition('=')
+        if not sep:
+            parser.error(f"expected STATION=PATH, got {spec}")
+        ingestors.append(StationIngestor(station, open_source(path, args.speed), flush_interval=args.interval / 2))
+
+    windows_ms = [int(seconds * 1000) for seconds in args.windows]
+    asyncio.run(watch(ingestors, windows_ms, args.interval))
+
+
+if __name__ == "__main__":
+    main()
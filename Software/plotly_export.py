@@ -0,0 +1,171 @@
+"""
+High-Volume Plotly Export for Environmental Data
+Author: [Your Name]
+Purpose: Keep interactive HTML small for long deployments (binary arrays, sidecar data)
+"""
+
+import os
+import gzip
+import json
+import base64
+
+import numpy as np
+
+from transitions import encode_runs, debounce_runs
+from instrumentation import span
+
+# Trace attributes that carry per-sample arrays
+ARRAY_KEYS = ('x', 'y', 'customdata')
+
+# Shorter arrays are left inline as plain JSON
+MIN_BINARY_LENGTH = 64
+
+SIDECAR_SCRIPT = """
+(function() {
+    var gd = document.getElementById('{plot_id}');
+    fetch('%s').then(function(response) {
+        var stream = response.body.pipeThrough(new DecompressionStream('gzip'));
+        return new Response(stream).json();
+    }).then(function(traces) {
+        traces.forEach(function(update, i) { Object.assign(gd.data[i], update); });
+        Plotly.react(gd, gd.data, gd.layout);
+    });
+})();
+"""
+
+
+def encode_array(values):
+    """Plotly typed-array spec ({dtype, bdata}) using the narrowest exact dtype"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        low, high = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+        for dtype in (np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                break
+        else:
+            dtype = np.float64
+    else:
+        values = values.astype(np.float64)
+        narrow = values.astype(np.float32)
+        dtype = np.float32 if np.array_equal(narrow, values, equal_nan=True) else np.float64
+    data = np.ascontiguousarray(values, dtype=dtype)
+    return {'dtype': data.dtype.str.lstrip('<|='), 'bdata': base64.b64encode(data.tobytes()).decode('ascii')}
+
+
+def _is_numeric_array(value):
+    if isinstance(value, (list, tuple, np.ndarray)) and len(value) >= MIN_BINARY_LENGTH:
+        array = np.asarray(value)
+        return array.dtype.kind in 'iuf'
+    return False
+
+
+def binary_figure_dict(fig):
+    """Figure as a plain dict with long numeric arrays base64-encoded"""
+    figure = fig.to_plotly_json()
+    for trace in figure['data']:
+        for key in ARRAY_KEYS:
+            if _is_numeric_array(trace.get(key)):
+                trace[key] = encode_array(trace[key])
+    return figure
+
+
+def write_figure(fig, output_file, high_volume=False, sidecar=False):
+    """Write a figure to HTML, optionally binary-encoded with its data in a gzip sidecar
+
+    With a sidecar the page carries only the layout; the arrays are fetched
+    from <output_file>.data.json.gz when the page opens, so the directory
+    must be served over HTTP (e.g. python -m http.server).
+    """
+    import plotly.io as pio
+
+    if not high_volume:
+        with span('plotly.write_html'):
+            fig.write_html(output_file)
+        return output_file
+
+    with span('plotly.binary_encode'):
+        figure = binary_figure_dict(fig)
+    if not sidecar:
+        with span('plotly.write_html'):
+            pio.write_html(figure, output_file, validate=False)
+        return output_file
+
+    sidecar_file = output_file + '.data.json.gz'
+    traces = []
+    for trace in figure['data']:
+        traces.append({key: trace.pop(key) for key in ARRAY_KEYS if isinstance(trace.get(key), dict)})
+    with span('plotly.write_sidecar'), gzip.open(sidecar_file, 'wt', encoding='ascii') as f:
+        json.dump(traces, f, separators=(',', ':'))
+
+    post_script = SIDECAR_SCRIPT % os.path.basename(sidecar_file)
+    with span('plotly.write_html'):
+        pio.write_html(figure, output_file, validate=False, post_script=post_script)
+    return sidecar_file
+
+
+def time_series_figure(distance_x, distance_y, reflectance_x, reflectance_y, high_volume=False,
+                       title='Environmental Monitoring Station - Live Data'):
+    """Distance and reflectance over time on two y axes, with the alert thresholds"""
+    import plotly.graph_objects as go
+
+    Scatter = go.Scattergl if high_volume else go.Scatter
+    fig = go.Figure()
+
+    # Add distance trace
+    fig.add_trace(Scatter(
+        x=distance_x,
+        y=distance_y,
+        mode='lines',
+        name='Distance (cm)',
+        line=dict(color='blue', width=1),
+        hovertemplate='Time: %{x:.1f}s<br>Distance: %{y:.1f}cm'
+    ))
+
+    # Add reflectance trace
+    fig.add_trace(Scatter(
+        x=reflectance_x,
+        y=reflectance_y,
+        mode='lines',
+        name='Reflectance',
+        line=dict(color='green', width=1),
+        yaxis='y2',
+        hovertemplate='Time: %{x:.1f}s<br>Reflectance: %{y:.0f}'
+    ))
+
+    # Update layout
+    fig.update_layout(
+        title=title,
+        xaxis=dict(title='Time (seconds)'),
+        yaxis=dict(title='Distance (cm)', side='left'),
+        yaxis2=dict(title='Reflectance', side='right', overlaying='y'),
+        hovermode='x unified',
+        template='plotly_white'
+    )
+
+    # Add threshold lines
+    fig.add_hline(y=10, line_dash="dash", line_color="red", annotation_text="Alert Threshold")
+    fig.add_hline(y=30, line_dash="dash", line_color="green", annotation_text="Ideal Boundary")
+    return fig
+
+
+def state_run_shapes(states, times_ms, state_order, colors, xref, yref, width_px, opacity=0.6):
+    """One rectangle per state run, with runs narrower than a pixel merged away"""
+    runs = encode_runs(states, times_ms)
+    if len(runs) == 0:
+        return []
+    span_s = (runs['end_ms'].iloc[-1] - runs['start_ms'].iloc[0]) / 1000
+    if width_px and span_s > 0:
+        runs = debounce_runs(runs, span_s / width_px)
+
+    position = {state: i for i, state in enumerate(state_order)}
+    shapes = []
+    for state, start, end in zip(runs['state'].astype(object), runs['start_ms'] / 1000, runs['end_ms'] / 1000):
+        row = position.get(state)
+        if row is None:
+            continue
+        shapes.append(dict(type='rect', xref=xref, yref=yref,
+                           x0=start, x1=max(end, start + 0.5), y0=row - 0.4, y1=row + 0.4,
+                           fillcolor=colors.get(state, 'gray'), opacity=opacity, line_width=0,
+                           layer='below'))
+    return shapes
@@ -0,0 +1,22 @@
+"""
+Plotting Setup for Environmental Data Analysis
+Author: [Your Name]
+Purpose: Import matplotlib and seaborn only when a plotting stage runs
+
+matplotlib, seaborn and plotly together take seconds to import, which
+stats and report jobs have no use for. Modules that plot call pyplot()
+inside the function that draws, and import plotly locally.
+"""
+
+import functools
+
+
+@functools.lru_cache(maxsize=None)
+def pyplot():
+    """matplotlib.pyplot with the station's plot style applied on first use"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.style.use('seaborn-v0_8-darkgrid')
+    sns.set_palette("husl")
+    return plt
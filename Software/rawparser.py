@@ -0,0 +1,270 @@
+"""
+Raw Capture Parser for Environmental Data
+Author: [Your Name]
+Purpose: Split readings from noise in raw serial captures as fast as reading a clean log
+
+A raw capture is whatever came over the serial port: the CSV header again
+after every board reset, ERR_* diagnostic lines, partial lines from
+unplugging the cable and garbage from a wrong baud rate. pd.read_csv either
+fails on these or slows to a crawl with on_bad_lines.
+
+The capture is memory-mapped and scanned in blocks of whole lines with
+byte-level numpy operations: line and comma positions, the numeric fields
+decoded digit by digit and the state names compared a word at a time, for
+all lines at once. Only the rejected lines are looked at one by one, to
+tell headers, error codes and noise apart.
+"""
+
+import os
+import mmap
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from schema import CSV_COLUMNS, DISTANCE_SENTINEL, IR_MAX, MILLIS_MAX, STATE_DTYPE, validate
+from transitions import STATES
+
+HEADER = ','.join(CSV_COLUMNS).encode()
+
+# Bytes scanned per block (cut at a line end); a few times this is held in temporaries
+BLOCK_BYTES = 4 * 1024 * 1024
+
+# Most digits the sketch prints in each numeric field (millis() fits in 10)
+FIELD_DIGITS = (10, 3, 4)
+
+STATE_BYTES = [state.encode() for state in STATES]
+
+REJECT_KINDS = ('header', 'error', 'blank', 'out_of_range', 'malformed')
+
+# State fields zero-padded to whole 8-byte words, compared a word at a time
+_STATE_WIDTH = -(-max(len(state) for state in STATE_BYTES) // 8) * 8
+_STATE_WORDS = np.zeros((len(STATE_BYTES) + 1, _STATE_WIDTH), dtype=np.uint8)
+_STATE_LENGTHS = np.full(len(STATE_BYTES) + 1, -1, dtype=np.int64)
+# The first byte tells the states apart; anything else maps to the extra row
+_STATE_BY_FIRST = np.full(256, len(STATE_BYTES), dtype=np.int64)
+for _code, _state in enumerate(STATE_BYTES):
+    _STATE_WORDS[_code, :len(_state)] = np.frombuffer(_state, dtype=np.uint8)
+    _STATE_LENGTHS[_code] = len(_state)
+    _STATE_BY_FIRST[_state[0]] = _code
+_STATE_WORDS = _STATE_WORDS.view(np.uint64)
+
+_PAD = max(max(FIELD_DIGITS), _STATE_WIDTH)
+_PADDING = np.zeros(_PAD, dtype=np.uint8)
+
+
+class CaptureReport:
+    """What a raw capture held besides readings"""
+
+    def __init__(self):
+        self.bytes = 0
+        self.lines = 0
+        self.rejects = dict.fromkeys(REJECT_KINDS, 0)
+        self.errors = {}     # ERR_* code -> count
+        self.sessions = []   # (row of the first reading after it, byte offset of the header)
+        self.seconds = 0.0
+
+    @property
+    def rejected(self):
+        return sum(self.rejects.values())
+
+    @property
+    def throughput_mb_s(self):
+        return self.bytes / 1e6 / self.seconds if self.seconds else np.nan
+
+    def session_frame(self):
+        """Session boundaries: one row per header line printed by setup()"""
+        return pd.DataFrame(self.sessions, columns=['row', 'offset'])
+
+    def invalid(self):
+        """Reject counts in the layout of validate()'s invalid counts"""
+        invalid = dict(self.rejects)
+        invalid['rows'] = self.rejected
+        return invalid
+
+
+def _gather(buf, starts, width):
+    """(lines, width) matrix of the bytes from each start, copied through a strided view"""
+    return sliding_window_view(buf, width)[starts]
+
+
+def _decode_field(buf, starts, ends, digits):
+    """Integers from runs of ASCII digits, all lines at once, and where the field was valid"""
+    lengths = ends - starts
+    # Right-aligned: the last column holds the units
+    values = _gather(buf, ends - digits, digits) - np.uint8(48)
+    values *= np.arange(digits) >= (digits - lengths)[:, None]
+    ok = (lengths >= 1) & (lengths <= digits)
+    number = np.zeros(len(starts), dtype=np.int64)
+    for column in values.T:
+        ok &= column <= 9
+        number = number * 10 + column
+    return number, ok
+
+
+def _state_codes(buf, starts, ends):
+    """Index into STATES of each state field, -1 where it is none of them"""
+    candidates = _STATE_BY_FIRST[buf[starts]]
+    lengths = _STATE_LENGTHS[candidates]
+    field = _gather(buf, starts, _STATE_WIDTH)
+    field *= np.arange(_STATE_WIDTH) < lengths[:, None]
+    match = ends - starts == lengths
+    for word, expected in zip(field.view(np.uint64).T, _STATE_WORDS[candidates].T):
+        match &= word == expected
+    return np.where(match, candidates, -1)
+
+
+def parse_block(buf):
+    """Readings of a block of whole lines (a uint8 array), all lines at once
+
+    Returns (readings, line starts, line ends, kinds) where kinds holds,
+    per line, 0 for a reading, 1 for a well-formed line outside the
+    schema's ranges and 2 for anything else. A line is well-formed when
+    its first three commas split it into three digit runs and a state name
+    that ends the line, which leaves no room for any other byte.
+    """
+    size = len(buf)
+    # Zero padding lets every field be read at a fixed width without running off the block
+    buf = np.concatenate([_PADDING, buf, _PADDING])
+    newlines = np.flatnonzero(buf == 10)
+    if len(newlines) == 0 or newlines[-1] != _PAD + size - 1:
+        newlines = np.append(newlines, _PAD + size)  # last line without a line end
+    starts = np.concatenate([[_PAD], newlines[:-1] + 1])
+    ends = newlines.copy()
+    # Lines ending in \r\n
+    ends -= (ends > starts) & (buf[ends - 1] == 13)
+
+    # The first three commas of each line, if it has them
+    comma_at = np.append(np.flatnonzero(buf == 44), [_PAD + size] * 3)
+    first_comma = np.searchsorted(comma_at, starts)
+    shaped = comma_at[first_comma + 2] < ends
+    line_starts, line_ends, first_comma = starts[shaped], ends[shaped], first_comma[shaped]
+    c1, c2, c3 = (comma_at[first_comma + k] for k in range(3))
+
+    tempo, ok_t = _decode_field(buf, line_starts, c1, FIELD_DIGITS[0])
+    distance, ok_d = _decode_field(buf, c1 + 1, c2, FIELD_DIGITS[1])
+    reflectance, ok_r = _decode_field(buf, c2 + 1, c3, FIELD_DIGITS[2])
+    codes = _state_codes(buf, c3 + 1, line_ends)
+
+    well_formed = ok_t & ok_d & ok_r & (codes >= 0)
+    in_range = (tempo <= MILLIS_MAX) & (distance >= 1) & (reflectance <= IR_MAX)
+    good = well_formed & in_range
+
+    kinds = np.full(len(starts), 2, dtype=np.int8)
+    shaped_rows = np.flatnonzero(shaped)
+    kinds[shaped_rows[well_formed]] = 1
+    kinds[shaped_rows[good]] = 0
+
+    distance = distance[good]
+    readings = pd.DataFrame({
+        'Tempo(ms)': tempo[good],
+        'Distancia(cm)': pd.arrays.IntegerArray(distance.astype(np.int16), distance == DISTANCE_SENTINEL),
+        'Luminosidade(IR)': reflectance[good].astype(np.uint16),
+        'Estado': pd.Categorical.from_codes(codes[good], dtype=STATE_DTYPE)
+    })
+    return readings, starts - _PAD, ends - _PAD, kinds
+
+
+def _classify(line):
+    """Kind of a rejected line that is not a reading at all (and its ERR_* code)"""
+    line = line.strip()
+    if not line:
+        return 'blank', None
+    if line == HEADER:
+        return 'header', None
+    if line.startswith(b'ERR_'):
+        return 'error', line.split(b',', 1)[0].split()[0].decode('ascii', 'replace')
+    return 'malformed', None
+
+
+def _blocks(data, block_bytes):
+    """(start, end) byte ranges of whole lines, about block_bytes each"""
+    size = len(data)
+    start = 0
+    while start < size:
+        end = min(start + block_bytes, size)
+        if end < size:
+            cut = data.rfind(b'\n', start, end)
+            end = cut + 1 if cut >= start else (data.find(b'\n', end) + 1 or size)
+        yield start, end
+        start = end
+
+
+def parse_capture(filename, block_bytes=BLOCK_BYTES):
+    """Parse a raw serial capture into (readings, CaptureReport)
+
+    Readings are in the schema of read_readings(); the reject counts are
+    also kept in frame.attrs['invalid'].
+    """
+    report = CaptureReport()
+    began = time.perf_counter()
+    parts = []
+    rows = 0
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        try:
+            for start, end in _blocks(data, block_bytes):
+                buf = np.frombuffer(data, dtype=np.uint8, count=end - start, offset=start)
+                readings, starts, ends, kinds = parse_block(buf)
+                del buf  # the mmap cannot close while a view is alive
+                report.lines += len(starts)
+                report.rejects['out_of_range'] += int((kinds == 1).sum())
+
+                # Lines that are not readings at all are few: classify them one by one
+                readings_before = np.cumsum(kinds == 0) - (kinds == 0)
+                for line in np.flatnonzero(kinds == 2):
+                    kind, code = _classify(data[start + starts[line]:start + ends[line]])
+                    report.rejects[kind] += 1
+                    if kind == 'error':
+                        report.errors[code] = report.errors.get(code, 0) + 1
+                    elif kind == 'header':
+                        report.sessions.append((rows + int(readings_before[line]), start + int(starts[line])))
+                rows += len(readings)
+                parts.append(readings)
+        finally:
+            if size:
+                data.close()
+
+    frame = pd.concat(parts, ignore_index=True) if parts else validate(
+        pd.DataFrame({column: pd.Series(dtype=object) for column in CSV_COLUMNS}))[0]
+    report.bytes = size
+    report.seconds = time.perf_counter() - began
+    frame.attrs['invalid'] = report.invalid()
+    return frame, report
+
+
+def write_clean(frame, output_file):
+    """Write readings back out as a clean CSV log (999 for no echo, as the sketch prints)"""
+    frame.to_csv(output_file, columns=CSV_COLUMNS, index=False, na_rep=str(DISTANCE_SENTINEL))
+    return output_file
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Separate readings from noise in a raw serial capture")
+    parser.add_argument('capture', help="raw serial capture (headers after resets, ERR_ lines, noise)")
+    parser.add_argument('--output', help="clean CSV log to write")
+    parser.add_argument('--sessions', action='store_true', help="list the session boundaries")
+    args = parser.parse_args()
+
+    frame, report = parse_capture(args.capture)
+    print(f"Parsed {report.bytes / 1e6:.1f} MB in {report.seconds:.2f} s ({report.throughput_mb_s:.0f} MB/s)")
+    print(f"Readings: {len(frame)} of {report.lines} lines")
+    for kind, count in report.rejects.items():
+        if count:
+            print(f"  {kind.replace('_', ' ')}: {count}")
+    for code, count in sorted(report.errors.items()):
+        print(f"    {code}: {count}")
+    print(f"Sessions: {len(report.sessions)}")
+    if args.sessions:
+        print(report.session_frame().to_string(index=False))
+    if args.output:
+        write_clean(frame, args.output)
+        print(f"✓ Clean log saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Parallel Rendering for Environmental Data
+Author: [Your Name]
+Purpose: Prepare panel data concurrently and render independent outputs in a process pool
+
+The static dashboard, the analyzer's PNG, the interactive HTML files and
+the markdown report only read the readings, so each can be rendered in its
+own process. The readings are written once as .npy files that every
+worker memory-maps read-only, instead of pickling a copy per task.
+"""
+
+import io
+import os
+import tempfile
+import argparse
+import functools
+import contextlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from context import AnalysisContext
+from instrumentation import span, traced
+
+# Independent outputs and the files they write inside the output directory
+OUTPUTS = {
+    'dashboard': 'environmental_dashboard.png',
+    'analysis': 'environmental_analysis.png',
+    'interactive': 'interactive_plot.html',
+    'interactive_dashboard': 'interactive_dashboard.html',
+    'report': 'environmental_report.md'
+}
+
+# Frames opened by this worker process, keyed by shared directory
+_shared_frames = {}
+
+
+@functools.lru_cache(maxsize=None)
+def load_analyzer_module():
+    """data-analyzer.py has a hyphen in its name, so it is loaded from its path"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data-analyzer.py')
+    spec = importlib.util.spec_from_file_location('data_analyzer', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def prepare_panels(context, workers=None):
+    """Compute the derived data of every dashboard panel concurrently
+
+    numpy and pandas release the GIL in their inner loops, so independent
+    products (time axis, distance histogram, state runs, per-state groups)
+    overlap. Each product is still computed only once.
+    """
+    context.elapsed_ms  # shared by the time axis and the state runs
+    products = [
+        lambda: context.time_seconds,
+        lambda: context.distance_float,
+        lambda: context.summary,
+        lambda: context.valid_data,
+        lambda: context.correlation,
+        lambda: context.rolling_correlation(),
+        lambda: context.lag_correlation(),
+        lambda: context.runs,
+        lambda: context.values_by_state('Distancia(cm)', valid_only=True),
+        lambda: context.values_by_state('Luminosidade(IR)')
+    ]
+    with span('prepare_panels', rows=len(context.data)), ThreadPoolExecutor(workers) as executor:
+        list(executor.map(lambda compute: compute(), products))
+    return context
+
+
+def share_frame(data, directory):
+    """Write the columns of a frame as .npy files and return how to reopen them
+
+    Categorical and string columns are stored as integer codes, nullable
+    integers as values plus mask.
+    """
+    columns = {}
+    for i, column in enumerate(data.columns):
+        values = data[column].array
+        path = os.path.join(directory, f'{i}.npy')
+        if isinstance(values, pd.arrays.IntegerArray):
+            np.save(path, values.to_numpy(dtype=values.dtype.numpy_dtype, na_value=0))
+            np.save(path + '.mask.npy', np.asarray(values.isna()))
+            columns[column] = ('masked', path)
+        elif isinstance(values, pd.Categorical) or data[column].dtype == object or \
+                pd.api.types.is_string_dtype(data[column].dtype):
+            categorical = pd.Categorical(values)
+            np.save(path, categorical.codes)
+            columns[column] = ('categorical', path, list(categorical.categories))
+        else:
+            np.save(path, np.asarray(values))
+            columns[column] = ('plain', path)
+    return {'directory': directory, 'columns': columns, 'attrs': dict(data.attrs)}
+
+
+def open_shared(spec):
+    """Frame over the memory-mapped columns written by share_frame (read-only, no parsing)"""
+    frame = _shared_frames.get(spec['directory'])
+    if frame is not None:
+        return frame
+
+    columns = {}
+    for column, (kind, path, *extra) in spec['columns'].items():
+        values = np.load(path, mmap_mode='r')
+        if kind == 'masked':
+            columns[column] = pd.arrays.IntegerArray(values, np.load(path + '.mask.npy', mmap_mode='r'))
+        elif kind == 'categorical':
+            columns[column] = pd.Categorical.from_codes(values, categories=extra[0])
+        else:
+            columns[column] = values
+    frame = pd.DataFrame(columns, copy=False)
+    frame.attrs.update(spec['attrs'])
+    _shared_frames[spec['directory']] = frame
+    return frame
+
+
+def render_output(name, data, output_dir, downsample='minmax', high_volume=False):
+    """Render one output from readings (a frame or an AnalysisContext); returns its file"""
+    output_file = os.path.join(output_dir, OUTPUTS[name])
+    if name == 'dashboard':
+        from visualization import EnvironmentalVisualizer
+        visualizer = EnvironmentalVisualizer(data, downsample=downsample)
+        _close_figure(visualizer.create_comprehensive_dashboard(output_file))
+    elif name == 'interactive_dashboard':
+        from visualization import create_interactive_dashboard
+        create_interactive_dashboard(data, output_file, downsample, high_volume=high_volume)
+    else:
+        analyzer = load_analyzer_module().EnvironmentalAnalyzer.from_frame(data)
+        if name == 'analysis':
+            _close_figure(analyzer.create_visualizations(output_dir, downsample, interactive=False))
+        elif name == 'interactive':
+            analyzer.create_interactive_plot(output_dir, downsample, high_volume=high_volume)
+        else:
+            analyzer.generate_report(output_file)
+    return output_file
+
+
+def _close_figure(fig):
+    """Free a matplotlib figure once it is saved (long-lived workers would keep it)"""
+    if fig is not None:
+        from plotting import pyplot
+        pyplot().close(fig)
+
+
+def _render_task(name, spec, output_dir, downsample, high_volume):
+    """Worker: render one output from the shared readings, capturing what it prints"""
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        output_file = render_output(name, open_shared(spec), output_dir, downsample, high_volume)
+    return output_file, log.getvalue()
+
+
+@traced('render_outputs')
+def render_outputs(data, output_dir="output", outputs=tuple(OUTPUTS), workers=None,
+                   downsample='minmax', high_volume=False):
+    """Render independent outputs concurrently; returns {output: file}
+
+    With one worker (or one output) everything is rendered in this process,
+    sharing a single AnalysisContext. Otherwise each output goes to a
+    worker process reading a memory-mapped copy of the readings.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    context = AnalysisContext.of(data)
+    workers = min(workers or os.cpu_count() or 1, len(outputs))
+
+    if workers <= 1:
+        return {name: render_output(name, context, output_dir, downsample, high_volume) for name in outputs}
+
+    written = {}
+    with tempfile.TemporaryDirectory(prefix='ems-render-') as directory:
+        with span('share_frame', rows=len(context.data)):
+            spec = share_frame(context.data, directory)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {name: executor.submit(_render_task, name, spec, output_dir, downsample, high_volume)
+                       for name in outputs}
+            # Print in a stable order, whatever finishes first
+            for name, future in futures.items():
+                written[name], log = future.result()
+                print(log, end='')
+    return written
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Render every dashboard, plot and report of a log in parallel")
+    parser.add_argument('filename', help="CSV log or columnar store directory")
+    parser.add_argument('--output-dir', default="output")
+    parser.add_argument('--outputs', nargs='+', choices=list(OUTPUTS), default=list(OUTPUTS))
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--downsample', choices=['minmax', 'lttb', 'none'], default='minmax')
+    parser.add_argument('--high-volume', action='store_true',
+                        help="WebGL traces and binary arrays for long deployments")
+    args = parser.parse_args()
+
+    analyzer = load_analyzer_module().EnvironmentalAnalyzer(args.filename)
+    if analyzer.data is None:
+        print("Rendering could not be completed. Please check your data file.")
+        return
+
+    downsample = None if args.downsample == 'none' else args.downsample
+    written = render_outputs(analyzer.context, args.output_dir, args.outputs, args.workers,
+                             downsample, args.high_volume)
+    print("\nOutput Files Created:")
+    for name, output_file in written.items():
+        print(f"✓ {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Report Rendering for Environmental Data
+Author: [Your Name]
+Purpose: Render the analysis report from a reading summary, as markdown or JSON
+"""
+
+import json
+from datetime import datetime
+
+import numpy as np
+
+from anomalies import anomaly_summary, anomaly_mask
+from instrumentation import traced
+
+
+@traced('render_report')
+def render_report(summary, station=None, extra_sections='', duration_s=None, sampling_rate_hz=None,
+                  duration_label='Analysis Duration'):
+    """Render the markdown analysis report from a ReadingSummary
+
+    station adds a Station line to the summary; extra_sections is markdown
+    inserted before the insights. duration_s and sampling_rate_hz override
+    the values derived from the summary's time span (e.g. for a fleet,
+    whose stations' millis() clocks are unrelated).
+    """
+    rows = summary.rows
+    if duration_s is None:
+        duration_s = summary.duration_ms / 1000
+    if sampling_rate_hz is None:
+        sampling_rate_hz = rows / duration_s if duration_s else 0
+    station_line = f"- **Station**: {station}\n" if station else ""
+
+    report = f"""# Environmental Monitoring Station - Analysis Report
+
+## Report Summary
+- **Analysis Date**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+- **Data Source**: Arduino Environmental Station
+{station_line}- **Total Records**: {rows}
+- **{duration_label}**: {duration_s:.1f} seconds
+
+## System Performance
+
+### Data Collection:
+- **Sampling Rate**: {sampling_rate_hz:.2f} Hz
+- **Data Completeness**: {100 - (summary.null_cells/rows*100):.1f}%
+- **Measurement Range**: Distance: 0-{summary.distance_raw_max:.0f}cm, Reflectance: 0-1023
+
+### State Analysis:
+"""
+
+    # Add state statistics
+    for state, count in summary.state_counts():
+        percentage = (count / rows) * 100
+        report += f"- **{state}**: {count} records ({percentage:.1f}%)\n"
+
+    # Add distance analysis
+    valid_count = summary.valid_distances
+    if valid_count > 0:
+        distance = summary.distance_stats()
+        report += f"""
+## Distance Analysis
+
+### Statistical Summary:
+- **Mean Distance**: {distance['Mean']:.1f} cm
+- **Median Distance**: {distance['Median']:.1f} cm
+- **Standard Deviation**: {distance['Std Dev']:.1f} cm
+- **Measurement Range**: {distance['Min']:.1f} to {distance['Max']:.1f} cm
+
+### Distance Categories:
+"""
+        for category, count in summary.distance_categories():
+            percentage = (count / valid_count) * 100
+            report += f"- **{category}**: {count} measurements ({percentage:.1f}%)\n"
+
+    # Add reflectance analysis
+    reflectance = summary.reflectance_stats()
+    report += f"""
+## Reflectance Analysis
+
+### Statistical Summary:
+- **Mean Reflectance**: {reflectance['Mean']:.0f}
+- **Median Reflectance**: {reflectance['Median']:.0f}
+- **Standard Deviation**: {reflectance['Std Dev']:.0f}
+- **Dynamic Range**: {reflectance['Min']:.0f} to {reflectance['Max']:.0f}
+{extra_sections}
+## Environmental Insights
+
+### Observations:
+1. **System Responsiveness**: The station successfully detects changes in the environment
+2. **Alert System**: Proper triggering of alerts when objects are too close
+3. **Data Consistency**: Measurements show expected patterns and ranges
+4. **Environmental Conditions**: Reflectance values indicate surface properties
+
+### Recommendations:
+1. **Deployment Optimization**: Consider sensor placement for specific applications
+2. **Data Collection**: Extend monitoring periods for trend analysis
+3. **Alert Thresholds**: Adjust based on specific environmental requirements
+4. **Maintenance**: Regular sensor calibration for accuracy
+
+## Technical Specifications
+- **Microcontroller**: Arduino Uno
+- **Primary Sensor**: HC-SR04 Ultrasonic (2-400cm range)
+- **Secondary Sensor**: IR Reflectance (0-1023 analog)
+- **Alert System**: RGB LED + Buzzer
+- **Data Output**: CSV format via Serial
+
+---
+*Report generated automatically by Environmental Monitoring Analysis Tool*
+
+**Location**: Mozambique  
+**Project**: Environmental Monitoring Station  
+**Version**: 1.0  
+"""
+    return report
+
+
+def render_fleet_report(station_summaries, fleet_summary):
+    """Render the fleet report: merged statistics plus a per-station comparison"""
+    table = """
+## Station Comparison
+
+| Station | Records | Duration (h) | Valid Distance | Mean Distance (cm) | Mean Reflectance | Correlation | Alert Share |
+|---------|---------|--------------|----------------|--------------------|------------------|-------------|-------------|
+"""
+    for station, summary in sorted(station_summaries.items()):
+        rows = summary.rows or 1
+        alerts = summary.states.get('ALERTA_PROXIMO', 0)
+        table += (f"| {station} | {summary.rows} | {summary.duration_ms / 3_600_000:.1f} "
+                  f"| {summary.valid_distances / rows * 100:.1f}% "
+                  f"| {summary.distance_moments.mean:.1f} | {summary.reflectance_moments.mean:.0f} "
+                  f"| {summary.correlation.correlation:.3f} | {alerts / rows * 100:.1f}% |\n")
+
+    # The merged time span mixes unrelated millis() clocks: use per-station durations and rates
+    durations_s = [summary.duration_ms / 1000 for summary in station_summaries.values()]
+    rates = [summary.rows / duration_s for summary, duration_s in zip(station_summaries.values(), durations_s)
+             if duration_s]
+    return render_report(fleet_summary, station=f"Fleet of {len(station_summaries)} stations",
+                         extra_sections=table, duration_s=sum(durations_s),
+                         sampling_rate_hz=np.mean(rates) if rates else 0,
+                         duration_label='Recorded Duration (all stations)')
+
+
+def render_data_quality(events, rows):
+    """Markdown section listing the sensor faults and anomalies found (anomalies.py events)"""
+    section = "\n## Data Quality\n\n"
+    if len(events) == 0:
+        return section + "No sensor faults or anomalies were detected.\n"
+
+    flagged = int(anomaly_mask(events, rows).sum())
+    section += f"""- **Flagged Readings**: {flagged} ({flagged / rows * 100:.1f}%)
+
+| Anomaly | Events | Readings | Duration (s) |
+|---------|--------|----------|--------------|
+"""
+    for kind, row in anomaly_summary(events).iterrows():
+        section += (f"| {kind.replace('_', ' ')} | {row['events']:.0f} | {row['samples']:.0f} "
+                    f"| {row['duration_s']:.1f} |\n")
+    return section
+
+
+def _number(value):
+    """JSON-safe number: NaN (no data) becomes None"""
+    return None if value is None or np.isnan(value) else float(value)
+
+
+def summary_sections(summary):
+    """The report's sections as plain data, with the numbers the markdown report shows"""
+    rows = summary.rows
+    duration_s = summary.duration_ms / 1000
+    valid_count = summary.valid_distances
+    sections = {
+        'records': rows,
+        'duration_s': duration_s,
+        'sampling_rate_hz': rows / duration_s if duration_s else 0.0,
+        'completeness_pct': 100 - summary.null_cells / rows * 100 if rows else None,
+        'states': {state: {'count': count, 'percent': count / rows * 100}
+                   for state, count in summary.state_counts()},
+        'distance': None,
+        'reflectance': {name: _number(value) for name, value in summary.reflectance_stats().items()}
+    }
+    if valid_count > 0:
+        sections['distance'] = {
+            'valid': valid_count,
+            'statistics': {name: _number(value) for name, value in summary.distance_stats().items()},
+            'categories': {category: {'count': count, 'percent': count / valid_count * 100}
+                           for category, count in summary.distance_categories()}
+        }
+    return sections
+
+
+def report_document(summary, periods=None, station=None, anomalies=None):
+    """JSON report for dashboards: the overall sections plus, optionally, one entry per period
+
+    periods is a list of (period start in ms, ReadingSummary); anomalies
+    are anomalies.py events, listed with their per-kind totals.
+    """
+    document = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'station': station,
+        'summary': summary_sections(summary)
+    }
+    if periods is not None:
+        document['periods'] = [dict(start_ms=int(start_ms), **summary_sections(period))
+                               for start_ms, period in periods]
+    if anomalies is not None:
+        document['data_quality'] = {
+            'totals': {kind: {name: float(value) for name, value in row.items()}
+                       for kind, row in anomaly_summary(anomalies).iterrows()},
+            'events': anomalies.astype({'start_row': int, 'end_row': int, 'samples': int}).to_dict('records')
+        }
+    return document
+
+
+def write_report_json(document, output_file):
+    with open(output_file, 'w') as f:
+        json.dump(document, f, indent=2)
+    return output_file
@@ -0,0 +1,192 @@
+"""
+Incremental Reports for Environmental Data
+Author: [Your Name]
+Purpose: Keep per-period report statistics so a daily report only processes the new readings
+
+The cache holds one mergeable ReadingSummary per period (a day by
+default). On update, the periods before the last cached one are final and
+skipped; the last cached period, which may have been open, and every later
+period are rebuilt from their readings. The report is rendered from the
+merge of all periods. Logs and stores are assumed to be append-only.
+"""
+
+import os
+import json
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from streaming import ReadingSummary
+from storage import ReadingStore
+from timeindex import OffsetIndex
+from archive import ReadingArchive, is_archive
+from rollups import epoch_ms
+from report import render_report, report_document, write_report_json
+from instrumentation import traced
+
+PERIOD_MS = 86_400_000
+
+CACHE_VERSION = 1
+
+
+class ReportCache:
+    """Per-period summaries of one station's readings
+
+    axis names the time the periods are cut on: 'clock' (epoch milliseconds
+    of the datetime column) or 'elapsed' (stitched milliseconds since the
+    first boot, for CSV logs without a known start time).
+    """
+
+    def __init__(self, axis='clock', period_ms=PERIOD_MS):
+        self.axis = axis
+        self.period_ms = period_ms
+        self.periods = {}  # period start (ms) -> ReadingSummary
+
+    @property
+    def resume_ms(self):
+        """Start of the first period that still has to be (re)built"""
+        return max(self.periods) if self.periods else None
+
+    @traced('report_cache.update', rows=lambda self, data, *args, **kwargs: len(data))
+    def update(self, data, times_ms):
+        """Rebuild the periods from resume_ms on; returns the period starts rebuilt
+
+        Readings before resume_ms are skipped. Several stations of a store
+        are interleaved, so readings are put in time order first if needed.
+        """
+        times = np.asarray(times_ms, dtype=np.int64)
+        if (np.diff(times) < 0).any():
+            order = np.argsort(times, kind='stable')
+            times, data = times[order], data.iloc[order]
+        resume_ms = self.resume_ms
+        first = 0 if resume_ms is None else int(np.searchsorted(times, resume_ms, side='left'))
+        if first == len(times):
+            return []
+        times = times[first:]
+        data = data.iloc[first:]
+
+        starts = times // self.period_ms * self.period_ms
+        boundaries = np.flatnonzero(np.diff(starts, prepend=starts[0] - 1))
+        ends = np.append(boundaries[1:], len(starts))
+        rebuilt = []
+        for lo, hi in zip(boundaries, ends):
+            start_ms = int(starts[lo])
+            summary = ReadingSummary()
+            self.periods[start_ms] = summary.update(data.iloc[lo:hi], times[lo:hi])
+            rebuilt.append(start_ms)
+        return rebuilt
+
+    @traced('report_cache.update_from')
+    def update_from(self, source, station=None, start_time=None):
+        """Read only the readings from resume_ms on from a store, an archive or a CSV log
+
+        Returns the period starts rebuilt.
+        """
+        resume_ms = self.resume_ms
+        if os.path.isdir(source):
+            self._check_axis('clock')
+            start = None if resume_ms is None else pd.Timestamp(resume_ms, unit='ms')
+            data = ReadingStore(source).read(station=station, start=start)
+            return self.update(data, epoch_ms(data['datetime']))
+
+        # Archives and indexed logs read ranges of the stitched time axis the same way
+        if is_archive(source):
+            index = ReadingArchive(source)
+            start_time = index.start_time if start_time is None else start_time
+        else:
+            index = OffsetIndex.for_log(source)
+        # Clock periods of a log need its capture start to place the readings in time
+        if self.axis == 'clock' and start_time is None:
+            raise ValueError("a start time is needed to cut a CSV log into clock periods")
+        boot_ms = 0 if self.axis == 'elapsed' else int(epoch_ms([pd.Timestamp(start_time)])[0])
+        data, elapsed, _ = index.read(None if resume_ms is None else resume_ms - boot_ms)
+        return self.update(data, elapsed + boot_ms)
+
+    def _check_axis(self, axis):
+        if axis != self.axis:
+            raise ValueError(f"report cache periods are on the {self.axis} axis, not {axis}")
+
+    def summary(self):
+        """Summary of every period merged"""
+        merged = ReadingSummary()
+        for start_ms in sorted(self.periods):
+            merged.merge(self.periods[start_ms])
+        return merged
+
+    def period_summaries(self):
+        """(period start, ReadingSummary) pairs in time order"""
+        return sorted(self.periods.items())
+
+    def save(self, path):
+        state = {
+            'version': CACHE_VERSION,
+            'axis': self.axis,
+            'period_ms': self.period_ms,
+            'periods': {str(start_ms): summary.to_state() for start_ms, summary in self.periods.items()}
+        }
+        with open(path, 'w') as f:
+            json.dump(state, f)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            state = json.load(f)
+        if state.get('version') != CACHE_VERSION:
+            raise ValueError(f"unsupported report cache version in {path}")
+        cache = cls(state['axis'], state['period_ms'])
+        cache.periods = {int(start_ms): ReadingSummary.from_state(period)
+                         for start_ms, period in state['periods'].items()}
+        return cache
+
+    @classmethod
+    def open(cls, path, axis='clock', period_ms=PERIOD_MS):
+        """Saved cache, or an empty one if there is none yet"""
+        if path and os.path.exists(path):
+            cache = cls.load(path)
+            cache._check_axis(axis)
+            return cache
+        return cls(axis, period_ms)
+
+
+def update_report(source, cache_file, output_file="environmental_report.md", json_file=None,
+                  station=None, start_time=None):
+    """Bring a cached report up to date with the new readings and write it"""
+    # CSV logs are cut on the stitched axis unless their capture start is known
+    if start_time is None and is_archive(source):
+        start_time = ReadingArchive(source).start_time
+    axis = 'clock' if os.path.isdir(source) or start_time is not None else 'elapsed'
+    cache = ReportCache.open(cache_file, axis)
+    rebuilt = cache.update_from(source, station=station, start_time=start_time)
+    cache.save(cache_file)
+
+    summary = cache.summary()
+    with open(output_file, 'w') as f:
+        f.write(render_report(summary, station=station))
+    if json_file:
+        write_report_json(report_document(summary, cache.period_summaries(), station), json_file)
+    return cache, rebuilt
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Update a station report with the readings added since the last run")
+    parser.add_argument('source', help="CSV log or columnar store directory")
+    parser.add_argument('--cache', default="report_cache.json", help="per-period statistics kept between runs")
+    parser.add_argument('--output', default="environmental_report.md", help="markdown report")
+    parser.add_argument('--json', help="JSON report for dashboards")
+    parser.add_argument('--station', help="station to read from a store")
+    parser.add_argument('--start-time', help="capture start of a CSV log, to cut it into calendar days")
+    args = parser.parse_args()
+
+    cache, rebuilt = update_report(args.source, args.cache, args.output, args.json, args.station,
+                                   args.start_time)
+    print(f"Rebuilt {len(rebuilt)} of {len(cache.periods)} periods")
+    print(f"✓ Report saved: {args.output}")
+    if args.json:
+        print(f"✓ JSON report saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
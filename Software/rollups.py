@@ -0,0 +1,288 @@
+"""
+Rollup Pyramid for Environmental Data
+Author: [Your Name]
+Purpose: Pre-aggregated 1 s / 1 min / 1 h / 1 day tiers for overviews of long deployments
+
+Every tier row covers one bucket of time and keeps only mergeable values:
+counts, sums, sums of squares, minima and maxima, plus the number of
+readings in each state. Buckets are therefore built incrementally (a new
+batch is reduced and merged into the still-open last bucket) and each
+tier is reduced from the one below it, never from the raw readings again.
+"""
+
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from schema import has_echo, distance_values
+from timeaxis import TimeStitcher
+from transitions import STATES
+from instrumentation import traced
+
+# Tier name -> bucket width in milliseconds, finest first
+TIERS = {
+    '1s': 1_000,
+    '1min': 60_000,
+    '1h': 3_600_000,
+    '1day': 86_400_000
+}
+
+STATE_COLUMNS = [f'state_{state}' for state in STATES]
+
+SUM_COLUMNS = ['count', 'distance_count', 'distance_sum', 'distance_sumsq',
+               'reflectance_sum', 'reflectance_sumsq'] + STATE_COLUMNS
+MIN_COLUMNS = ['distance_min', 'reflectance_min']
+MAX_COLUMNS = ['distance_max', 'reflectance_max']
+COLUMNS = ['start_ms'] + SUM_COLUMNS + MIN_COLUMNS + MAX_COLUMNS
+
+
+def epoch_ms(datetimes):
+    """Milliseconds since 1970 of a datetime column, so tiers align with the clock"""
+    return np.asarray(datetimes, dtype='datetime64[ms]').astype(np.int64)
+
+
+def reading_partials(frame, times_ms):
+    """One single-reading partial per row, in the tier layout"""
+    valid = np.asarray(has_echo(frame['Distancia(cm)']))
+    distance = distance_values(frame['Distancia(cm)']).astype(np.int64)
+    reflectance = np.asarray(frame['Luminosidade(IR)'], dtype=np.int64)
+    valid_distance = np.where(valid, distance, 0)
+    partials = {
+        'start_ms': np.asarray(times_ms, dtype=np.int64),
+        'count': np.ones(len(frame), dtype=np.int64),
+        'distance_count': valid.astype(np.int64),
+        'distance_sum': valid_distance,
+        'distance_sumsq': valid_distance * valid_distance,
+        'reflectance_sum': reflectance,
+        'reflectance_sumsq': reflectance * reflectance,
+        'distance_min': np.where(valid, distance, np.nan),
+        'distance_max': np.where(valid, distance, np.nan),
+        'reflectance_min': reflectance.astype(np.float64),
+        'reflectance_max': reflectance.astype(np.float64)
+    }
+    codes = pd.Categorical(frame['Estado'], categories=STATES).codes
+    for code, column in enumerate(STATE_COLUMNS):
+        partials[column] = (codes == code).astype(np.int64)
+    return partials
+
+
+def reduce_partials(partials, width_ms):
+    """Merge partials (sorted by start_ms) into buckets of width_ms"""
+    buckets = partials['start_ms'] // width_ms * width_ms
+    if len(buckets) == 0:
+        return {column: values[:0] for column, values in partials.items()}
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    reduced = {'start_ms': buckets[starts]}
+    for column in SUM_COLUMNS:
+        reduced[column] = np.add.reduceat(partials[column], starts)
+    # NaN-aware: buckets without a valid distance keep NaN
+    for column in MIN_COLUMNS:
+        reduced[column] = np.fmin.reduceat(partials[column], starts)
+    for column in MAX_COLUMNS:
+        reduced[column] = np.fmax.reduceat(partials[column], starts)
+    return reduced
+
+
+def _merge_into_first(partials, bucket):
+    """Fold the open bucket of a tier into the first new bucket (same start)"""
+    for column in SUM_COLUMNS:
+        partials[column][0] += bucket[column]
+    for column in MIN_COLUMNS:
+        partials[column][0] = np.fmin(partials[column][0], bucket[column])
+    for column in MAX_COLUMNS:
+        partials[column][0] = np.fmax(partials[column][0], bucket[column])
+
+
+def with_statistics(tier):
+    """Add means, standard deviations and state shares to a tier frame"""
+    tier = tier.copy()
+    for name in ('distance', 'reflectance'):
+        n = tier['distance_count' if name == 'distance' else 'count'].astype(np.float64)
+        total = tier[f'{name}_sum']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            tier[f'{name}_mean'] = total / n
+            variance = (n * tier[f'{name}_sumsq'] - total * total) / (n * (n - 1))
+        tier[f'{name}_std'] = np.sqrt(variance.clip(lower=0))
+    for state, column in zip(STATES, STATE_COLUMNS):
+        tier[f'share_{state}'] = tier[column] / tier['count']
+    return tier
+
+
+class RollupTier:
+    """Closed buckets of one resolution plus the bucket still receiving readings"""
+
+    def __init__(self, name, width_ms):
+        self.name = name
+        self.width_ms = width_ms
+        self._closed = []
+        self._open = None
+        self._frame = None
+
+    def update(self, partials):
+        """Merge partials of finer buckets; returns this tier's new buckets as partials
+
+        The returned buckets hold only the new readings, so the next tier,
+        which already has the open bucket's earlier readings, can merge them.
+        """
+        new = reduce_partials(partials, self.width_ms)
+        n = len(new['start_ms'])
+        if n == 0:
+            return new
+        reduced = {column: values.copy() for column, values in new.items()}
+        if self._open is not None:
+            if self._open['start_ms'] == reduced['start_ms'][0]:
+                _merge_into_first(reduced, self._open)
+            elif self._open['start_ms'] > reduced['start_ms'][0]:
+                raise ValueError(f"{self.name} tier: readings must arrive in time order")
+            else:
+                self._closed.append(pd.DataFrame([self._open], columns=COLUMNS))
+
+        # Everything but the last bucket is final
+        if n > 1:
+            self._closed.append(pd.DataFrame({c: reduced[c][:-1] for c in COLUMNS}))
+        self._open = {c: reduced[c][-1] for c in COLUMNS}
+        self._frame = None
+        return new
+
+    def frame(self):
+        """All buckets, the open one last"""
+        if self._frame is None:
+            # Consolidate closed buckets so later reads only concatenate the new ones
+            if len(self._closed) > 1:
+                self._closed = [pd.concat(self._closed, ignore_index=True)]
+            parts = self._closed + ([pd.DataFrame([self._open], columns=COLUMNS)] if self._open else [])
+            self._frame = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=COLUMNS)
+        return self._frame
+
+    def __len__(self):
+        return len(self.frame())
+
+
+class RollupPyramid:
+    """Rollup tiers of one station, updated as readings arrive
+
+    Times are milliseconds on a never-decreasing axis: the stitched elapsed
+    time (the default) or epoch_ms(datetime) to align buckets with the clock.
+    """
+
+    def __init__(self, tiers=TIERS):
+        self.tiers = {name: RollupTier(name, width_ms) for name, width_ms in tiers.items()}
+        self._stitcher = TimeStitcher()
+
+    @traced('rollups.update', rows=lambda self, frame, *args, **kwargs: len(frame))
+    def update(self, frame, times_ms=None):
+        """Add readings; without times_ms the Tempo(ms) column is stitched here"""
+        if len(frame) == 0:
+            return self
+        if times_ms is None:
+            times_ms = self._stitcher.stitch(frame['Tempo(ms)'].values)
+        partials = reading_partials(frame, times_ms)
+        # Each tier is reduced from the new buckets of the tier below
+        for tier in self.tiers.values():
+            partials = tier.update(partials)
+        return self
+
+    def tier(self, name, start_ms=None, end_ms=None, statistics=True):
+        """Buckets of one tier overlapping [start_ms, end_ms)"""
+        tier = self.tiers[name]
+        frame = tier.frame()
+        starts = frame['start_ms'].values
+        first = 0 if start_ms is None else np.searchsorted(starts, start_ms - tier.width_ms, side='right')
+        last = len(frame) if end_ms is None else np.searchsorted(starts, end_ms, side='left')
+        frame = frame.iloc[first:last]
+        return with_statistics(frame) if statistics else frame
+
+    def select(self, start_ms, end_ms, points):
+        """Coarsest tier with at least `points` buckets over the range (None: use raw readings)"""
+        target_ms = (end_ms - start_ms) / max(points, 1)
+        chosen = None
+        for name, tier in self.tiers.items():
+            if tier.width_ms <= target_ms:
+                chosen = name
+        return chosen
+
+    def query(self, start_ms=None, end_ms=None, points=1000):
+        """(tier name, buckets) at the resolution a chart of `points` buckets needs"""
+        finest = self.tiers[next(iter(self.tiers))].frame()
+        if len(finest) == 0:
+            return None, None
+        start = finest['start_ms'].iloc[0] if start_ms is None else start_ms
+        end = finest['start_ms'].iloc[-1] + 1 if end_ms is None else end_ms
+        name = self.select(start, end, points)
+        if name is None:
+            return None, None
+        return name, self.tier(name, start_ms, end_ms)
+
+    def envelope(self, column, start_ms=None, end_ms=None, points=1000):
+        """(seconds, values) tracing the min and max of every bucket, like minmax downsampling
+
+        Returns None when no tier is coarse enough for the requested points.
+        """
+        name, buckets = self.query(start_ms, end_ms, points)
+        if name is None:
+            return None
+        seconds = np.repeat(buckets['start_ms'].values / 1000, 2)
+        values = np.column_stack([buckets[f'{column}_min'].values,
+                                  buckets[f'{column}_max'].values]).ravel()
+        return seconds, values
+
+    def save(self, directory):
+        """Write every tier as <directory>/<tier>.parquet"""
+        os.makedirs(directory, exist_ok=True)
+        for name, tier in self.tiers.items():
+            tier.frame().to_parquet(os.path.join(directory, f'{name}.parquet'), index=False)
+        return directory
+
+    @classmethod
+    def load(cls, directory):
+        """Reopen saved tiers; later updates continue the open buckets"""
+        pyramid = cls()
+        for name, tier in pyramid.tiers.items():
+            path = os.path.join(directory, f'{name}.parquet')
+            if not os.path.exists(path):
+                continue
+            frame = pd.read_parquet(path)
+            if len(frame) > 0:
+                tier._closed = [frame.iloc[:-1]]
+                tier._open = {column: frame[column].values[-1] for column in COLUMNS}
+        return pyramid
+
+
+def build(source, chunksize=500_000, station=None):
+    """Pyramid for a CSV log or a store, aligned with the clock when datetimes are known"""
+    from streaming import iter_chunks
+
+    pyramid = RollupPyramid()
+    for chunk in iter_chunks(source, chunksize, station=station):
+        times_ms = epoch_ms(chunk['datetime']) if 'datetime' in chunk.columns else None
+        pyramid.update(chunk, times_ms)
+    return pyramid
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Build or inspect rollup tiers of station readings")
+    parser.add_argument('source', help="CSV log, columnar store, or a saved rollup directory with --show")
+    parser.add_argument('--output', help="directory to save the tiers in")
+    parser.add_argument('--station', help="station to read from a store")
+    parser.add_argument('--show', choices=list(TIERS), help="print one tier of a saved rollup directory")
+    args = parser.parse_args()
+
+    if args.show:
+        tier = RollupPyramid.load(args.source).tier(args.show)
+        print(tier[['start_ms', 'count', 'distance_mean', 'distance_min', 'distance_max',
+                    'reflectance_mean'] + [f'share_{state}' for state in STATES]].to_string())
+        return
+
+    pyramid = build(args.source, station=args.station)
+    for name, tier in pyramid.tiers.items():
+        print(f"  {name:>5}: {len(tier)} buckets")
+    if args.output:
+        pyramid.save(args.output)
+        print(f"✓ Rollups saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Reading Schema for Environmental Data
+Author: [Your Name]
+Purpose: Compact, validated column types for station readings
+"""
+
+import numpy as np
+import pandas as pd
+
+from transitions import STATES
+
+# Columns written by the Arduino sketch (see Hardware/environmental-system.ino)
+CSV_COLUMNS = ['Tempo(ms)', 'Distancia(cm)', 'Luminosidade(IR)', 'Estado']
+
+# The sketch reports 999 when the ultrasonic echo is missing or out of range
+DISTANCE_SENTINEL = 999
+
+# analogRead() returns a 10-bit value
+IR_MAX = 1023
+
+# millis() is an unsigned 32-bit counter
+MILLIS_MAX = 2**32 - 1
+
+STATE_DTYPE = pd.CategoricalDtype(STATES)
+
+# About 14 bytes per reading instead of ~40-90 with int64 columns and strings.
+# A missing distance (<NA>) is a reading without an echo.
+READING_DTYPES = {
+    'Tempo(ms)': 'int64',
+    'Distancia(cm)': 'Int16',
+    'Luminosidade(IR)': 'uint16',
+    'Estado': STATE_DTYPE
+}
+
+# Parser hints: the state column is dictionary-encoded while it is read
+READ_DTYPES = {'Estado': 'category'}
+
+
+def _numeric(column):
+    if column.dtype.kind in 'iu':
+        return column
+    return pd.to_numeric(column, errors='coerce')
+
+
+def validate(frame):
+    """Cast readings to the schema, dropping rows the sketch could not have printed
+
+    Returns (frame, invalid) where invalid counts the rejected rows per
+    column (a row can fail on several) and in total under 'rows'. Distances
+    of 999 become <NA>; the sketch never prints other distances outside
+    1-300 cm, but values up to 998 are accepted.
+    """
+    tempo = _numeric(frame['Tempo(ms)'])
+    distance = frame['Distancia(cm)']
+    if isinstance(distance.array, pd.arrays.IntegerArray):
+        # Already in the schema (<NA> for no echo): validating again is a no-op
+        distance = pd.Series(distance_values(distance), index=distance.index)
+    distance = _numeric(distance)
+    reflectance = _numeric(frame['Luminosidade(IR)'])
+    state = frame['Estado']
+
+    bad = {
+        'Tempo(ms)': ~(tempo.between(0, MILLIS_MAX) & (tempo % 1 == 0)).values,
+        'Distancia(cm)': ~(distance.between(1, DISTANCE_SENTINEL) & (distance % 1 == 0)).values,
+        'Luminosidade(IR)': ~(reflectance.between(0, IR_MAX) & (reflectance % 1 == 0)).values,
+        'Estado': ~state.isin(STATES).values
+    }
+    rejected = np.logical_or.reduce(list(bad.values()))
+    invalid = {column: int(mask.sum()) for column, mask in bad.items()}
+    invalid['rows'] = int(rejected.sum())
+
+    keep = ~rejected
+    typed = frame[keep].reset_index(drop=True) if invalid['rows'] else frame.copy()
+    typed['Tempo(ms)'] = tempo.values[keep].astype(np.int64)
+    no_echo = distance.values[keep] == DISTANCE_SENTINEL
+    typed['Distancia(cm)'] = pd.arrays.IntegerArray(distance.values[keep].astype(np.int16), no_echo)
+    typed['Luminosidade(IR)'] = reflectance.values[keep].astype(np.uint16)
+    kept_state = state.values[keep]
+    if isinstance(kept_state, pd.Categorical):
+        typed['Estado'] = kept_state.set_categories(STATES)
+    else:
+        typed['Estado'] = pd.Categorical(kept_state, dtype=STATE_DTYPE)
+    typed.attrs['invalid'] = invalid
+    return typed, invalid
+
+
+def coerce(frame):
+    """Cast already-validated columns (e.g. from the store) to the schema, where present
+
+    Distances stored with the 999 sentinel become <NA>.
+    """
+    frame = frame.copy()
+    for column, dtype in READING_DTYPES.items():
+        if column not in frame.columns:
+            continue
+        values = frame[column]
+        if column == 'Distancia(cm)' and not isinstance(values.array, pd.arrays.IntegerArray):
+            values = values.to_numpy()
+            frame[column] = pd.arrays.IntegerArray(values.astype(np.int16), values == DISTANCE_SENTINEL)
+        elif values.dtype != dtype:
+            frame[column] = values.astype(dtype)
+    return frame
+
+
+def read_readings(filename, chunksize=None):
+    """Read a CSV log into the schema (a generator of chunks when chunksize is given)
+
+    The counts of rejected rows are kept in frame.attrs['invalid'].
+    """
+    if chunksize is None:
+        return validate(pd.read_csv(filename, dtype=READ_DTYPES))[0]
+    return (validate(chunk)[0] for chunk in pd.read_csv(filename, dtype=READ_DTYPES, chunksize=chunksize))
+
+
+def has_echo(distance):
+    """Boolean array: True where the distance is a real measurement
+
+    Works on schema columns (<NA> for no echo) and raw ones (999).
+    """
+    if isinstance(distance, pd.Series):
+        distance = distance.array
+    if isinstance(distance, pd.arrays.IntegerArray):
+        return ~distance.isna()
+    distance = np.asarray(distance)
+    return distance < DISTANCE_SENTINEL
+
+
+def distance_values(distance, no_echo=DISTANCE_SENTINEL):
+    """Plain integer array with no-echo readings written as the sketch's sentinel"""
+    if isinstance(distance, pd.Series):
+        distance = distance.array
+    if isinstance(distance, pd.arrays.IntegerArray):
+        return distance.to_numpy(dtype=distance.dtype.numpy_dtype, na_value=no_echo)
+    return np.asarray(distance)
+
+
+def distance_float(distance):
+    """Float array with NaN for no-echo readings, for plotting and downsampling"""
+    if isinstance(distance, pd.Series):
+        distance = distance.array
+    if isinstance(distance, pd.arrays.IntegerArray):
+        return distance.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.asarray(distance, dtype=np.float64)
+
+
+def missing_cells(frame):
+    """Missing values, not counting distances that are missing because there was no echo"""
+    nulls = frame.isnull().sum()
+    if 'Distancia(cm)' in frame.columns and isinstance(frame['Distancia(cm)'].array, pd.arrays.IntegerArray):
+        nulls = nulls.drop('Distancia(cm)')
+    return int(nulls.sum())
+
+
+def memory_per_row(frame):
+    """Bytes per reading held by the frame, including string payloads"""
+    return frame.memory_usage(deep=True, index=False).sum() / max(len(frame), 1)
@@ -0,0 +1,192 @@
+"""
+Columnar Storage for Environmental Data
+Author: [Your Name]
+Purpose: Store station readings as Parquet partitioned by station and day
+"""
+
+import os
+import time
+import uuid
+import argparse
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from timeaxis import TimeStitcher, anchor_elapsed
+from timeindex import OffsetIndex
+from schema import CSV_COLUMNS, read_readings, coerce
+
+# Columns that are always read so every frame keeps its time axis
+TIME_COLUMNS = ['Tempo(ms)', 'datetime']
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('station', pa.string()), ('date', pa.string())]),
+    flavor='hive'
+)
+
+
+class ReadingStore:
+    """Parquet dataset of station readings, partitioned as station=<id>/date=<YYYY-MM-DD>"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _dataset(self):
+        return ds.dataset(self.root, format='parquet', partitioning=PARTITIONING)
+
+    def write(self, data, station):
+        """Append a frame with a 'datetime' column to the store"""
+        if 'datetime' not in data.columns:
+            raise ValueError("Readings need a 'datetime' column before they can be stored")
+
+        frame = data[[c for c in CSV_COLUMNS + ['datetime'] if c in data.columns]].copy()
+        frame['station'] = station
+        frame['date'] = frame['datetime'].dt.strftime('%Y-%m-%d')
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        ds.write_dataset(
+            table, self.root,
+            format='parquet',
+            partitioning=PARTITIONING,
+            # Time-ordered names keep appended parts in write order within a day
+            basename_template=f'part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore'
+        )
+        return len(frame)
+
+    def stations(self):
+        """List stations present in the store"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name.split('=', 1)[1] for name in os.listdir(self.root)
+                      if name.startswith('station='))
+
+    def only_station(self, station=None):
+        """The station to read: the given one, or the store's only station
+
+        Stations have unrelated millis() clocks and overlapping datetimes, so
+        their readings are never merged into one time axis.
+        """
+        if station is not None:
+            return station
+        stations = self.stations()
+        if len(stations) > 1:
+            raise ValueError(f"{self.root} holds {len(stations)} stations ({', '.join(stations)}); "
+                             f"choose one with --station")
+        return stations[0] if stations else None
+
+    def dates(self, station):
+        """List day partitions stored for one station"""
+        station_dir = os.path.join(self.root, f'station={station}')
+        if not os.path.isdir(station_dir):
+            return []
+        return sorted(name.split('=', 1)[1] for name in os.listdir(station_dir)
+                      if name.startswith('date='))
+
+    def read(self, station=None, start=None, end=None, columns=None):
+        """Read one station's readings, touching only the requested columns and day partitions
+
+        start is inclusive and end is exclusive; both accept anything
+        pd.Timestamp understands. Only partitions overlapping the range are opened.
+        station may be left out only when the store holds a single station.
+        """
+        station = self.only_station(station)
+        dataset = self._dataset()
+
+        expression = None
+        conditions = []
+        if station is not None:
+            conditions.append(ds.field('station') == station)
+        if start is not None:
+            start = pd.Timestamp(start)
+            conditions.append(ds.field('date') >= start.strftime('%Y-%m-%d'))
+            conditions.append(ds.field('datetime') >= pa.scalar(start.to_pydatetime(), pa.timestamp('us')))
+        if end is not None:
+            end = pd.Timestamp(end)
+            conditions.append(ds.field('date') <= end.strftime('%Y-%m-%d'))
+            conditions.append(ds.field('datetime') < pa.scalar(end.to_pydatetime(), pa.timestamp('us')))
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        if columns is not None:
+            columns = TIME_COLUMNS + [c for c in columns if c not in TIME_COLUMNS]
+
+        table = dataset.to_table(columns=columns, filter=expression)
+        if table.num_rows > 1:
+            table = table.sort_by('datetime')
+        return coerce(table.to_pandas())
+
+    def iter_chunks(self, station=None, start=None, end=None, columns=None, batch_size=100_000):
+        """Yield one station's readings in time order, one record batch at a time
+
+        As for read(), station may be left out only when the store holds a single station.
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        if columns is not None:
+            columns = TIME_COLUMNS + [c for c in columns if c not in TIME_COLUMNS]
+
+        station = self.only_station(station)
+        if station is None:
+            return
+        for date in self.dates(station):
+            if start is not None and date < start.strftime('%Y-%m-%d'):
+                continue
+            if end is not None and date > end.strftime('%Y-%m-%d'):
+                continue
+            partition = os.path.join(self.root, f'station={station}', f'date={date}')
+            for part in sorted(os.listdir(partition)):
+                parquet = pq.ParquetFile(os.path.join(partition, part))
+                for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+                    chunk = coerce(batch.to_pandas())
+                    if start is not None:
+                        chunk = chunk[chunk['datetime'] >= start]
+                    if end is not None:
+                        chunk = chunk[chunk['datetime'] < end]
+                    if len(chunk) > 0:
+                        yield chunk
+
+
+def convert_csv(csv_file, root, station, start_time=None, chunksize=500_000):
+    """Convert an Arduino CSV log into the partitioned store, chunk by chunk"""
+    # Anchored like the analyzer: the last reading, on the stitched axis, at the file's modification time
+    if start_time is None:
+        start_time = OffsetIndex.for_log(csv_file).capture_start()
+    start_time = pd.Timestamp(start_time)
+
+    store = ReadingStore(root)
+    stitcher = TimeStitcher()
+    total = 0
+    rejected = 0
+    for chunk in read_readings(csv_file, chunksize=chunksize):
+        rejected += chunk.attrs['invalid']['rows']
+        elapsed = stitcher.stitch(chunk['Tempo(ms)'].values)
+        chunk['datetime'] = anchor_elapsed(elapsed, start_time=start_time).values
+        total += store.write(chunk, station)
+
+    print(f"✓ Converted {total} records from {csv_file} into {root} (station {station})")
+    if rejected:
+        print(f"  Rejected {rejected} invalid rows")
+    if stitcher.breaks:
+        print(f"  Stitched {len(stitcher.breaks)} board resets/millis() wraparounds")
+    return store
+
+
+def main():
+    """Command-line converter from Arduino CSV logs to the columnar store"""
+    parser = argparse.ArgumentParser(description='Convert Arduino CSV logs to a partitioned Parquet store')
+    parser.add_argument('csv_file', help='CSV log captured from the station')
+    parser.add_argument('store', help='Root directory of the Parquet store')
+    parser.add_argument('--station', required=True, help='Station identifier, e.g. EMS-MZ-001')
+    parser.add_argument('--start', default=None,
+                        help='Capture start time (default: estimated from the file modification time)')
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    args = parser.parse_args()
+
+    convert_csv(args.csv_file, args.store, args.station, args.start, args.chunksize)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""
+Streaming Analysis for Environmental Data
+Author: [Your Name]
+Purpose: Summarize arbitrarily long station logs in one pass with bounded memory
+"""
+
+import os
+
+import numpy as np
+
+from storage import ReadingStore
+from archive import ReadingArchive, is_archive
+from timeaxis import TimeStitcher
+from transitions import StateRunAccumulator
+from schema import (DISTANCE_SENTINEL, IR_MAX, read_readings, has_echo, distance_values,
+                    missing_cells)
+
+DISTANCE_BINS = [0, 10, 30, 100, 300]
+DISTANCE_LABELS = ['Very Close (<10cm)', 'Ideal (10-30cm)', 'Moderate (30-100cm)', 'Far (>100cm)']
+
+REFLECTANCE_BINS = [0, 300, 600, 900, 1023]
+REFLECTANCE_LABELS = ['Low (0-300)', 'Medium (300-600)', 'High (600-900)', 'Very High (900-1023)']
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+class RunningMoments:
+    """Mean and variance accumulated with Welford's algorithm, mergeable across chunks"""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        batch_mean = values.mean()
+        batch_m2 = np.square(values - batch_mean).sum()
+        self._combine(len(values), batch_mean, batch_m2)
+
+    def merge(self, other):
+        if other.n:
+            self._combine(other.n, other.mean, other.m2)
+        return self
+
+    def _combine(self, n, mean, m2):
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    def to_state(self):
+        return {'n': int(self.n), 'mean': float(self.mean), 'm2': float(self.m2)}
+
+    @classmethod
+    def from_state(cls, state):
+        moments = cls()
+        moments.n, moments.mean, moments.m2 = state['n'], state['mean'], state['m2']
+        return moments
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+
+class CoMoments:
+    """Paired means, variances and co-moment for a streaming Pearson correlation"""
+
+    def __init__(self):
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+        self.c_xy = 0.0
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if len(x) == 0:
+            return
+        mx, my = x.mean(), y.mean()
+        dx, dy = x - mx, y - my
+        self._combine(len(x), mx, my, np.dot(dx, dx), np.dot(dy, dy), np.dot(dx, dy))
+
+    def merge(self, other):
+        if other.n:
+            self._combine(other.n, other.mean_x, other.mean_y, other.m2_x, other.m2_y, other.c_xy)
+        return self
+
+    def _combine(self, n, mean_x, mean_y, m2_x, m2_y, c_xy):
+        total = self.n + n
+        dx = mean_x - self.mean_x
+        dy = mean_y - self.mean_y
+        weight = self.n * n / total
+        self.m2_x += m2_x + dx * dx * weight
+        self.m2_y += m2_y + dy * dy * weight
+        self.c_xy += c_xy + dx * dy * weight
+        self.mean_x += dx * n / total
+        self.mean_y += dy * n / total
+        self.n = total
+
+    def to_state(self):
+        state = {name: float(getattr(self, name)) for name in ('mean_x', 'mean_y', 'm2_x', 'm2_y', 'c_xy')}
+        state['n'] = int(self.n)
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        moments = cls()
+        for name, value in state.items():
+            setattr(moments, name, value)
+        return moments
+
+    @property
+    def correlation(self):
+        if self.n < 2 or self.m2_x == 0 or self.m2_y == 0:
+            return np.nan
+        return self.c_xy / np.sqrt(self.m2_x * self.m2_y)
+
+
+class IntegerHistogram:
+    """Exact counts of small non-negative integers; medians and bins come from the counts"""
+
+    def __init__(self, size):
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.out_of_range = 0
+
+    def update(self, values):
+        values = np.asarray(values)
+        if len(values) == 0:
+            return
+        in_range = (values >= 0) & (values < len(self.counts))
+        self.out_of_range += int(len(values) - in_range.sum())
+        self.counts += np.bincount(values[in_range].astype(np.int64), minlength=len(self.counts))
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.out_of_range += other.out_of_range
+        return self
+
+    def to_state(self):
+        """Counts as (value, count) pairs of the values seen, which are few"""
+        values = np.flatnonzero(self.counts)
+        return {'size': len(self.counts), 'values': values.tolist(),
+                'counts': self.counts[values].tolist(), 'out_of_range': int(self.out_of_range)}
+
+    @classmethod
+    def from_state(cls, state):
+        histogram = cls(state['size'])
+        histogram.counts[state['values']] = state['counts']
+        histogram.out_of_range = state['out_of_range']
+        return histogram
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    @property
+    def min(self):
+        nonzero = np.flatnonzero(self.counts)
+        return int(nonzero[0]) if len(nonzero) else np.nan
+
+    @property
+    def max(self):
+        nonzero = np.flatnonzero(self.counts)
+        return int(nonzero[-1]) if len(nonzero) else np.nan
+
+    def value_at(self, rank):
+        """Value at a 0-based position in sorted order"""
+        return int(np.searchsorted(np.cumsum(self.counts), rank, side='right'))
+
+    def median(self):
+        n = self.total
+        if n == 0:
+            return np.nan
+        return (self.value_at((n - 1) // 2) + self.value_at(n // 2)) / 2
+
+    def count_between(self, low, high, include_low=False):
+        """Count values in (low, high], or [low, high] when include_low is set"""
+        start = max(int(np.floor(low)) + (0 if include_low else 1), 0)
+        stop = min(int(np.floor(high)) + 1, len(self.counts))
+        return int(self.counts[start:stop].sum()) if stop > start else 0
+
+    def categorize(self, bins, labels):
+        """Category counts with pd.cut(include_lowest=True) semantics, largest first"""
+        counts = [(label, self.count_between(bins[i], bins[i + 1], include_low=(i == 0)))
+                  for i, label in enumerate(labels)]
+        return sorted(counts, key=lambda item: -item[1])
+
+
+class ReadingSummary:
+    """Mergeable one-pass summary of station readings"""
+
+    def __init__(self):
+        self.rows = 0
+        self.null_cells = 0
+        self.first_ms = None
+        self.last_ms = None
+        self.distance_raw_max = np.nan
+        self.distance = IntegerHistogram(DISTANCE_SENTINEL)
+        self.distance_moments = RunningMoments()
+        self.reflectance = IntegerHistogram(IR_MAX + 1)
+        self.reflectance_moments = RunningMoments()
+        self.correlation = CoMoments()
+        self.states = {}
+        self.runs = StateRunAccumulator()
+        self._stitcher = TimeStitcher()
+
+    @classmethod
+    def from_frame(cls, data):
+        summary = cls()
+        summary.update(data)
+        return summary
+
+    def update(self, chunk, times_ms=None):
+        """Fold one chunk of readings into the summary
+
+        times_ms overrides the time of each reading (otherwise the datetime
+        column, or Tempo(ms) stitched across chunks).
+        """
+        self.rows += len(chunk)
+        self.null_cells += missing_cells(chunk)
+        if len(chunk) == 0:
+            return self
+
+        if times_ms is not None:
+            elapsed = np.asarray(times_ms, dtype=np.int64)
+        elif 'datetime' in chunk.columns:
+            elapsed = chunk['datetime'].values.astype('datetime64[ms]').astype(np.int64)
+        else:
+            elapsed = self._stitcher.stitch(chunk['Tempo(ms)'].values)
+        first, last = int(elapsed.min()), int(elapsed.max())
+        self.first_ms = first if self.first_ms is None else min(self.first_ms, first)
+        self.last_ms = last if self.last_ms is None else max(self.last_ms, last)
+
+        if 'Distancia(cm)' in chunk.columns:
+            # No-echo readings count as 999 in the raw range, as the sketch prints them
+            distance = distance_values(chunk['Distancia(cm)'])
+            self.distance_raw_max = np.nanmax([self.distance_raw_max, distance.max()])
+            valid = has_echo(chunk['Distancia(cm)'])
+            self.distance.update(distance[valid])
+            self.distance_moments.update(distance[valid])
+
+            if 'Luminosidade(IR)' in chunk.columns:
+                self.correlation.update(distance[valid], chunk['Luminosidade(IR)'].values[valid])
+
+        if 'Luminosidade(IR)' in chunk.columns:
+            reflectance = chunk['Luminosidade(IR)'].values
+            self.reflectance.update(reflectance)
+            self.reflectance_moments.update(reflectance)
+
+        if 'Estado' in chunk.columns:
+            for state, count in chunk['Estado'].value_counts(sort=False).items():
+                if count:
+                    self.states[state] = self.states.get(state, 0) + int(count)
+            self.runs.update(chunk['Estado'].values, elapsed)
+        return self
+
+    def merge(self, other):
+        """Combine with a summary of a disjoint set of readings"""
+        self.rows += other.rows
+        self.null_cells += other.null_cells
+        if other.first_ms is not None:
+            self.first_ms = other.first_ms if self.first_ms is None else min(self.first_ms, other.first_ms)
+            self.last_ms = other.last_ms if self.last_ms is None else max(self.last_ms, other.last_ms)
+        self.distance_raw_max = np.nanmax([self.distance_raw_max, other.distance_raw_max])
+        self.distance.merge(other.distance)
+        self.distance_moments.merge(other.distance_moments)
+        self.reflectance.merge(other.reflectance)
+        self.reflectance_moments.merge(other.reflectance_moments)
+        self.correlation.merge(other.correlation)
+        for state, count in other.states.items():
+            self.states[state] = self.states.get(state, 0) + count
+        self.runs.merge(other.runs)
+        return self
+
+    def to_state(self):
+        """JSON-ready statistics; the state-run accumulator is not kept"""
+        return {
+            'rows': int(self.rows),
+            'null_cells': int(self.null_cells),
+            'first_ms': self.first_ms,
+            'last_ms': self.last_ms,
+            'distance_raw_max': None if np.isnan(self.distance_raw_max) else float(self.distance_raw_max),
+            'distance': self.distance.to_state(),
+            'distance_moments': self.distance_moments.to_state(),
+            'reflectance': self.reflectance.to_state(),
+            'reflectance_moments': self.reflectance_moments.to_state(),
+            'correlation': self.correlation.to_state(),
+            'states': {str(state): int(count) for state, count in self.states.items()}
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        summary = cls()
+        summary.rows, summary.null_cells = state['rows'], state['null_cells']
+        summary.first_ms, summary.last_ms = state['first_ms'], state['last_ms']
+        raw_max = state['distance_raw_max']
+        summary.distance_raw_max = np.nan if raw_max is None else raw_max
+        summary.distance = IntegerHistogram.from_state(state['distance'])
+        summary.distance_moments = RunningMoments.from_state(state['distance_moments'])
+        summary.reflectance = IntegerHistogram.from_state(state['reflectance'])
+        summary.reflectance_moments = RunningMoments.from_state(state['reflectance_moments'])
+        summary.correlation = CoMoments.from_state(state['correlation'])
+        summary.states = dict(state['states'])
+        return summary
+
+    @property
+    def duration_ms(self):
+        if self.first_ms is None:
+            return 0
+        return self.last_ms - self.first_ms
+
+    @property
+    def valid_distances(self):
+        return self.distance.total
+
+    def state_counts(self):
+        """State counts, most frequent first"""
+        return sorted(self.states.items(), key=lambda item: -item[1])
+
+    def distance_stats(self):
+        return {
+            'Mean': self.distance_moments.mean,
+            'Median': self.distance.median(),
+            'Std Dev': self.distance_moments.std,
+            'Min': self.distance.min,
+            'Max': self.distance.max,
+            'Range': self.distance.max - self.distance.min
+        }
+
+    def reflectance_stats(self):
+        return {
+            'Mean': self.reflectance_moments.mean,
+            'Median': self.reflectance.median(),
+            'Std Dev': self.reflectance_moments.std,
+            'Min': self.reflectance.min,
+            'Max': self.reflectance.max
+        }
+
+    def distance_categories(self):
+        return self.distance.categorize(DISTANCE_BINS, DISTANCE_LABELS)
+
+    def reflectance_categories(self):
+        return self.reflectance.categorize(REFLECTANCE_BINS, REFLECTANCE_LABELS)
+
+
+def iter_chunks(source, chunksize=DEFAULT_CHUNKSIZE, station=None, start=None, end=None):
+    """Yield readings in fixed-size chunks from a CSV log, a columnar store or a reading archive"""
+    if os.path.isdir(source):
+        yield from ReadingStore(source).iter_chunks(station=station, start=start, end=end,
+                                                    batch_size=chunksize)
+    elif is_archive(source):
+        archive = ReadingArchive(source)
+        for first in range(0, len(archive), chunksize):
+            yield archive.frame(first, first + chunksize)
+    else:
+        yield from read_readings(source, chunksize=chunksize)
+
+
+def stream_summary(source, chunksize=DEFAULT_CHUNKSIZE, station=None, start=None, end=None):
+    """Summarize a log in one pass, holding at most one chunk in memory"""
+    summary = ReadingSummary()
+    for chunk in iter_chunks(source, chunksize, station=station, start=start, end=end):
+        summary.update(chunk)
+    return summary
@@ -0,0 +1,142 @@
+"""
+Synthetic Station Data for Environmental Monitoring
+Author: [Your Name]
+Purpose: Generate realistic sketch output at any scale for testing and benchmarks
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from schema import CSV_COLUMNS, DISTANCE_SENTINEL, IR_MAX
+from timeaxis import SAMPLE_INTERVAL_MS
+
+# Sketch behaviour (Hardware/environmental-system.ino)
+MAX_RANGE_CM = 300          # farther readings are reported as 999
+LOOP_OVERHEAD_MS = 30       # sensor reads and serial output on top of delay(500)
+ECHO_TIMEOUT_MS = 1000      # pulseIn() waits this long when no echo comes back
+ALERT_CM = 10
+DETECT_CM = 30
+
+
+def sketch_state(distance):
+    """State labels exactly as the sketch prints them"""
+    distance = np.asarray(distance)
+    return np.where(distance < ALERT_CM, 'ALERTA_PROXIMO',
+                    np.where(distance < DETECT_CM, 'OBJETO_DETECTADO', 'NORMAL'))
+
+
+def _segments(rng, n, mean_length):
+    """Segment id of every row, with geometrically distributed segment lengths"""
+    starts = rng.random(n) < 1 / mean_length
+    starts[0] = True
+    return np.cumsum(starts) - 1
+
+
+def generate(rows, seed=0, object_share=0.4, mean_scene_s=120, noise_cm=1.5,
+             dropout_rate=0.02, mean_dropout=4, resets=0, start_ms=0):
+    """Readings as the sketch would print them, fully vectorized
+
+    The scene alternates between empty stretches (nothing within range) and
+    objects that drift slowly at 2-80 cm. Measurement noise makes the
+    state flip around the 10 and 30 cm thresholds. Short runs of 999 mimic
+    lost echoes; those loops also take a second longer because pulseIn()
+    times out. resets restarts millis() at random rows, and start_ms lets
+    a session begin close to the 2^32 millis() wraparound.
+    """
+    rng = np.random.default_rng(seed)
+    n = int(rows)
+
+    # Scene: which segments hold an object, at what base distance
+    samples_per_scene = mean_scene_s * 1000 / SAMPLE_INTERVAL_MS
+    segment = _segments(rng, n, samples_per_scene)
+    n_segments = segment[-1] + 1
+    has_object = rng.random(n_segments) < object_share
+    base = rng.uniform(2, 80, n_segments)
+
+    # Slow drift within each segment: a random walk restarted at every segment
+    steps = rng.normal(0, 0.3, n)
+    walk = np.cumsum(steps)
+    first = np.flatnonzero(np.diff(segment, prepend=-1))
+    walk -= np.repeat(walk[first], np.diff(np.append(first, n)))
+
+    true_distance = np.where(has_object[segment], base[segment] + walk,
+                             rng.uniform(MAX_RANGE_CM - 50, MAX_RANGE_CM + 100, n))
+    measured = true_distance + rng.normal(0, noise_cm, n)
+
+    # int distancia = duracao * 0.034 / 2 truncates; out of range becomes 999
+    distance = np.trunc(measured).astype(np.int64)
+    distance[(distance > MAX_RANGE_CM) | (distance <= 0)] = DISTANCE_SENTINEL
+
+    # Lost echoes in short bursts
+    dropout_start = rng.random(n) < dropout_rate / mean_dropout
+    lengths = rng.geometric(1 / mean_dropout, dropout_start.sum())
+    coverage = np.zeros(n + 1, dtype=np.int64)
+    starts = np.flatnonzero(dropout_start)
+    np.add.at(coverage, starts, 1)
+    np.add.at(coverage, np.minimum(starts + lengths, n), -1)
+    distance[np.cumsum(coverage[:-1]) > 0] = DISTANCE_SENTINEL
+
+    # IR reflectance: brighter for near objects, with slowly varying ambient light
+    near = np.where(distance < DISTANCE_SENTINEL, distance, MAX_RANGE_CM)
+    ambient = lfilter([0.02], [1, -0.98], rng.normal(0, 40, n))
+    reflectance = 300 + 600 * np.exp(-near / 40) + ambient + rng.normal(0, 8, n)
+    reflectance = np.clip(np.rint(reflectance), 0, IR_MAX).astype(np.int64)
+
+    # millis(): loop time per reading, longer when pulseIn() timed out
+    interval = SAMPLE_INTERVAL_MS + LOOP_OVERHEAD_MS + rng.integers(0, 5, n)
+    interval[distance == DISTANCE_SENTINEL] += ECHO_TIMEOUT_MS
+    elapsed = np.concatenate([[0], np.cumsum(interval[:-1])])
+
+    session_starts = np.sort(rng.choice(np.arange(1, n), size=min(resets, n - 1), replace=False)) if n > 1 else []
+    for row in session_starts:
+        elapsed[row:] -= elapsed[row] - rng.integers(0, 50)
+    tempo = (elapsed + start_ms) % 2**32
+
+    data = pd.DataFrame({
+        'Tempo(ms)': tempo,
+        'Distancia(cm)': distance,
+        'Luminosidade(IR)': reflectance,
+        'Estado': sketch_state(distance)
+    })
+    data.attrs['resets'] = [int(row) for row in session_starts]
+    return data
+
+
+def write_capture(data, filename, boot_headers=False):
+    """Write readings as a serial capture; the header is printed again after every reset"""
+    if not boot_headers:
+        data.to_csv(filename, index=False)
+        return filename
+
+    boots = data.attrs.get('resets', [])
+    with open(filename, 'w', newline='') as f:
+        for chunk in np.split(np.arange(len(data)), boots):
+            f.write(','.join(CSV_COLUMNS) + '\n')
+            f.write(data.iloc[chunk].to_csv(header=False, index=False))
+    return filename
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Generate synthetic station readings")
+    parser.add_argument('output', help="CSV file to write")
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--resets', type=int, default=0, help="board resets to include")
+    parser.add_argument('--dropout-rate', type=float, default=0.02, help="share of readings lost to 999")
+    parser.add_argument('--noise', type=float, default=1.5, help="measurement noise in cm")
+    parser.add_argument('--boot-headers', action='store_true',
+                        help="repeat the CSV header after each reset, like a raw serial capture")
+    args = parser.parse_args()
+
+    data = generate(args.rows, seed=args.seed, resets=args.resets,
+                    dropout_rate=args.dropout_rate, noise_cm=args.noise)
+    write_capture(data, args.output, boot_headers=args.boot_headers)
+    print(f"✓ {len(data)} synthetic readings saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
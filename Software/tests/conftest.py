@@ -0,0 +1,30 @@
+"""
+Test Configuration for the Environmental Data Tools
+Author: [Your Name]
+Purpose: Make the flat modules in Software/ importable and share the test logs
+"""
+
+import os
+import sys
+
+import pytest
+
+SOFTWARE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SOFTWARE_DIR)
+
+SAMPLE_LOG = os.path.join(os.path.dirname(SOFTWARE_DIR), 'Data', 'sample-reading.csv')
+
+
+@pytest.fixture(scope='session')
+def sample():
+    """The sample log shipped in Data/, in the schema"""
+    from schema import read_readings
+    return read_readings(SAMPLE_LOG)
+
+
+@pytest.fixture(scope='session')
+def synthetic():
+    """A longer synthetic log (no resets, so Tempo(ms) is the time axis)"""
+    from schema import validate
+    from synthetic import generate
+    return validate(generate(5_000, seed=3))[0]
@@ -0,0 +1,78 @@
+"""
+Tests for the Correlation Analysis
+Author: [Your Name]
+Purpose: Check the cumulative-sum rolling correlation and the FFT lag scan against np.corrcoef
+"""
+
+import numpy as np
+import pytest
+
+from correlation import rolling_correlation, lag_correlation, strongest_lag, distance_reflectance, MIN_PAIRS
+
+
+def corrcoef(x, y, min_pairs=MIN_PAIRS):
+    """Pearson coefficient of the pairs where both values are present (NaN if undefined)"""
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if valid.sum() < min_pairs or np.ptp(x[valid]) == 0 or np.ptp(y[valid]) == 0:
+        return np.nan
+    return np.corrcoef(x[valid], y[valid])[0, 1]
+
+
+@pytest.fixture
+def pairs():
+    """Reflectance following distance by 3 readings, with gaps in the distance"""
+    rng = np.random.default_rng(11)
+    n = 1500
+    x = 50 + np.cumsum(rng.normal(0, 2, n))
+    y = np.empty(n)
+    y[3:] = 900 - 4 * x[:-3]
+    y[:3] = 900 - 4 * x[0]
+    y += rng.normal(0, 5, n)
+    x[rng.random(n) < 0.1] = np.nan
+    return x, y
+
+
+@pytest.mark.parametrize('window', [10, 37, 120])
+def test_rolling_matches_corrcoef(pairs, window):
+    x, y = pairs
+    rolling = rolling_correlation(x, y, window)
+    expected = np.array([corrcoef(x[max(i + 1 - window, 0):i + 1], y[max(i + 1 - window, 0):i + 1])
+                         for i in range(len(x))])
+    assert np.array_equal(np.isnan(rolling), np.isnan(expected))
+    defined = ~np.isnan(expected)
+    assert np.allclose(rolling[defined], expected[defined], atol=1e-9)
+
+
+def test_rolling_flat_window_is_undefined():
+    x = np.r_[np.full(50, 30.0), np.arange(50.0)]
+    y = np.arange(100.0)
+    rolling = rolling_correlation(x, y, 20)
+    assert np.isnan(rolling[20:50]).all()
+    assert rolling[-1] == pytest.approx(1.0)
+
+
+def test_lags_match_corrcoef(pairs):
+    x, y = pairs
+    max_lag = 8
+    lags = lag_correlation(x, y, max_lag)
+    assert list(lags.index) == list(range(-max_lag, max_lag + 1))
+    for k in lags.index:
+        if k >= 0:
+            expected = corrcoef(x[:len(x) - k], y[k:])
+        else:
+            expected = corrcoef(x[-k:], y[:len(y) + k])
+        assert lags[k] == pytest.approx(expected, abs=1e-9)
+    assert strongest_lag(lags)[0] == 3
+
+
+def test_lags_on_a_short_log():
+    x = np.arange(5.0)
+    lags = lag_correlation(x, -x, max_lag=20, min_pairs=2)
+    assert list(lags.index) == list(range(-4, 5))
+    assert lags[0] == pytest.approx(-1.0)
+
+
+def test_sample_log(sample):
+    distance, reflectance = distance_reflectance(sample)
+    lags = lag_correlation(distance, reflectance, 5)
+    assert lags[0] == pytest.approx(corrcoef(distance, reflectance), abs=1e-9)
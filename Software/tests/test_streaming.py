@@ -0,0 +1,112 @@
+"""
+Tests for the Mergeable One-Pass Summaries
+Author: [Your Name]
+Purpose: Check the Welford moments and co-moments, fed in chunks or merged, against NumPy
+"""
+
+import numpy as np
+import pytest
+
+from schema import distance_float
+from streaming import RunningMoments, CoMoments, IntegerHistogram, ReadingSummary
+
+
+def chunks(values, sizes):
+    """values cut into consecutive pieces of the given sizes (the rest is the last piece)"""
+    bounds = np.cumsum([0] + list(sizes))
+    return [values[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])] + [values[bounds[-1]:]]
+
+
+@pytest.fixture
+def values():
+    # A large offset makes the naive sum-of-squares formula lose most of its digits
+    rng = np.random.default_rng(7)
+    return 1e6 + rng.normal(0, 3, 10_001)
+
+
+@pytest.mark.parametrize('sizes', [[], [1], [1, 1, 1], [5000], [17] * 100, [9999, 1]])
+def test_running_moments_in_chunks(values, sizes):
+    moments = RunningMoments()
+    for chunk in chunks(values, sizes):
+        moments.update(chunk)
+    assert moments.n == len(values)
+    assert moments.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert moments.variance == pytest.approx(values.var(ddof=1), rel=1e-9)
+
+
+def test_running_moments_merge(values):
+    parts = chunks(values, [3000, 1, 4000])
+    merged = RunningMoments()
+    for part in parts:
+        moments = RunningMoments()
+        moments.update(part)
+        merged.merge(moments)
+    merged.merge(RunningMoments())  # an empty summary changes nothing
+    assert merged.n == len(values)
+    assert merged.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert merged.std == pytest.approx(values.std(ddof=1), rel=1e-9)
+
+
+def test_running_moments_state_round_trip(values):
+    moments = RunningMoments()
+    moments.update(values)
+    restored = RunningMoments.from_state(moments.to_state())
+    assert (restored.n, restored.mean, restored.m2) == (moments.n, moments.mean, moments.m2)
+
+
+@pytest.mark.parametrize('sizes', [[], [2], [100] * 50, [7000]])
+def test_co_moments_match_corrcoef(values, sizes):
+    rng = np.random.default_rng(8)
+    y = 500 - 0.8 * (values - 1e6) + rng.normal(0, 2, len(values))
+    merged = CoMoments()
+    for x_part, y_part in zip(chunks(values, sizes), chunks(y, sizes)):
+        part = CoMoments()
+        part.update(x_part, y_part)
+        merged.merge(part)
+    assert merged.n == len(values)
+    assert merged.correlation == pytest.approx(np.corrcoef(values, y)[0, 1], rel=1e-9)
+
+
+def test_co_moments_undefined_for_constant_values():
+    moments = CoMoments()
+    moments.update(np.ones(10), np.arange(10))
+    assert np.isnan(moments.correlation)
+
+
+def test_integer_histogram_median_and_range():
+    rng = np.random.default_rng(9)
+    for rows in (1001, 1000):
+        values = rng.integers(0, 400, rows)
+        histogram = IntegerHistogram(400)
+        for part in chunks(values, [10, 500]):
+            histogram.update(part)
+        assert histogram.total == len(values)
+        assert histogram.median() == np.median(values)
+        assert (histogram.min, histogram.max) == (values.min(), values.max())
+
+
+@pytest.mark.parametrize('chunk_rows', [7, 13, 1000])
+def test_reading_summary_in_chunks_matches_whole(synthetic, chunk_rows):
+    whole = ReadingSummary.from_frame(synthetic)
+    summary = ReadingSummary()
+    for start in range(0, len(synthetic), chunk_rows):
+        summary.update(synthetic.iloc[start:start + chunk_rows])
+    assert summary.rows == whole.rows
+    assert summary.duration_ms == whole.duration_ms
+    assert summary.valid_distances == whole.valid_distances
+    assert summary.distance_moments.mean == pytest.approx(whole.distance_moments.mean)
+    assert summary.distance_moments.variance == pytest.approx(whole.distance_moments.variance)
+    assert summary.correlation.correlation == pytest.approx(whole.correlation.correlation)
+    assert summary.states == whole.states
+    assert summary.runs.run_count == whole.runs.run_count
+
+
+def test_reading_summary_matches_pandas(sample):
+    summary = ReadingSummary.from_frame(sample)
+    distance = distance_float(sample['Distancia(cm)'])
+    valid = ~np.isnan(distance)
+    assert summary.valid_distances == valid.sum()
+    assert summary.distance_moments.mean == pytest.approx(distance[valid].mean())
+    assert summary.distance_moments.std == pytest.approx(np.std(distance[valid], ddof=1))
+    assert summary.correlation.correlation == pytest.approx(
+        np.corrcoef(distance[valid], sample['Luminosidade(IR)'].values[valid])[0, 1])
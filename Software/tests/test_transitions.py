@@ -0,0 +1,97 @@
+"""
+Tests for the State Transition Engine
+Author: [Your Name]
+Purpose: Check the run-length engine against the original iloc loop of analyze_state_transitions
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from transitions import encode_runs, dwell_statistics, transition_matrix, StateRunAccumulator
+
+
+def baseline_transitions(data):
+    """The original analysis: (number of state starts, mean dwell seconds per state)"""
+    state_changes = data['Estado'] != data['Estado'].shift()
+    state_starts = data[state_changes]
+    durations = {}
+    for i in range(len(state_starts) - 1):
+        start_time = state_starts.iloc[i]['Tempo(ms)']
+        end_time = state_starts.iloc[i + 1]['Tempo(ms)']
+        durations.setdefault(state_starts.iloc[i]['Estado'], []).append((end_time - start_time) / 1000)
+    return len(state_starts), {state: np.mean(values) for state, values in durations.items()}
+
+
+def feed(data, bounds):
+    """StateRunAccumulator fed with the rows split at the given bounds"""
+    runs = StateRunAccumulator()
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        chunk = data.iloc[start:stop]
+        runs.update(chunk['Estado'], chunk['Tempo(ms)'].values)
+    return runs
+
+
+@pytest.fixture(params=['sample', 'synthetic'])
+def data(request):
+    return request.getfixturevalue(request.param)
+
+
+def test_runs_match_baseline(data):
+    starts, means = baseline_transitions(data)
+    runs = encode_runs(data['Estado'], data['Tempo(ms)'].values)
+    assert len(runs) == starts
+    stats = dwell_statistics(runs)
+    assert set(stats.index) == set(means)
+    for state, mean in means.items():
+        assert stats.loc[state, 'mean'] == pytest.approx(mean)
+
+
+def test_runs_cover_every_row(data):
+    runs = encode_runs(data['Estado'], data['Tempo(ms)'].values)
+    assert runs['samples'].sum() == len(data)
+    assert (runs['start_row'].values[1:] == runs['end_row'].values[:-1]).all()
+    assert not runs['complete'].iloc[-1] and runs['complete'].iloc[:-1].all()
+
+
+@pytest.mark.parametrize('chunk_rows', [3, 64, 10_000])
+def test_accumulator_matches_baseline_across_chunks(data, chunk_rows):
+    starts, means = baseline_transitions(data)
+    runs = feed(data, list(range(0, len(data), chunk_rows)) + [len(data)])
+    assert runs.run_count == starts
+    stats = runs.dwell_statistics()
+    for state, mean in means.items():
+        # Means come from exact totals; only the percentiles are binned
+        assert stats.loc[state, 'mean'] == pytest.approx(mean)
+    expected = transition_matrix(encode_runs(data['Estado'], data['Tempo(ms)'].values))
+    matrix = runs.transition_matrix().reindex(index=expected.index, columns=expected.columns, fill_value=0)
+    assert (matrix.values == expected.values).all()
+
+
+def test_accumulator_split_at_every_row(sample):
+    whole = feed(sample, [0, len(sample)])
+    for split in range(1, len(sample)):
+        runs = feed(sample, [0, split, len(sample)])
+        assert runs.run_count == whole.run_count
+        assert runs.transitions == whole.transitions
+        assert runs.dwell_ms == whole.dwell_ms
+
+
+def test_merge_equals_separate_logs(synthetic):
+    half = len(synthetic) // 2
+    first = feed(synthetic, [0, half])
+    second = feed(synthetic, [half, len(synthetic)])
+    merged = feed(synthetic, [0, half]).merge(second)
+    assert merged.run_count == first.run_count + second.run_count
+    for state in merged.dwell:
+        assert merged.dwell[state].sum() == first.dwell.get(state, np.zeros(1)).sum() + \
+            second.dwell.get(state, np.zeros(1)).sum()
+
+
+def test_clock_going_back_gives_zero_length_runs():
+    runs = StateRunAccumulator().update(pd.Series(['NORMAL', 'ALERTA_PROXIMO', 'NORMAL', 'NORMAL']),
+                                       np.array([0, 5000, 3000, 8000]))
+    assert runs.run_count == 3
+    stats = runs.dwell_statistics()
+    assert stats.loc['NORMAL', 'mean'] == 5.0
+    assert stats.loc['ALERTA_PROXIMO', 'mean'] == 0.0
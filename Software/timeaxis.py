@@ -0,0 +1,108 @@
+"""
+Time Axis Reconstruction for Environmental Data
+Author: [Your Name]
+Purpose: Turn the Arduino millis() column into a continuous, real-time DatetimeIndex
+"""
+
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# millis() is an unsigned long and wraps after 2^32 ms (about 49.7 days)
+MILLIS_WRAP = 2 ** 32
+
+# Sampling interval of the sketch (delay(500) in loop())
+SAMPLE_INTERVAL_MS = 500
+
+# A backward jump counts as a wraparound only if the stitched gap stays this small
+MAX_WRAP_GAP_MS = 60_000
+
+
+class TimeStitcher:
+    """Stitch millis() sessions split by board resets and wraparounds into one timeline
+
+    The stitcher keeps its state between calls, so a log can be fed chunk by
+    chunk and the elapsed times stay continuous across chunk boundaries.
+    """
+
+    def __init__(self, interval_ms=SAMPLE_INTERVAL_MS, max_wrap_gap_ms=MAX_WRAP_GAP_MS):
+        self.interval_ms = interval_ms
+        self.max_wrap_gap_ms = max_wrap_gap_ms
+        self.offset = 0
+        self.last_raw = None
+        self.rows_seen = 0
+        self.breaks = []  # (row, kind, raw time before, raw time after)
+
+    def stitch(self, tempo_ms):
+        """Return stitched milliseconds since the first boot as an int64 array"""
+        raw = np.asarray(tempo_ms, dtype=np.int64)
+        if len(raw) == 0:
+            return raw.copy()
+
+        previous = np.empty_like(raw)
+        previous[1:] = raw[:-1]
+        previous[0] = raw[0] if self.last_raw is None else self.last_raw
+
+        backwards = raw < previous
+        increments = np.zeros_like(raw)
+        if backwards.any():
+            wrapped = backwards & (raw + MILLIS_WRAP - previous <= self.max_wrap_gap_ms)
+            reset = backwards & ~wrapped
+
+            # Wraparound: millis() lost exactly 2^32 ms
+            increments[wrapped] = MILLIS_WRAP
+            # Reset: the new session restarts counting from boot, one interval after the last reading
+            increments[reset] = previous[reset] + self.interval_ms
+
+            rows = np.flatnonzero(backwards)
+            for row in rows:
+                kind = 'wraparound' if wrapped[row] else 'reset'
+                self.breaks.append((self.rows_seen + row, kind, int(previous[row]), int(raw[row])))
+
+        elapsed = raw + np.cumsum(increments) + self.offset
+
+        self.offset += int(increments.sum())
+        self.last_raw = int(raw[-1])
+        self.rows_seen += len(raw)
+        return elapsed
+
+    def sessions(self):
+        """Session boundaries found so far as a DataFrame"""
+        return pd.DataFrame(self.breaks, columns=['row', 'kind', 'before_ms', 'after_ms'])
+
+
+def anchor_elapsed(elapsed_ms, start_time=None, end_time=None):
+    """Anchor elapsed milliseconds to the real time of the first boot (or of the last reading)"""
+    elapsed = np.asarray(elapsed_ms, dtype=np.int64).astype('timedelta64[ms]')
+    if start_time is None:
+        if end_time is None:
+            raise ValueError("Either start_time or end_time is required to anchor the time axis")
+        last = elapsed[-1] if len(elapsed) else np.timedelta64(0, 'ms')
+        start_time = pd.Timestamp(end_time) - pd.Timedelta(last)
+    start = np.datetime64(pd.Timestamp(start_time).to_datetime64(), 'ms')
+    return pd.DatetimeIndex(start + elapsed, name='datetime')
+
+
+def build_time_index(tempo_ms, start_time=None, end_time=None, interval_ms=SAMPLE_INTERVAL_MS):
+    """Build a DatetimeIndex from a raw Tempo(ms) column without per-row Python calls"""
+    stitcher = TimeStitcher(interval_ms=interval_ms)
+    elapsed = stitcher.stitch(tempo_ms)
+    return anchor_elapsed(elapsed, start_time=start_time, end_time=end_time)
+
+
+def local_times(seconds):
+    """Local wall-clock times (naive) of POSIX timestamps, as datetime.fromtimestamp gives them
+
+    Each distinct timestamp is converted once, so a batch of lines read
+    together costs one conversion; the local UTC offset (including DST) is
+    that of each timestamp.
+    """
+    distinct, inverse = np.unique(np.asarray(seconds, dtype=np.float64), return_inverse=True)
+    return pd.DatetimeIndex([datetime.fromtimestamp(value) for value in distinct], dtype='datetime64[us]')[inverse]
+
+
+def file_end_time(filename):
+    """Time of the last reading in a log, taken from the file's modification time"""
+    return local_times([os.path.getmtime(filename)])[0]
@@ -0,0 +1,159 @@
+"""
+Time Index for Environmental Data Logs
+Author: [Your Name]
+Purpose: Sparse on-disk offset index to read one time range of a CSV log without parsing the rest
+
+Every CHECKPOINT_LINES lines the index records the byte offset of the line,
+the stitched time of its first reading and the stitcher's state at that
+point. Reading a range seeks to the checkpoint before it, parses only the
+blocks that overlap it and continues stitching from the saved state, so
+resets and wraparounds earlier in the log are still accounted for.
+"""
+
+import io
+import os
+import mmap
+
+import numpy as np
+import pandas as pd
+
+from schema import CSV_COLUMNS, READ_DTYPES, validate
+from timeaxis import TimeStitcher, file_end_time
+
+CHECKPOINT_LINES = 50_000
+
+# Stored next to the log: readings.csv -> readings.csv.idx.npz
+INDEX_SUFFIX = '.idx.npz'
+
+# Newlines are searched in blocks of this many bytes
+SCAN_BYTES = 64 * 1024 * 1024
+
+
+def line_starts(filename):
+    """Byte offset of the start of every line (and of the end of the file)"""
+    size = os.path.getsize(filename)
+    if size == 0:
+        return np.zeros(1, dtype=np.int64)
+    starts = [np.zeros(1, dtype=np.int64)]
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for block in range(0, size, SCAN_BYTES):
+            chunk = np.frombuffer(data, dtype=np.uint8, count=min(SCAN_BYTES, size - block), offset=block)
+            starts.append(np.flatnonzero(chunk == 10).astype(np.int64) + block + 1)
+            del chunk  # the mmap cannot close while a view is alive
+    starts = np.concatenate(starts)
+    return starts if starts[-1] == size else np.append(starts, size)
+
+
+def _parse_block(raw):
+    """Validated readings of a block of CSV lines (header lines are rejected as invalid)"""
+    if not raw.strip():
+        return validate(pd.DataFrame({column: pd.Series(dtype=object) for column in CSV_COLUMNS}))[0]
+    frame = pd.read_csv(io.BytesIO(raw), names=CSV_COLUMNS, header=None, dtype=READ_DTYPES,
+                        low_memory=False)
+    return validate(frame)[0]
+
+
+class OffsetIndex:
+    """Checkpoints into one CSV log: byte offset, stitched time and stitcher state"""
+
+    def __init__(self, filename, offsets, first_ms, stitch_offset, last_raw, end_ms, size, mtime):
+        self.filename = filename
+        self.offsets = offsets              # checkpoint byte offsets, plus the end of the file
+        self.first_ms = first_ms            # stitched time of each block's first reading
+        self.stitch_offset = stitch_offset  # stitcher state before each block
+        self.last_raw = last_raw            # (-1 before the first reading)
+        self.end_ms = end_ms                # stitched time of the last reading
+        self.size = size
+        self.mtime = mtime
+
+    @classmethod
+    def build(cls, filename, checkpoint_lines=CHECKPOINT_LINES):
+        """Index a log in one pass, block by block"""
+        lines = line_starts(filename)
+        offsets = lines[::checkpoint_lines]
+        if offsets[-1] != lines[-1]:
+            offsets = np.append(offsets, lines[-1])
+
+        stitcher = TimeStitcher()
+        first_ms, stitch_offset, last_raw = [], [], []
+        previous_ms = 0
+        with open(filename, 'rb') as f:
+            for start, end in zip(offsets[:-1], offsets[1:]):
+                stitch_offset.append(stitcher.offset)
+                last_raw.append(-1 if stitcher.last_raw is None else stitcher.last_raw)
+                f.seek(start)
+                block = _parse_block(f.read(end - start))
+                elapsed = stitcher.stitch(block['Tempo(ms)'].values)
+                # Blocks without readings keep the previous time so first_ms stays sorted
+                previous_ms = int(elapsed[0]) if len(elapsed) else previous_ms
+                first_ms.append(previous_ms)
+
+        end_ms = stitcher.offset + stitcher.last_raw if stitcher.last_raw is not None else 0
+        return cls(filename, offsets, np.array(first_ms, dtype=np.int64),
+                   np.array(stitch_offset, dtype=np.int64), np.array(last_raw, dtype=np.int64),
+                   end_ms, os.path.getsize(filename), os.path.getmtime(filename))
+
+    def save(self, path=None):
+        path = path or self.filename + INDEX_SUFFIX
+        np.savez(path, offsets=self.offsets, first_ms=self.first_ms, stitch_offset=self.stitch_offset,
+                 last_raw=self.last_raw, meta=np.array([self.end_ms, self.size, self.mtime], dtype=np.float64))
+        return path
+
+    @classmethod
+    def load(cls, filename, path=None):
+        with np.load(path or filename + INDEX_SUFFIX) as index:
+            end_ms, size, mtime = index['meta']
+            return cls(filename, index['offsets'], index['first_ms'], index['stitch_offset'],
+                       index['last_raw'], int(end_ms), int(size), mtime)
+
+    def is_current(self):
+        """False once the log was rewritten or appended to after indexing"""
+        return os.path.getsize(self.filename) == self.size and os.path.getmtime(self.filename) == self.mtime
+
+    def capture_start(self):
+        """Time of the first boot, taking the last reading to be the file's modification time
+
+        The stitched time of the last reading is used, so resets and
+        wraparounds earlier in the log do not shift the estimate.
+        """
+        return file_end_time(self.filename) - pd.Timedelta(milliseconds=int(self.end_ms))
+
+    @classmethod
+    def for_log(cls, filename, checkpoint_lines=CHECKPOINT_LINES):
+        """Saved index of a log, rebuilt (and saved when possible) if missing or stale"""
+        path = filename + INDEX_SUFFIX
+        if os.path.exists(path):
+            index = cls.load(filename, path)
+            if index.is_current():
+                return index
+        index = cls.build(filename, checkpoint_lines)
+        try:
+            index.save(path)
+        except OSError:
+            pass  # read-only location: the index lives for this process only
+        return index
+
+    def read(self, start_ms=None, end_ms=None):
+        """Readings with stitched times in [start_ms, end_ms) as (frame, elapsed_ms, breaks)
+
+        Only the blocks overlapping the range are read and parsed. breaks are
+        the resets and wraparounds inside the range, rows counted from its start.
+        """
+        n_blocks = len(self.first_ms)
+        first = 0 if start_ms is None else max(np.searchsorted(self.first_ms, start_ms, side='right') - 1, 0)
+        last = n_blocks if end_ms is None else np.searchsorted(self.first_ms, end_ms, side='left')
+        last = max(last, first + 1) if n_blocks else 0
+
+        stitcher = TimeStitcher()
+        if first < n_blocks:
+            stitcher.offset = int(self.stitch_offset[first])
+            stitcher.last_raw = None if self.last_raw[first] < 0 else int(self.last_raw[first])
+        with open(self.filename, 'rb') as f:
+            f.seek(self.offsets[first] if n_blocks else 0)
+            frame = _parse_block(f.read(int(self.offsets[last] - self.offsets[first])) if n_blocks else b'')
+        elapsed = stitcher.stitch(frame['Tempo(ms)'].values)
+
+        lo = 0 if start_ms is None else np.searchsorted(elapsed, start_ms, side='left')
+        hi = len(elapsed) if end_ms is None else np.searchsorted(elapsed, end_ms, side='left')
+        breaks = [(row - lo, *rest) for row, *rest in stitcher.breaks if lo < row < hi]
+        return frame.iloc[lo:hi].reset_index(drop=True), elapsed[lo:hi], breaks
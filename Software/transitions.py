@@ -0,0 +1,230 @@
+"""
+State Transition Engine for Environmental Data
+Author: [Your Name]
+Purpose: Run-length encode the Estado column and summarize state dwell times
+"""
+
+import numpy as np
+import pandas as pd
+
+# States printed by the sketch, in order of increasing proximity
+STATES = ['NORMAL', 'OBJETO_DETECTADO', 'ALERTA_PROXIMO']
+
+DWELL_PERCENTILES = [0.5, 0.9, 0.95, 0.99]
+
+# Resolution of the streaming dwell-time histograms
+DWELL_RESOLUTION_MS = 100
+
+RUN_COLUMNS = ['state', 'start_row', 'end_row', 'start_ms', 'end_ms', 'duration_s', 'samples', 'complete']
+
+
+def encode_runs(states, times_ms):
+    """Encode a state column into runs of (state, start, end, duration) in one pass
+
+    A run ends when the next one starts, so its duration matches the time
+    between state changes. The last run has no successor and is marked
+    incomplete; its end is the last reading.
+    """
+    times = np.asarray(times_ms, dtype=np.int64)
+    if isinstance(states, pd.Series):
+        states = states.array
+    if isinstance(states, pd.Categorical):
+        # Schema columns are already dictionary-encoded
+        codes, uniques = states.codes.astype(np.int64), states.categories
+    else:
+        codes, uniques = pd.factorize(np.asarray(states))
+    n = len(codes)
+    if n == 0:
+        return pd.DataFrame({column: [] for column in RUN_COLUMNS})
+
+    change = np.empty(n, dtype=bool)
+    change[0] = True
+    np.not_equal(codes[1:], codes[:-1], out=change[1:])
+
+    start_row = np.flatnonzero(change)
+    end_row = np.append(start_row[1:], n)
+    start_ms = times[start_row]
+    end_ms = np.append(start_ms[1:], times[-1])
+    complete = np.ones(len(start_row), dtype=bool)
+    complete[-1] = False
+
+    return pd.DataFrame({
+        'state': pd.Categorical.from_codes(codes[start_row], categories=uniques),
+        'start_row': start_row,
+        'end_row': end_row,
+        'start_ms': start_ms,
+        'end_ms': end_ms,
+        'duration_s': (end_ms - start_ms) / 1000,
+        'samples': end_row - start_row,
+        'complete': complete
+    })
+
+
+def transition_matrix(runs):
+    """Count transitions between consecutive runs (rows: from, columns: to)"""
+    states = pd.Categorical(runs['state'])
+    labels = list(states.categories)
+    codes = states.codes.astype(np.int64)
+    k = len(labels)
+    pairs = codes[:-1] * k + codes[1:]
+    counts = np.bincount(pairs, minlength=k * k).reshape(k, k)
+    matrix = pd.DataFrame(counts, index=labels, columns=labels)
+    matrix.index.name = 'from'
+    matrix.columns.name = 'to'
+    return matrix
+
+
+def dwell_statistics(runs, percentiles=DWELL_PERCENTILES):
+    """Dwell time distribution per state (seconds), over runs that have ended"""
+    complete = runs[runs['complete']]
+    grouped = complete.groupby('state', observed=True, sort=False)['duration_s']
+    return grouped.describe(percentiles=percentiles)
+
+
+def debounce_runs(runs, min_duration_s):
+    """Merge runs shorter than min_duration_s into the run before them
+
+    Short flickers are absorbed by the preceding run, and neighbours that
+    end up with the same state are joined into a single run.
+    """
+    if len(runs) == 0:
+        return runs
+
+    keep = (runs['duration_s'].values >= min_duration_s) | ~runs['complete'].values
+    keep[0] = True
+    kept = runs[keep]
+
+    codes = pd.Categorical(kept['state']).codes
+    change = np.empty(len(kept), dtype=bool)
+    change[0] = True
+    np.not_equal(codes[1:], codes[:-1], out=change[1:])
+
+    first = np.flatnonzero(change)
+    start_row = kept['start_row'].values[first]
+    start_ms = kept['start_ms'].values[first]
+    end_row = np.append(start_row[1:], runs['end_row'].values[-1])
+    end_ms = np.append(start_ms[1:], runs['end_ms'].values[-1])
+    complete = np.ones(len(first), dtype=bool)
+    complete[-1] = False
+
+    return pd.DataFrame({
+        'state': kept['state'].values[first],
+        'start_row': start_row,
+        'end_row': end_row,
+        'start_ms': start_ms,
+        'end_ms': end_ms,
+        'duration_s': (end_ms - start_ms) / 1000,
+        'samples': end_row - start_row,
+        'complete': complete
+    })
+
+
+def _histogram_quantile(counts, q):
+    """Linearly interpolated quantile of values stored as bin counts"""
+    n = counts.sum()
+    if n == 0:
+        return np.nan
+    cumulative = np.cumsum(counts)
+    position = q * (n - 1)
+    low = int(np.searchsorted(cumulative, np.floor(position), side='right'))
+    high = int(np.searchsorted(cumulative, np.ceil(position), side='right'))
+    return low + (high - low) * (position - np.floor(position))
+
+
+class StateRunAccumulator:
+    """Mergeable run statistics fed chunk by chunk
+
+    Keeps run counts, a transition matrix and dwell-time histograms per state,
+    carrying the open run across chunk boundaries.
+    """
+
+    def __init__(self, resolution_ms=DWELL_RESOLUTION_MS):
+        self.resolution_ms = resolution_ms
+        self.run_count = 0
+        self.transitions = {}   # (from, to) -> count
+        self.dwell = {}         # state -> histogram of durations in resolution_ms bins
+        self.dwell_ms = {}      # state -> exact total of closed run durations
+        self.open_state = None
+        self.open_start_ms = None
+
+    def update(self, states, times_ms):
+        runs = encode_runs(states, times_ms)
+        if len(runs) == 0:
+            return self
+
+        run_states = runs['state'].astype(object).values
+        start_ms = runs['start_ms'].values
+
+        # The first run of the chunk may continue the run left open by the previous chunk
+        if self.open_state is None:
+            self.run_count += len(run_states)
+        elif run_states[0] == self.open_state:
+            start_ms = start_ms.copy()
+            start_ms[0] = self.open_start_ms
+            self.run_count += len(run_states) - 1
+        else:
+            run_states = np.concatenate([[self.open_state], run_states])
+            start_ms = np.concatenate([[self.open_start_ms], start_ms])
+            self.run_count += len(run_states) - 1
+
+        # Every run but the last one is now closed. A clock that went back (set
+        # by hand, a DST change in stamped times) would give negative
+        # durations: such runs count as zero-length instead
+        durations = np.maximum(np.diff(start_ms), 0)
+        closed = run_states[:-1]
+        for state in pd.unique(closed):
+            state_durations = durations[closed == state]
+            self._add_dwell(state, np.bincount(state_durations // self.resolution_ms))
+            self.dwell_ms[state] = self.dwell_ms.get(state, 0) + int(state_durations.sum())
+
+        codes, uniques = pd.factorize(run_states)
+        k = len(uniques)
+        pairs = np.bincount(codes[:-1] * k + codes[1:], minlength=k * k)
+        for pair in np.flatnonzero(pairs):
+            key = (uniques[pair // k], uniques[pair % k])
+            self.transitions[key] = self.transitions.get(key, 0) + int(pairs[pair])
+
+        self.open_state = run_states[-1]
+        self.open_start_ms = int(start_ms[-1])
+        return self
+
+    def _add_dwell(self, state, counts):
+        current = self.dwell.get(state, np.zeros(0, dtype=np.int64))
+        if len(counts) > len(current):
+            current = np.pad(current, (0, len(counts) - len(current)))
+        current[:len(counts)] += counts
+        self.dwell[state] = current
+
+    def merge(self, other):
+        """Combine with runs from an independent log; its open run adds no dwell time"""
+        self.run_count += other.run_count
+        for key, count in other.transitions.items():
+            self.transitions[key] = self.transitions.get(key, 0) + count
+        for state, counts in other.dwell.items():
+            self._add_dwell(state, counts)
+            self.dwell_ms[state] = self.dwell_ms.get(state, 0) + other.dwell_ms[state]
+        return self
+
+    def transition_matrix(self):
+        labels = [s for s in STATES if s in self.dwell or s == self.open_state]
+        labels += sorted({s for pair in self.transitions for s in pair} - set(labels))
+        matrix = pd.DataFrame(0, index=labels, columns=labels, dtype=np.int64)
+        for (before, after), count in self.transitions.items():
+            matrix.loc[before, after] = count
+        matrix.index.name = 'from'
+        matrix.columns.name = 'to'
+        return matrix
+
+    def dwell_statistics(self, percentiles=DWELL_PERCENTILES):
+        """Same layout as dwell_statistics(), from the histograms (resolution_ms precision)"""
+        scale = self.resolution_ms / 1000
+        rows = {}
+        for state, counts in self.dwell.items():
+            values = np.arange(len(counts)) * scale
+            n = counts.sum()
+            row = {'count': float(n), 'mean': self.dwell_ms[state] / 1000 / n if n else np.nan}
+            for q in percentiles:
+                row[f'{q:.0%}'] = _histogram_quantile(counts, q) * scale
+            row['max'] = float(values[np.flatnonzero(counts)[-1]]) if n else np.nan
+            rows[state] = row
+        return pd.DataFrame.from_dict(rows, orient='index')
@@ -6,35 +6,55 @@ Purpose: Create advanced visualizations and dashboards
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.gridspec import GridSpec
-import seaborn as sns
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from plotting import pyplot
+from schema import read_readings
+from downsampling import axes_width_px, downsample, DEFAULT_WIDTH_PX, DISTANCE_THRESHOLDS
+from correlation import ROLLING_WINDOW, MAX_LAG, strongest_lag
+from plotly_export import write_figure, state_run_shapes
+from context import AnalysisContext
+from kde import histogram_kde, evaluate
+from instrumentation import span, traced, self_rows
 import warnings
 warnings.filterwarnings('ignore')
 
 class EnvironmentalVisualizer:
     """Advanced visualization class for environmental data"""
     
-    def __init__(self, data):
-        self.data = data
+    def __init__(self, data, downsample='minmax'):
+        # Accepts a DataFrame or an AnalysisContext shared with the analyzer
+        self.context = AnalysisContext.of(data)
+        self.downsample = downsample  # 'minmax', 'lttb' or None for every raw sample
         self.setup_styles()
     
+    @property
+    def data(self):
+        """The shared context's readings, including rows appended after construction"""
+        return self.context.data
+    
     def setup_styles(self):
         """Setup visualization styles"""
-        plt.style.use('seaborn-v0_8-darkgrid')
-        sns.set_palette("husl")
+        pyplot()  # imports matplotlib and applies the plot style once
         self.colors = {
             'NORMAL': '#3498db',      # Blue
             'OBJECT_DETECTED': '#2ecc71',  # Green
-            'ALERT_CLOSE': '#e74c3c'  # Red
+            'ALERT_CLOSE': '#e74c3c',  # Red
+            # State names as printed by the Arduino sketch
+            'OBJETO_DETECTADO': '#2ecc71',
+            'ALERTA_PROXIMO': '#e74c3c'
         }
     
+    @traced(rows=self_rows)
     def create_comprehensive_dashboard(self, output_file="environmental_dashboard.png"):
         """Create a comprehensive dashboard of all metrics"""
-        fig = plt.figure(figsize=(20, 15))
-        gs = GridSpec(4, 4, figure=fig)
+        from matplotlib.gridspec import GridSpec
+        from rendering import prepare_panels
+        
+        # Derived data of all ten panels is computed concurrently before drawing
+        prepare_panels(self.context)
+        
+        plt = pyplot()
+        fig = plt.figure(figsize=(20, 19))
+        gs = GridSpec(5, 4, figure=fig)
         
         # 1. Time Series - Distance
         ax1 = fig.add_subplot(gs[0, :2])
@@ -68,18 +88,29 @@ class EnvironmentalVisualizer:
         ax8 = fig.add_subplot(gs[3, 2:])
         self.plot_reflectance_by_state(ax8)
         
+        # 9. Rolling Correlation
+        ax9 = fig.add_subplot(gs[4, :2])
+        self.plot_rolling_correlation(ax9)
+        
+        # 10. Lag Scan
+        ax10 = fig.add_subplot(gs[4, 2:])
+        self.plot_lag_correlation(ax10)
+        
         plt.suptitle('Environmental Monitoring Station - Comprehensive Dashboard', 
                     fontsize=16, fontweight='bold', y=1.02)
         plt.tight_layout()
-        plt.savefig(output_file, dpi=150, bbox_inches='tight')
+        with span('savefig'):
+            plt.savefig(output_file, dpi=150, bbox_inches='tight')
         print(f"✓ Dashboard saved: {output_file}")
         
         return fig
     
+    @traced(rows=self_rows)
     def plot_distance_time_series(self, ax):
         """Plot distance measurements over time"""
-        time_seconds = self.data['Tempo(ms)'] / 1000
-        ax.plot(time_seconds, self.data['Distancia(cm)'], 'b-', alpha=0.7, linewidth=0.5)
+        time_seconds, distance = self.context.time_series('Distancia(cm)', axes_width_px(ax),
+                                                          self.downsample, DISTANCE_THRESHOLDS)
+        ax.plot(time_seconds, distance, 'b-', alpha=0.7, linewidth=0.5)
         ax.set_title('Distance Measurements Over Time', fontsize=12, fontweight='bold')
         ax.set_xlabel('Time (seconds)')
         ax.set_ylabel('Distance (cm)')
@@ -89,64 +120,72 @@ class EnvironmentalVisualizer:
         ax.legend(fontsize=9)
         
         # Add statistical annotations
-        valid_distances = self.data[self.data['Distancia(cm)'] < 999]['Distancia(cm)']
-        if len(valid_distances) > 0:
-            ax.text(0.02, 0.98, f'Mean: {valid_distances.mean():.1f} cm\nStd: {valid_distances.std():.1f} cm',
+        moments = self.context.summary.distance_moments
+        if moments.n > 0:
+            ax.text(0.02, 0.98, f'Mean: {moments.mean:.1f} cm\nStd: {moments.std:.1f} cm',
                    transform=ax.transAxes, verticalalignment='top',
                    bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.5))
     
+    @traced(rows=self_rows)
     def plot_reflectance_time_series(self, ax):
         """Plot reflectance measurements over time"""
-        time_seconds = self.data['Tempo(ms)'] / 1000
-        ax.plot(time_seconds, self.data['Luminosidade(IR)'], 'g-', alpha=0.7, linewidth=0.5)
+        time_seconds, reflectance = self.context.time_series('Luminosidade(IR)', axes_width_px(ax), self.downsample)
+        ax.plot(time_seconds, reflectance, 'g-', alpha=0.7, linewidth=0.5)
         ax.set_title('IR Reflectance Over Time', fontsize=12, fontweight='bold')
         ax.set_xlabel('Time (seconds)')
         ax.set_ylabel('Reflectance (0-1023)')
         ax.grid(True, alpha=0.3)
         
         # Add statistical annotations
-        ax.text(0.02, 0.98, f'Mean: {self.data["Luminosidade(IR)"].mean():.0f}\nStd: {self.data["Luminosidade(IR)"].std():.0f}',
+        moments = self.context.summary.reflectance_moments
+        ax.text(0.02, 0.98, f'Mean: {moments.mean:.0f}\nStd: {moments.std:.0f}',
                transform=ax.transAxes, verticalalignment='top',
                bbox=dict(boxstyle='round', facecolor='lightgreen', alpha=0.5))
     
+    @traced(rows=self_rows)
     def plot_distance_histogram(self, ax):
         """Plot histogram of distance measurements"""
-        valid_distances = self.data[self.data['Distancia(cm)'] < 999]['Distancia(cm)']
-        if len(valid_distances) > 0:
-            ax.hist(valid_distances, bins=30, alpha=0.7, color='blue', edgecolor='black')
+        histogram = self.context.summary.distance
+        if histogram.total > 0:
+            self._plot_histogram_with_density(ax, histogram, 'blue', 'r-')
             ax.set_title('Distance Distribution', fontsize=12, fontweight='bold')
             ax.set_xlabel('Distance (cm)')
             ax.set_ylabel('Frequency')
             ax.axvline(x=10, color='r', linestyle='--', alpha=0.7)
             ax.axvline(x=30, color='g', linestyle='--', alpha=0.7)
-            
-            # Add distribution curve
-            from scipy.stats import gaussian_kde
-            kde = gaussian_kde(valid_distances)
-            x_range = np.linspace(valid_distances.min(), valid_distances.max(), 100)
-            ax.plot(x_range, kde(x_range) * len(valid_distances) * (x_range[1]-x_range[0]),
-                   'r-', linewidth=2, alpha=0.8, label='Density')
             ax.legend()
     
+    @traced(rows=self_rows)
     def plot_reflectance_histogram(self, ax):
         """Plot histogram of reflectance measurements"""
-        ax.hist(self.data['Luminosidade(IR)'], bins=30, alpha=0.7, color='green', edgecolor='black')
+        histogram = self.context.summary.reflectance
+        self._plot_histogram_with_density(ax, histogram, 'green', 'b-')
         ax.set_title('Reflectance Distribution', fontsize=12, fontweight='bold')
         ax.set_xlabel('Reflectance')
         ax.set_ylabel('Frequency')
-        
-        # Add distribution curve
-        from scipy.stats import gaussian_kde
-        kde = gaussian_kde(self.data['Luminosidade(IR)'])
-        x_range = np.linspace(self.data['Luminosidade(IR)'].min(), 
-                             self.data['Luminosidade(IR)'].max(), 100)
-        ax.plot(x_range, kde(x_range) * len(self.data) * (x_range[1]-x_range[0]),
-               'b-', linewidth=2, alpha=0.8, label='Density')
         ax.legend()
     
+    @staticmethod
+    def _plot_histogram_with_density(ax, histogram, bar_color, line_style, bins=30):
+        """Draw bars and a density curve from the same integer histogram"""
+        low, high = histogram.min, histogram.max
+        counts = histogram.counts[low:high + 1]
+        values = np.arange(low, high + 1)
+        
+        # Bars: the integer counts regrouped into the usual 30 bins
+        ax.hist(values, bins=bins, range=(low, high), weights=counts,
+                alpha=0.7, color=bar_color, edgecolor='black')
+        
+        # Add distribution curve (binned Gaussian KDE, scaled like the 100-point curve it replaces)
+        grid, density = histogram_kde(counts, offset=low)
+        x_range = np.linspace(low, high, 100)
+        ax.plot(x_range, evaluate(grid, density, x_range) * counts.sum() * (x_range[1]-x_range[0]),
+               line_style, linewidth=2, alpha=0.8, label='Density')
+    
+    @traced(rows=self_rows)
     def plot_correlation_scatter(self, ax):
         """Plot correlation between distance and reflectance"""
-        valid_data = self.data[self.data['Distancia(cm)'] < 999]
+        valid_data = self.context.valid_data
         if len(valid_data) > 0:
             scatter = ax.scatter(valid_data['Distancia(cm)'],
                                valid_data['Luminosidade(IR)'],
@@ -157,7 +196,7 @@ class EnvironmentalVisualizer:
             ax.set_ylabel('Reflectance')
             
             # Add correlation coefficient
-            correlation = valid_data['Distancia(cm)'].corr(valid_data['Luminosidade(IR)'])
+            correlation = self.context.correlation
             ax.text(0.02, 0.98, f'Correlation: {correlation:.3f}',
                    transform=ax.transAxes, verticalalignment='top',
                    bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.5))
@@ -168,41 +207,98 @@ class EnvironmentalVisualizer:
                              for state in valid_data['Estado'].unique()]
             ax.legend(handles=legend_elements, fontsize=9)
     
-    def plot_state_timeline(self, ax):
+    @traced(rows=self_rows)
+    def plot_rolling_correlation(self, ax, window=ROLLING_WINDOW):
+        """Plot how the distance/reflectance correlation changes over time"""
+        time_seconds, rolling = downsample(self.context.time_seconds, self.context.rolling_correlation(window),
+                                           axes_width_px(ax), self.downsample)
+        ax.plot(time_seconds, rolling, color='purple', alpha=0.7, linewidth=0.5)
+        ax.axhline(y=self.context.correlation, color='k', linestyle='--', alpha=0.5, label='Overall')
+        ax.set_title(f'Rolling Correlation ({window} readings)', fontsize=12, fontweight='bold')
+        ax.set_xlabel('Time (seconds)')
+        ax.set_ylabel('Correlation')
+        ax.set_ylim(-1.05, 1.05)
+        ax.grid(True, alpha=0.3)
+        ax.legend(fontsize=9)
+    
+    @traced(rows=self_rows)
+    def plot_lag_correlation(self, ax, max_lag=MAX_LAG):
+        """Plot the correlation of distance with reflectance shifted by each lag"""
+        lags = self.context.lag_correlation(max_lag)
+        ax.bar(lags.index, lags.values, color='teal', alpha=0.7, edgecolor='black')
+        ax.set_title('Lag Scan: Distance vs Later Reflectance', fontsize=12, fontweight='bold')
+        ax.set_xlabel('Lag (readings; positive: reflectance trails distance)')
+        ax.set_ylabel('Correlation')
+        ax.axhline(y=0, color='k', linewidth=0.5)
+        ax.grid(True, alpha=0.3)
+        
+        lag, value = strongest_lag(lags)
+        if not np.isnan(value):
+            ax.text(0.02, 0.98, f'Strongest: {value:.3f} at lag {lag}',
+                   transform=ax.transAxes, verticalalignment='top',
+                   bbox=dict(boxstyle='round', facecolor='yellow', alpha=0.5))
+    
+    @traced(rows=self_rows)
+    def plot_state_timeline(self, ax, label_width_px=18):
         """Plot state changes over time"""
-        time_seconds = self.data['Tempo(ms)'] / 1000
+        from matplotlib.collections import PolyCollection
         
-        # Create color segments based on state
-        for i in range(len(self.data)-1):
-            state = self.data.iloc[i]['Estado']
-            color = self.colors.get(state, 'gray')
-            ax.axvspan(time_seconds.iloc[i], time_seconds.iloc[i+1],
-                      alpha=0.3, color=color)
+        # Merged state runs: cost follows the number of state changes, not samples
+        runs = self.context.runs
+        starts = runs['start_ms'].values / 1000
+        ends = runs['end_ms'].values / 1000
         
+        # One batched collection of rectangles per state
+        for state in runs['state'].cat.categories:
+            mask = (runs['state'] == state).values
+            x0, x1 = starts[mask], ends[mask]
+            verts = np.stack([
+                np.column_stack([x0, np.zeros_like(x0)]),
+                np.column_stack([x0, np.ones_like(x0)]),
+                np.column_stack([x1, np.ones_like(x1)]),
+                np.column_stack([x1, np.zeros_like(x1)])
+            ], axis=1)
+            ax.add_collection(PolyCollection(verts, facecolors=self.colors.get(state, 'gray'),
+                                             edgecolors='none', alpha=0.3))
+        
+        ax.set_xlim(starts[0], ends[-1] if ends[-1] > starts[0] else starts[0] + 1)
+        ax.set_ylim(0, 1)
         ax.set_title('System State Timeline', fontsize=12, fontweight='bold')
         ax.set_xlabel('Time (seconds)')
         ax.set_yticks([])
         
-        # Add state labels
-        state_changes = self.data['Estado'] != self.data['Estado'].shift()
-        for idx in self.data[state_changes].index:
-            ax.text(time_seconds.iloc[idx], 0.5, self.data.iloc[idx]['Estado'],
+        # Add state labels at run boundaries, skipping those that would overlap
+        for idx in self._thin_labels(ax, starts, label_width_px):
+            ax.text(starts[idx], 0.5, runs['state'].iloc[idx],
                    rotation=90, ha='center', va='center',
                    bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
     
+    @staticmethod
+    def _thin_labels(ax, positions, label_width_px):
+        """Indices of label positions spaced at least one label width apart on screen"""
+        x_min, x_max = ax.get_xlim()
+        width_px = max(ax.get_window_extent().width, 1)
+        min_gap = (x_max - x_min) * label_width_px / width_px
+        if min_gap <= 0 or len(positions) == 0:
+            return np.arange(len(positions))
+        
+        # Keep the first label per screen slot, then a greedy pass over the few survivors
+        slots = np.floor((positions - x_min) / min_gap)
+        _, first = np.unique(slots, return_index=True)
+        kept = []
+        for idx in first:
+            if not kept or positions[idx] - positions[kept[-1]] >= min_gap:
+                kept.append(idx)
+        return np.array(kept, dtype=int)
+    
+    @traced(rows=self_rows)
     def plot_distance_by_state(self, ax):
         """Plot box plot of distance by state"""
-        valid_data = self.data[self.data['Distancia(cm)'] < 999]
-        if len(valid_data) > 0:
-            states = []
-            distances = []
-            colors = []
-            
-            for state in valid_data['Estado'].unique():
-                state_data = valid_data[valid_data['Estado'] == state]
-                states.append(state)
-                distances.append(state_data['Distancia(cm)'].values)
-                colors.append(self.colors.get(state, 'gray'))
+        by_state = self.context.values_by_state('Distancia(cm)', valid_only=True)
+        if len(by_state) > 0:
+            states = list(by_state)
+            distances = list(by_state.values())
+            colors = [self.colors.get(state, 'gray') for state in states]
             
             bp = ax.boxplot(distances, labels=states, patch_artist=True)
             
@@ -215,17 +311,13 @@ class EnvironmentalVisualizer:
             ax.set_ylabel('Distance (cm)')
             ax.grid(True, alpha=0.3)
     
+    @traced(rows=self_rows)
     def plot_reflectance_by_state(self, ax):
         """Plot box plot of reflectance by state"""
-        states = []
-        reflectances = []
-        colors = []
-        
-        for state in self.data['Estado'].unique():
-            state_data = self.data[self.data['Estado'] == state]
-            states.append(state)
-            reflectances.append(state_data['Luminosidade(IR)'].values)
-            colors.append(self.colors.get(state, 'gray'))
+        by_state = self.context.values_by_state('Luminosidade(IR)')
+        states = list(by_state)
+        reflectances = list(by_state.values())
+        colors = [self.colors.get(state, 'gray') for state in states]
         
         bp = ax.boxplot(reflectances, labels=states, patch_artist=True)
         
@@ -238,8 +330,30 @@ class EnvironmentalVisualizer:
         ax.set_ylabel('Reflectance')
         ax.grid(True, alpha=0.3)
 
-def create_interactive_dashboard(data, output_file="interactive_dashboard.html"):
-    """Create interactive Plotly dashboard"""
+@traced(rows=lambda data, *args, **kwargs: len(AnalysisContext.of(data).data))
+def create_interactive_dashboard(data, output_file="interactive_dashboard.html",
+                                 downsample_method='minmax', width_px=DEFAULT_WIDTH_PX,
+                                 high_volume=False, sidecar=False):
+    """Create interactive Plotly dashboard
+
+    high_volume switches to WebGL traces, pre-binned histograms, state runs
+    drawn as shapes and binary-encoded arrays; sidecar additionally moves the
+    arrays into a gzip file the page loads on demand.
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
+    context = AnalysisContext.of(data)
+    data = context.data
+    Scatter = go.Scattergl if high_volume else go.Scatter
+    
+    # Each time-series panel spans half the figure width
+    time_seconds = context.time_seconds
+    distance_x, distance_y = context.time_series('Distancia(cm)', width_px // 2,
+                                                 downsample_method, DISTANCE_THRESHOLDS)
+    reflectance_x, reflectance_y = context.time_series('Luminosidade(IR)', width_px // 2,
+                                                       downsample_method)
+    
     fig = make_subplots(
         rows=3, cols=2,
         subplot_titles=('Distance Over Time', 'Reflectance Over Time',
@@ -252,9 +366,9 @@ def create_interactive_dashboard(data, output_file="interactive_dashboard.html")
     
     # 1. Distance over time
     fig.add_trace(
-        go.Scatter(
-            x=data['Tempo(ms)']/1000,
-            y=data['Distancia(cm)'],
+        Scatter(
+            x=distance_x,
+            y=distance_y,
             mode='lines',
             name='Distance',
             line=dict(color='blue', width=1),
@@ -271,9 +385,9 @@ def create_interactive_dashboard(data, output_file="interactive_dashboard.html")
     
     # 2. Reflectance over time
     fig.add_trace(
-        go.Scatter(
-            x=data['Tempo(ms)']/1000,
-            y=data['Luminosidade(IR)'],
+        Scatter(
+            x=reflectance_x,
+            y=reflectance_y,
             mode='lines',
             name='Reflectance',
             line=dict(color='green', width=1),
@@ -283,67 +397,113 @@ def create_interactive_dashboard(data, output_file="interactive_dashboard.html")
     )
     
     # 3. Distance histogram
-    valid_distances = data[data['Distancia(cm)'] < 999]['Distancia(cm)']
-    fig.add_trace(
-        go.Histogram(
-            x=valid_distances,
-            name='Distance Distribution',
-            marker_color='blue',
-            opacity=0.7,
-            nbinsx=30
-        ),
-        row=2, col=1
-    )
+    valid_distances = context.valid_distances
+    if high_volume:
+        fig.add_trace(_binned_bar(valid_distances, 'Distance Distribution', 'blue'), row=2, col=1)
+    else:
+        fig.add_trace(
+            go.Histogram(
+                x=valid_distances,
+                name='Distance Distribution',
+                marker_color='blue',
+                opacity=0.7,
+                nbinsx=30
+            ),
+            row=2, col=1
+        )
     
     # 4. Reflectance histogram
-    fig.add_trace(
-        go.Histogram(
-            x=data['Luminosidade(IR)'],
-            name='Reflectance Distribution',
-            marker_color='green',
-            opacity=0.7,
-            nbinsx=30
-        ),
-        row=2, col=2
-    )
+    if high_volume:
+        fig.add_trace(_binned_bar(data['Luminosidade(IR)'], 'Reflectance Distribution', 'green'), row=2, col=2)
+    else:
+        fig.add_trace(
+            go.Histogram(
+                x=data['Luminosidade(IR)'],
+                name='Reflectance Distribution',
+                marker_color='green',
+                opacity=0.7,
+                nbinsx=30
+            ),
+            row=2, col=2
+        )
     
     # 5. Correlation scatter
-    valid_data = data[data['Distancia(cm)'] < 999]
-    color_map = {'NORMAL': 'blue', 'OBJECT_DETECTED': 'green', 'ALERT_CLOSE': 'red'}
-    colors = valid_data['Estado'].map(color_map)
+    valid_data = context.valid_data
+    color_map = {'NORMAL': 'blue', 'OBJECT_DETECTED': 'green', 'ALERT_CLOSE': 'red',
+                 'OBJETO_DETECTADO': 'green', 'ALERTA_PROXIMO': 'red'}
     
-    fig.add_trace(
-        go.Scatter(
-            x=valid_data['Distancia(cm)'],
-            y=valid_data['Luminosidade(IR)'],
-            mode='markers',
-            name='Correlation',
-            marker=dict(
-                color=colors,
-                size=8,
-                opacity=0.6
+    if high_volume:
+        # Distance and reflectance are integers, so identical points are drawn once with a count
+        pairs = (valid_data.groupby(['Estado', 'Distancia(cm)', 'Luminosidade(IR)'], observed=True)
+                 .size().rename('count').reset_index())
+        for state, state_pairs in pairs.groupby('Estado', observed=True):
+            fig.add_trace(
+                go.Scattergl(
+                    x=state_pairs['Distancia(cm)'].values,
+                    y=state_pairs['Luminosidade(IR)'].values,
+                    customdata=state_pairs['count'].values,
+                    mode='markers',
+                    name=f'{state} (readings)',
+                    marker=dict(color=color_map.get(state, 'gray'), size=8, opacity=0.6),
+                    hovertemplate='Distance: %{x:.1f}cm<br>Reflectance: %{y:.0f}<br>Readings: %{customdata}'
+                ),
+                row=3, col=1
+            )
+    else:
+        colors = valid_data['Estado'].map(color_map)
+        fig.add_trace(
+            go.Scatter(
+                x=valid_data['Distancia(cm)'],
+                y=valid_data['Luminosidade(IR)'],
+                mode='markers',
+                name='Correlation',
+                marker=dict(
+                    color=colors,
+                    size=8,
+                    opacity=0.6
+                ),
+                text=valid_data['Estado'],
+                hovertemplate='Distance: %{x:.1f}cm<br>Reflectance: %{y:.0f}<br>State: %{text}'
             ),
-            text=valid_data['Estado'],
-            hovertemplate='Distance: %{x:.1f}cm<br>Reflectance: %{y:.0f}<br>State: %{text}'
-        ),
-        row=3, col=1
-    )
+            row=3, col=1
+        )
     
     # 6. State timeline
-    for state, color in color_map.items():
-        state_data = data[data['Estado'] == state]
-        if len(state_data) > 0:
+    if high_volume:
+        # One rectangle per state run instead of one marker per reading
+        present = set(context.state_counts.index)
+        state_order = [state for state in color_map if state in present]
+        subplot = fig.get_subplot(3, 2)
+        # Appended: update_layout(shapes=...) would overwrite the threshold lines
+        fig.layout.shapes += tuple(state_run_shapes(
+            data['Estado'].values, context.elapsed_ms, state_order, color_map,
+            xref=subplot.yaxis.anchor, yref=subplot.xaxis.anchor, width_px=width_px // 2
+        ))
+        for state in state_order:
             fig.add_trace(
-                go.Scatter(
-                    x=state_data['Tempo(ms)']/1000,
-                    y=[state] * len(state_data),
-                    mode='markers',
-                    name=state,
-                    marker=dict(color=color, size=10),
-                    showlegend=True
-                ),
+                go.Scattergl(x=[None], y=[None], mode='markers', name=state,
+                             marker=dict(color=color_map[state], size=10, symbol='square')),
                 row=3, col=2
             )
+        fig.update_yaxes(tickvals=list(range(len(state_order))), ticktext=state_order,
+                         range=[-0.5, len(state_order) - 0.5], row=3, col=2)
+        fig.update_xaxes(range=[time_seconds.min(), time_seconds.max()], row=3, col=2)
+    else:
+        rows_by_state = context.rows_by_state
+        for state, color in color_map.items():
+            rows = rows_by_state.get(state)
+            if rows is not None:
+                fig.add_trace(
+                    go.Scatter(
+                        x=time_seconds[rows],
+                        y=[state] * len(rows),
+                        mode='markers',
+                        name=state,
+                        marker=dict(color=color, size=10),
+                        showlegend=True
+                    ),
+                    row=3, col=2
+                )
     
     # Update layout
     fig.update_layout(
@@ -367,10 +527,20 @@ def create_interactive_dashboard(data, output_file="interactive_dashboard.html")
     fig.update_xaxes(title_text="Time (seconds)", row=3, col=2)
     fig.update_yaxes(title_text="State", row=3, col=2)
     
-    fig.write_html(output_file)
+    written = write_figure(fig, output_file, high_volume=high_volume, sidecar=sidecar)
     print(f"✓ Interactive dashboard saved: {output_file}")
+    if written != output_file:
+        print(f"  Data sidecar: {written} (serve the directory over HTTP to view)")
     return fig
 
+def _binned_bar(values, name, color, bins=30):
+    """Histogram pre-binned in Python so only the bin counts reach the page"""
+    import plotly.graph_objects as go
+    
+    counts, edges = np.histogram(np.asarray(values, dtype=np.float64), bins=bins)
+    return go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+                  name=name, marker_color=color, opacity=0.7)
+
 def main():
     """Main function to run visualizations"""
     print("="*60)
@@ -379,7 +549,7 @@ def main():
     
     # Load sample data
     try:
-        data = pd.read_csv("sample_readings.csv")
+        data = read_readings("sample_readings.csv")
         print(f"Loaded {len(data)} records for visualization")
         
         # Create visualizer instance